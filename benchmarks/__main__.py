@@ -0,0 +1,86 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from benchmarks import harness
+# imported for the benchmarks they register
+from benchmarks import scheduler, primitives, networking, memory  # noqa: F401
+
+import argparse
+import platform
+import subprocess
+import fnmatch
+import json
+import time
+import sys
+
+
+def revision():
+    """Returns the git commit of the working tree, if available."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.STDOUT
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Runs the straight benchmarks and prints the results as "
+                    "JSON.")
+    parser.add_argument("patterns", nargs="*", default=["*"],
+                        help="only run benchmarks matching these patterns")
+    parser.add_argument("-o", "--output", help="write the results to a file")
+    parser.add_argument("-l", "--list", action="store_true",
+                        help="list the benchmarks and exit")
+    arguments = parser.parse_args()
+
+    names = [name for name in harness.benchmarks
+             if any(fnmatch.fnmatch(name, p) for p in arguments.patterns)]
+    if arguments.list:
+        for name in names:
+            print(name)
+        return
+
+    results = {}
+    for name in names:
+        sys.stderr.write("{0}... ".format(name))
+        sys.stderr.flush()
+        try:
+            results[name] = harness.run(name)
+            sys.stderr.write("done\n")
+        except Exception as e:
+            results[name] = {"error": repr(e)}
+            sys.stderr.write("failed\n")
+
+    report = {
+        "revision": revision(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
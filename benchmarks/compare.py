@@ -0,0 +1,68 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import argparse
+import json
+
+# measurements where lower is better; for the others, higher is better
+_LOWER = ("p50", "p90", "p99", "max", "elapsed", "wakeup_all",
+          "bytes_per_connection", "bytes_per_thread", "bytes_per_event",
+          "bytes_per_lock")
+
+
+def compare(old, new, threshold):
+    """Yields (benchmark, measurement, old, new, change, regression) for every
+    measurement present in both reports."""
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        before, after = old["results"][name], new["results"][name]
+        for key in sorted(set(before) & set(after)):
+            a, b = before[key], after[key]
+            if not isinstance(a, (int, float)) or not a:
+                continue
+            change = (b - a) / a
+            worse = change > threshold if key in _LOWER else \
+                change < -threshold
+            yield name, key, a, b, change, worse
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.compare",
+        description="Compares two benchmark reports. Exits with status 1 if "
+                    "any measurement regressed by more than the threshold.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="relative change considered a regression "
+                             "(default: 0.1)")
+    arguments = parser.parse_args()
+
+    with open(arguments.old) as f:
+        old = json.load(f)
+    with open(arguments.new) as f:
+        new = json.load(f)
+
+    regressions = 0
+    for name, key, a, b, change, worse in compare(old, new,
+                                                  arguments.threshold):
+        regressions += worse
+        print("{0:<28} {1:<20} {2:>14.6g} {3:>14.6g} {4:>+8.1%}{5}".format(
+            name, key, a, b, change, "  REGRESSION" if worse else ""))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import Thread
+from straight import ioloop
+
+import collections
+import logging
+import time
+import pyuv
+import sys
+
+clock = getattr(time, "perf_counter", time.time)
+
+# all registered benchmarks, by name, in registration order
+benchmarks = collections.OrderedDict()
+
+
+def benchmark(name, **params):
+    """Registers the decorated function as a benchmark. The function is called
+    from a straight thread with `params` as keyword arguments, and must return
+    a dictionary of measurements. The same function may be registered several
+    times under different names, with different parameters."""
+    def register(function):
+        benchmarks[name] = (function, params)
+        return function
+    return register
+
+
+def percentiles(samples):
+    """Summarizes a list of latency samples (in seconds)."""
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def at(percent):
+        index = int(len(samples) * percent / 100)
+        return samples[min(len(samples) - 1, index)]
+    return {"p50": at(50), "p90": at(90), "p99": at(99), "max": samples[-1]}
+
+
+def run(name):
+    """Runs a single benchmark in a straight thread and the loop until it
+    completes. Returns its measurements; exceptions are re-raised, and a
+    RuntimeError is raised if the benchmark's threads all blocked forever."""
+    function, params = benchmarks[name]
+    outcome = {}
+
+    def target():
+        try:
+            start = clock()
+            outcome["result"] = function(**params)
+            outcome["result"].setdefault("elapsed", clock() - start)
+        except Exception:
+            outcome["error"] = sys.exc_info()[1]
+            logging.exception("Benchmark '{0}' failed".format(name))
+        finally:
+            ioloop.stop()
+
+    Thread(target, name=name).start()
+    ioloop.start()
+
+    # stop whatever the benchmark left running (e.g. servers)
+    for thread in Thread.enumerate():
+        thread.stop()
+    for _ in range(100):
+        if not Thread.enumerate():
+            break
+        ioloop.default.run(pyuv.UV_RUN_NOWAIT)
+
+    if "error" in outcome:
+        raise outcome["error"]
+    if "result" not in outcome:
+        # the loop ran out of things to do before the benchmark returned
+        raise RuntimeError("Benchmark '{0}' never finished: all its threads "
+                           "were waiting for something that could not "
+                           "happen anymore".format(name))
+    return outcome["result"]
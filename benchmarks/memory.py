@@ -0,0 +1,79 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from benchmarks.harness import benchmark
+from straight.networking.connection import BaseConnection
+from straight.threading import Thread, Event, Lock
+
+import socket
+import gc
+
+try:
+    import tracemalloc
+except ImportError:
+    # python 2
+    tracemalloc = None
+
+
+def _allocated(factory, count):
+    """Returns the average number of bytes allocated by `factory()`, measured
+    over `count` calls. The created objects are kept alive until the end of
+    the measurement."""
+    if tracemalloc is None:
+        raise RuntimeError("Memory benchmarks require tracemalloc")
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+@benchmark("memory_idle_connection", count=1000)
+def idle_connection(count):
+    """Memory used by an idle connection object (excluding the kernel socket
+    buffers), measured on one end of a socket pair."""
+    pairs = []
+
+    def connect():
+        local, remote = socket.socketpair()
+        pairs.append(remote)
+        return BaseConnection(None, local, None)
+
+    try:
+        return {"bytes_per_connection": _allocated(connect, count)}
+    finally:
+        for remote in pairs:
+            remote.close()
+
+
+@benchmark("memory_thread", count=10000)
+def thread(count):
+    """Memory used by a thread object that was not started yet."""
+    return {"bytes_per_thread": _allocated(lambda: Thread(None), count)}
+
+
+@benchmark("memory_primitives", count=10000)
+def primitives(count):
+    """Memory used by events and locks no thread waits for."""
+    return {
+        "bytes_per_event": _allocated(Event, count),
+        "bytes_per_lock": _allocated(Lock, count),
+    }
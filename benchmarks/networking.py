@@ -0,0 +1,105 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from benchmarks.harness import benchmark, clock, percentiles
+from straight.networking import Server, Connection
+from straight.threading import TaskGroup
+
+import itertools
+
+_ports = itertools.count(20000)
+
+
+class EchoServer(Server):
+    def handle(self, connection):
+        while True:
+            data = connection.read(65536)
+            if not data:
+                break
+            connection.writeall(data)
+
+
+@benchmark("echo_1", clients=1, messages=10000, size=64)
+@benchmark("echo_100", clients=100, messages=1000, size=64)
+@benchmark("echo_10000", clients=10000, messages=10, size=64)
+@benchmark("echo_1_64k", clients=1, messages=1000, size=65536)
+def echo(clients, messages, size):
+    """`clients` concurrent connections each send `messages` messages of
+    `size` bytes to a loopback echo server and wait for every echo before
+    sending the next one."""
+    port = next(_ports)
+    server = EchoServer(port, interface="127.0.0.1")
+    server.start()
+    payload = b"x" * size
+    samples = []
+
+    def client():
+        with Connection("127.0.0.1", port) as connection:
+            for _ in range(messages):
+                start = clock()
+                connection.writeall(payload)
+                connection.readall(size)
+                samples.append(clock() - start)
+
+    start = clock()
+    try:
+        with TaskGroup() as group:
+            for _ in range(clients):
+                group.spawn(client)
+    finally:
+        server.stop()
+    elapsed = clock() - start
+
+    result = percentiles(samples)
+    result["round_trips_per_sec"] = len(samples) / elapsed
+    result["bytes_per_sec"] = 2 * size * len(samples) / elapsed
+    return result
+
+
+class HeaderServer(Server):
+    def __init__(self, port, header, **kwargs):
+        Server.__init__(self, port, **kwargs)
+        self.header = header
+
+    def handle(self, connection):
+        while connection.read(1):
+            connection.writeall(self.header)
+
+
+@benchmark("readuntil_headers_8k", size=8192, requests=1000)
+@benchmark("readuntil_headers_64k", size=65536, requests=200)
+def readuntil_headers(size, requests):
+    """Reads `requests` responses made of `size` bytes of HTTP-like header
+    lines terminated by an empty line, with `readuntil`."""
+    line = b"X-Header: " + b"v" * 54 + b"\r\n"
+    header = line * (size // len(line)) + b"\r\n"
+    port = next(_ports)
+    server = HeaderServer(port, header, interface="127.0.0.1")
+    server.start()
+    samples = []
+    try:
+        with Connection("127.0.0.1", port) as connection:
+            for _ in range(requests):
+                start = clock()
+                connection.writeall(b"?")
+                connection.readuntil(b"\r\n\r\n")
+                samples.append(clock() - start)
+    finally:
+        server.stop()
+
+    result = percentiles(samples)
+    result["bytes_per_sec"] = len(header) * requests / sum(samples)
+    return result
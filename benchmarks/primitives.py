@@ -0,0 +1,98 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from benchmarks.harness import benchmark, clock
+from straight.threading import Thread, Event, Lock, Semaphore, Condition
+
+
+@benchmark("event_wakeup_100", waiters=100, rounds=100)
+@benchmark("event_wakeup_10000", waiters=10000, rounds=5)
+def event_wakeup(waiters, rounds):
+    """Measures the time between `Event.set` and the moment all `waiters`
+    threads waiting for the event were resumed."""
+    samples = []
+    for _ in range(rounds):
+        event = Event()
+        threads = [Thread(event.wait) for _ in range(waiters)]
+        for thread in threads:
+            thread.start()
+        # let all the threads block on the event
+        Thread.spawn(lambda: None).result()
+
+        start = clock()
+        event.set()
+        for thread in threads:
+            thread.join()
+        samples.append(clock() - start)
+    best = min(samples)
+    return {"wakeup_all": best, "wakeups_per_sec": waiters / best}
+
+
+def _contend(primitive, threads, acquisitions):
+    """Has `threads` threads acquire and release `primitive` until it was
+    acquired `acquisitions` times in total. Returns acquisitions per second.
+    """
+    remaining = [acquisitions]
+
+    def run():
+        while remaining[0] > 0:
+            primitive.acquire()
+            remaining[0] -= 1
+            # yield while holding the primitive, so that it is contended
+            Thread.spawn(lambda: None).result()
+            primitive.release()
+
+    start = clock()
+    workers = [Thread(run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return {"handoffs_per_sec": acquisitions / (clock() - start)}
+
+
+@benchmark("lock_handoff", threads=100, acquisitions=20000)
+def lock_handoff(threads, acquisitions):
+    return _contend(Lock(), threads, acquisitions)
+
+
+@benchmark("semaphore_handoff", threads=100, acquisitions=20000, value=4)
+def semaphore_handoff(threads, acquisitions, value):
+    return _contend(Semaphore(value), threads, acquisitions)
+
+
+@benchmark("condition_ping_pong", rounds=10000)
+def condition_ping_pong(rounds):
+    """Two threads take turns, each notifying the other through a shared
+    condition."""
+    condition = Condition()
+    state = {"turn": 0}
+
+    def player(me):
+        for _ in range(rounds):
+            with condition:
+                while state["turn"] != me:
+                    condition.wait()
+                state["turn"] = 1 - me
+                condition.notify_all()
+
+    start = clock()
+    players = [Thread(player, args=(0,)), Thread(player, args=(1,))]
+    for thread in players:
+        thread.start()
+    for thread in players:
+        thread.join()
+    return {"round_trips_per_sec": rounds / (clock() - start)}
@@ -0,0 +1,51 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from benchmarks.harness import benchmark, clock
+from straight.threading import Thread
+
+
+@benchmark("thread_spawn_join", count=10000)
+def spawn_join(count):
+    """Starts `count` threads that do nothing, then joins them all."""
+    def noop():
+        pass
+
+    start = clock()
+    threads = []
+    for _ in range(count):
+        thread = Thread(noop)
+        thread.start()
+        threads.append(thread)
+    spawned = clock()
+    for thread in threads:
+        thread.join()
+    end = clock()
+    return {
+        "spawn_per_sec": count / (spawned - start),
+        "spawn_join_per_sec": count / (end - start),
+    }
+
+
+@benchmark("future_spawn_result", count=10000)
+def future_spawn_result(count):
+    """Spawns `count` threads through `Thread.spawn` and collects their
+    results."""
+    start = clock()
+    futures = [Thread.spawn(abs, -i) for i in range(count)]
+    for future in futures:
+        future.result()
+    return {"per_sec": count / (clock() - start)}
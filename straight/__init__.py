@@ -13,3 +13,28 @@ PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
 You should have received a copy of the GNU Lesser General Public License along
 with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
+__all__ = ["run_in_process", "stats"]
+
+from straight.process import run_in_process
+from straight.threading.stats import snapshot as stats
+
+import sys
+
+if sys.version_info >= (3, 7):
+    # the asyncio bridge is imported on first use: importing asyncio is slow,
+    # and most programs don't need it
+    __all__ += ["await_", "as_future"]
+
+    def __getattr__(name):
+        if name in ("await_", "as_future"):
+            from straight import aio
+            return getattr(aio, name)
+        raise AttributeError("module 'straight' has no attribute "
+                             "'{0}'".format(name))
+else:
+    try:
+        from straight.aio import await_, as_future
+        __all__ += ["await_", "as_future"]
+    except ImportError:
+        # python 2 has no asyncio
+        pass
@@ -0,0 +1,146 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import Thread, Event, Future, WaitTimeout
+from straight import ioloop
+
+import asyncio
+import logging
+import pyuv
+
+log = logging.getLogger("straight.aio")
+
+__all__ = ["attach", "detach", "await_", "as_future"]
+
+_loop = None  # the asyncio loop straight is attached to
+_timer = None  # asyncio timer handle of the next step of the straight loop
+_pending = None  # asyncio handle of a step scheduled with `_wake()`
+
+
+def _step():
+    """Runs one iteration of the straight loop without blocking, then arms an
+    asyncio timer for the next straight timer that's due."""
+    global _timer, _pending
+    _pending = None
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+    ioloop.default.run(pyuv.UV_RUN_NOWAIT)
+    if _loop is None:
+        return
+    # in seconds, negative when no timer is active
+    timeout = ioloop.default.get_timeout()
+    if timeout >= 0:
+        _timer = _loop.call_later(timeout, _step)
+
+
+def _wake():
+    """Gives the straight loop a turn soon, e.g. after a straight thread was
+    resumed from an asyncio callback."""
+    global _pending
+    if _pending is None and _loop is not None:
+        _pending = _loop.call_soon(_step)
+
+
+def attach(loop=None):
+    """Runs the straight loop inside an asyncio loop (by default, the current
+    one), so that a single loop serves both straight threads and coroutines:
+    the asyncio loop polls the file descriptor of the straight loop's backend
+    and runs a non-blocking iteration of the straight loop whenever it's
+    ready or a straight timer is due. Once attached, run the asyncio loop
+    (e.g. `asyncio.run()` or `loop.run_forever()`) instead of
+    `straight.ioloop.start()`.
+
+    Only supported on platforms where the backend of libuv can be polled
+    (epoll and kqueue), i.e. not on Windows."""
+    global _loop
+    if _loop is not None:
+        raise RuntimeError("straight is already attached to an asyncio loop")
+    _loop = loop or asyncio.get_event_loop()
+    _loop.add_reader(ioloop.default.fileno(), _step)
+    _wake()
+
+
+def detach():
+    """Stops running the straight loop inside the asyncio loop."""
+    global _loop, _timer, _pending
+    if _loop is None:
+        return
+    _loop.remove_reader(ioloop.default.fileno())
+    for handle in (_timer, _pending):
+        if handle is not None:
+            handle.cancel()
+    _loop = _timer = _pending = None
+
+
+def await_(awaitable, timeout=None):
+    """Blocks the calling straight thread until 'awaitable' (a coroutine, an
+    asyncio Future or task) completes on the asyncio loop straight is attached
+    to, and returns its result or raises its exception; other straight
+    threads and coroutines keep running meanwhile. If it doesn't complete in
+    'timeout' seconds, it's cancelled and a WaitTimeout is raised."""
+    if _loop is None:
+        raise RuntimeError("straight is not attached to an asyncio loop (see "
+                           "straight.aio.attach())")
+    if Thread.current() is None:
+        raise RuntimeError("await_() must be called from a straight thread")
+    future = asyncio.ensure_future(awaitable, loop=_loop)
+    if timeout is not None and timeout <= 0 and not future.done():
+        future.cancel()
+        raise WaitTimeout
+    done = Event()
+
+    def completed(future):
+        done.set()
+        _wake()
+
+    future.add_done_callback(completed)
+    try:
+        done.wait(timeout)
+    except BaseException:
+        future.remove_done_callback(completed)
+        future.cancel()
+        raise
+    return future.result()
+
+
+def as_future(target, loop=None):
+    """Returns an asyncio Future that completes when a straight thread
+    terminates (with None as its result), or when a straight Future (e.g.
+    from `Thread.spawn()`) completes (with its result or exception), so that
+    coroutines can await straight code."""
+    loop = loop or _loop or asyncio.get_event_loop()
+    result = loop.create_future()
+
+    def copy(future):
+        if result.cancelled():
+            return
+        if future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            result.set_result(future.result())
+
+    if isinstance(target, Thread):
+        def join():
+            target.join()
+            return None
+        target = Thread.spawn(join)
+    elif not isinstance(target, Future):
+        raise TypeError("Expected a straight Thread or Future, got "
+                        "{0}".format(repr(target)))
+    target.add_done_callback(copy)
+    _wake()
+    return result
@@ -0,0 +1,323 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.http.protocol import HTTPError, Headers, Reader, parse_head, \
+    format_head, content_length, is_chunked, read_chunked, write_body, CRLF
+from straight.networking.client import Connection
+from straight.networking.tls import SessionCache, client_context
+from straight.threading import Semaphore, WaitTimeout
+
+import collections
+import socket
+import time
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    # python 2
+    from urlparse import urlsplit
+
+# methods that may be retried on a fresh connection if a pooled one turns out
+# to have been closed by the server
+_IDEMPOTENT = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE")
+
+
+class _Deadline(object):
+    """Turns an absolute deadline into per-operation timeouts."""
+    __slots__ = ("at",)
+
+    def __init__(self, timeout):
+        self.at = None if timeout is None else time.time() + timeout
+
+    def remaining(self):
+        if self.at is None:
+            return None
+        remaining = self.at - time.time()
+        if remaining <= 0:
+            raise WaitTimeout
+        return remaining
+
+
+class _Origin(object):
+    """The pooled connections to a single origin (host and port)."""
+    __slots__ = ("host", "port", "secure", "available", "idle")
+
+    def __init__(self, host, port, secure, limit):
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.available = Semaphore(limit)
+        self.idle = collections.deque()  # (connection, reader, last used)
+
+
+class ClientResponse(object):
+    """A response received by a Client. The head is read when the response
+    is returned; the body is read on demand with 'read' or 'iter_chunks', so
+    that large bodies can be streamed. The connection goes back to the pool
+    once the body is completely read; call 'close' (or use a 'with' block) to
+    release it in any case."""
+
+    def __init__(self, client, origin, connection, reader, request_method,
+                 deadline):
+        self.__client = client
+        self.__origin = origin
+        self.__connection = connection
+        self.__reader = reader
+        self.__deadline = deadline
+
+        head = reader.read_until(CRLF + CRLF, client.max_head,
+                                 deadline.remaining())
+        if head is None:
+            raise socket.error("Connection closed before the response")
+        start_line, self.headers = parse_head(head)
+        parts = start_line.split(" ", 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise HTTPError(502, "Invalid status line")
+        self.version = parts[0]
+        self.status = int(parts[1])
+        self.reason = parts[2] if len(parts) > 2 else ""
+
+        self.__complete = False  # whether the body was completely read
+        tokens = self.headers.tokens("Connection")
+        self.__reusable = "close" not in tokens and (
+            self.version == "HTTP/1.1" or "keep-alive" in tokens)
+        if request_method == "HEAD" or self.status < 200 or \
+                self.status in (204, 304):
+            self.__body = iter(())
+            self.__complete = True
+            # there is nothing to read: release the connection right away,
+            # so that it isn't held by responses nobody closes
+            self.__connection = None
+            client._release(origin, connection, reader, self.__reusable)
+        elif is_chunked(self.headers):
+            # the time left is computed again for every read
+            self.__body = read_chunked(reader, client.max_body,
+                                       deadline.remaining)
+        else:
+            # with any other transfer coding, the length is unknown
+            length = None if "Transfer-Encoding" in self.headers \
+                else content_length(self.headers)
+            if length is None:
+                # the body ends with the connection
+                self.__reusable = False
+            self.__body = self.__read_length(length)
+
+    def __read_length(self, length):
+        while length is None or length > 0:
+            limit = 65536 if length is None else min(length, 65536)
+            data = self.__reader.read_some(limit, self.__deadline.remaining())
+            if not data:
+                if length is None:
+                    return
+                raise socket.error("Connection closed prematurely (incomplete "
+                                   "response body)")
+            if length is not None:
+                length -= len(data)
+            yield data
+
+    def iter_chunks(self):
+        """Yields the body in chunks, as they are received. The connection is
+        released once the body is exhausted."""
+        try:
+            for chunk in self.__body:
+                yield chunk
+        except BaseException:
+            self.__reusable = False
+            self.close()
+            raise
+        self.__complete = True
+        self.close()
+
+    def read(self):
+        """Reads and returns the whole body."""
+        return b"".join(self.iter_chunks())
+
+    def close(self):
+        """Releases the connection: back to the pool if the body was
+        completely read and the server allows it, closed otherwise."""
+        if self.__connection is None:
+            return
+        connection, self.__connection = self.__connection, None
+        self.__body = None
+        self.__client._release(self.__origin, connection, self.__reader,
+                               self.__reusable and self.__complete)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "<straight.http.ClientResponse({0}) object at {1}>".format(
+            self.status, hex(id(self)))
+
+
+class Client(object):
+    """An HTTP/1.1 client keeping persistent connections to each origin, so
+    that consecutive requests don't pay for connection setup. At most
+    'max_per_host' requests to the same origin are in flight at once (others
+    wait for a connection to become available), and idle connections are
+    closed after 'idle_timeout' seconds. Names are resolved without blocking
+    the loop.
+
+    'timeout' is the default deadline of a request, in seconds: the whole
+    request, including waiting for a pooled connection, connecting and
+    receiving the head of the response, must complete in time, otherwise a
+    WaitTimeout is raised. Reading the body is bound by the same deadline.
+
+    HTTPS URLs are fetched with 'ssl_context' (by default, one verifying the
+    certificates against the system's trusted authorities). The TLS session
+    of each server is kept, so that new connections to it resume the session
+    instead of going through a full handshake."""
+
+    def __init__(self, max_per_host=10, timeout=None, idle_timeout=60,
+                 max_head=65536, max_body=1024 * 1024 * 1024,
+                 ssl_context=None):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_head = max_head
+        self.max_body = max_body
+        self.ssl_context = ssl_context
+        self.__sessions = SessionCache()
+        self.__origins = {}
+
+    def __origin(self, scheme, host, port):
+        key = (scheme, host, port)
+        origin = self.__origins.get(key)
+        if origin is None:
+            origin = self.__origins[key] = _Origin(
+                host, port, scheme == "https", self.max_per_host)
+        return origin
+
+    def _connect(self, origin, deadline):
+        """Opens a new connection to an origin."""
+        if not origin.secure:
+            return Connection(origin.host, origin.port, deadline.remaining())
+        if self.ssl_context is None:
+            self.ssl_context = client_context()
+        key = (origin.host, origin.port)
+        try:
+            return Connection(origin.host, origin.port, deadline.remaining(),
+                              self.ssl_context, self.__sessions.get(key))
+        except Exception:
+            self.__sessions.discard(key)
+            raise
+
+    def __acquire(self, origin):
+        """Returns a pooled connection and its reader, or (None, None)."""
+        now = time.time()
+        while origin.idle:
+            connection, reader, used = origin.idle.pop()
+            if self.idle_timeout is None or now - used < self.idle_timeout:
+                return connection, reader
+            connection.close()
+        return None, None
+
+    def _release(self, origin, connection, reader, reusable):
+        if connection.tls is not None and connection.status != 2:
+            # TLS 1.3 servers send the session tickets after the handshake,
+            # so the session is only known once a response was received
+            self.__sessions.put((origin.host, origin.port),
+                                connection.tls.session)
+        if reusable and connection.status == 0 and not reader.buffered():
+            origin.idle.append((connection, reader, time.time()))
+        elif connection.status != 2:
+            connection.close()
+        origin.available.release()
+
+    def request(self, method, url, headers=None, body=b"", timeout=None):
+        """Sends a request and returns the ClientResponse once its head is
+        received. 'body' is either a string or an iterable of strings, which
+        is sent with the chunked transfer coding. 'timeout' overrides the
+        client's default deadline."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError("Unsupported URL scheme: {0}".format(
+                parts.scheme))
+        origin = self.__origin(parts.scheme, parts.hostname, parts.port or (
+            443 if parts.scheme == "https" else 80))
+        deadline = _Deadline(self.timeout if timeout is None else timeout)
+
+        headers = Headers(headers)
+        if "Host" not in headers:
+            headers.add("Host", parts.netloc)
+        chunked = False
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            if len(body) or method in ("POST", "PUT", "PATCH"):
+                headers.set("Content-Length", str(len(body)))
+        elif "Content-Length" not in headers:
+            headers.set("Transfer-Encoding", "chunked")
+            chunked = True
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        head = format_head("{0} {1} HTTP/1.1".format(method, target), headers)
+
+        origin.available.acquire(deadline.remaining())
+        try:
+            connection, reader = self.__acquire(origin)
+            while True:
+                pooled = connection is not None
+                if not pooled:
+                    connection = self._connect(origin, deadline)
+                    reader = Reader(connection)
+                try:
+                    return self.__send(origin, connection, reader, method,
+                                       head, body, chunked, deadline)
+                except BaseException as e:
+                    # the connection may already have been closed because of
+                    # the error
+                    if connection.status != 2:
+                        connection.close()
+                    # a pooled connection may have been closed by the server
+                    # in the meantime; retry once on a new connection
+                    if not isinstance(e, (socket.error, HTTPError)) or \
+                            not pooled or method not in _IDEMPOTENT or \
+                            not isinstance(body, bytes):
+                        raise
+                    connection = reader = None
+        except BaseException:
+            origin.available.release()
+            raise
+
+    def __send(self, origin, connection, reader, method, head, body, chunked,
+               deadline):
+        if isinstance(body, (bytes, bytearray, memoryview)) and not chunked:
+            connection.writev([head, body], deadline.remaining())
+        else:
+            connection.writeall(head, deadline.remaining())
+            write_body(connection, body, chunked, deadline.remaining())
+        return ClientResponse(self, origin, connection, reader, method,
+                              deadline)
+
+    def get(self, url, headers=None, timeout=None):
+        """Sends a GET request and returns the ClientResponse."""
+        return self.request("GET", url, headers, timeout=timeout)
+
+    def post(self, url, body, headers=None, timeout=None):
+        """Sends a POST request and returns the ClientResponse."""
+        return self.request("POST", url, headers, body, timeout)
+
+    def close(self):
+        """Closes all the idle connections."""
+        for origin in self.__origins.values():
+            while origin.idle:
+                origin.idle.pop()[0].close()
+
+    def __repr__(self):
+        return "<straight.http.Client object at {0}>".format(hex(id(self)))
@@ -0,0 +1,305 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking.connection import Undefined
+
+import socket
+import errno
+
+try:
+    from http.client import responses
+except ImportError:
+    # python 2
+    from httplib import responses
+
+CRLF = b"\r\n"
+
+
+class HTTPError(Exception):
+    """Raised for protocol errors. 'status' is the HTTP status code that
+    should be sent back when the error is detected by a server."""
+    def __init__(self, status, message=None):
+        Exception.__init__(self, message or responses.get(status, "Error"))
+        self.status = status
+
+
+class Headers(object):
+    """An ordered list of header fields, with case insensitive lookups. Names
+    and values are text strings."""
+    __slots__ = ("__fields",)
+
+    def __init__(self, fields=None):
+        if isinstance(fields, dict):
+            fields = fields.items()
+        self.__fields = list(fields or ())
+
+    def get(self, name, default=None):
+        """Returns the value of the last field named 'name', or 'default'."""
+        name = name.lower()
+        for field, value in reversed(self.__fields):
+            if field.lower() == name:
+                return value
+        return default
+
+    def get_all(self, name):
+        """Returns the values of all the fields named 'name'."""
+        name = name.lower()
+        return [value for field, value in self.__fields
+                if field.lower() == name]
+
+    def tokens(self, name):
+        """Returns the comma separated tokens of all the fields named 'name',
+        in lower case (e.g. for 'Connection' or 'Transfer-Encoding')."""
+        return [token.strip().lower() for value in self.get_all(name)
+                for token in value.split(",") if token.strip()]
+
+    def add(self, name, value):
+        self.__fields.append((name, value))
+
+    def set(self, name, value):
+        """Replaces all the fields named 'name' with a single one."""
+        self.remove(name)
+        self.__fields.append((name, value))
+
+    def remove(self, name):
+        name = name.lower()
+        self.__fields = [(field, value) for field, value in self.__fields
+                         if field.lower() != name]
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __iter__(self):
+        return iter(self.__fields)
+
+    def __len__(self):
+        return len(self.__fields)
+
+    def __repr__(self):
+        return "<straight.http.Headers {0}>".format(repr(self.__fields))
+
+
+class Reader(object):
+    """Reads the messages received on a connection through a buffer which is
+    reused for the lifetime of the connection. Data received after the end of
+    a message (e.g. pipelined requests) stays in the buffer for the next
+    one."""
+    __slots__ = ("connection", "__buffer", "__start", "__end")
+
+    def __init__(self, connection, size=8192):
+        self.connection = connection
+        self.__buffer = bytearray(size)
+        self.__start = self.__end = 0
+
+    def buffered(self):
+        """Returns the number of bytes received but not consumed yet."""
+        return self.__end - self.__start
+
+    def __fill(self, timeout):
+        """Reads more data into the buffer. Returns False at end of stream."""
+        if self.__end == len(self.__buffer):
+            pending = self.__end - self.__start
+            if self.__start:
+                self.__buffer[:pending] = \
+                    self.__buffer[self.__start:self.__end]
+            else:
+                buffer = bytearray(2 * len(self.__buffer))
+                buffer[:pending] = self.__buffer[:pending]
+                self.__buffer = buffer
+            self.__start, self.__end = 0, pending
+        count = self.connection.readinto(
+            memoryview(self.__buffer)[self.__end:], timeout)
+        self.__end += count
+        return count != 0
+
+    def read_until(self, delimiter, limit, timeout=Undefined):
+        """Reads until 'delimiter' and returns the data before it. The
+        delimiter is consumed but not returned. Returns None if the stream
+        ends before any data is received; raises a socket.error if it ends
+        before the delimiter. Raises an HTTPError (431) if the delimiter is
+        not found in the first 'limit' bytes."""
+        # relative to the start of the data, which moves when the buffer is
+        # compacted or grown
+        scanned = 0
+        while True:
+            index = self.__buffer.find(delimiter, self.__start + scanned,
+                                       self.__end)
+            if index != -1:
+                data = bytes(self.__buffer[self.__start:index])
+                self.__start = index + len(delimiter)
+                if self.__start == self.__end:
+                    self.__start = self.__end = 0
+                return data
+            if self.__end - self.__start > limit:
+                raise HTTPError(431)
+            scanned = max(0, self.__end - self.__start - len(delimiter) + 1)
+            if not self.__fill(timeout):
+                if self.__start == self.__end:
+                    return None
+                raise socket.error(errno.ECONNRESET,
+                                   "Connection closed prematurely "
+                                   "(incomplete message).")
+
+    def peek_until(self, delimiter):
+        """Returns the buffered data before 'delimiter' without consuming it,
+        or None if the delimiter isn't buffered yet. Never reads from the
+        connection."""
+        index = self.__buffer.find(delimiter, self.__start, self.__end)
+        if index == -1:
+            return None
+        return bytes(self.__buffer[self.__start:index])
+
+    def read(self, count, timeout=Undefined):
+        """Reads exactly 'count' bytes. Data that is not buffered yet is read
+        from the connection directly into the result, without going through
+        the buffer."""
+        available = min(count, self.__end - self.__start)
+        if available == count:
+            data = bytes(self.__buffer[self.__start:self.__start + count])
+            self.__start += count
+            return data
+
+        data = bytearray(count)
+        data[:available] = self.__buffer[self.__start:self.__end]
+        self.__start = self.__end = 0
+        view = memoryview(data)
+        while available < count:
+            received = self.connection.readinto(view[available:], timeout)
+            if not received:
+                raise socket.error(errno.ECONNRESET,
+                                   "Connection closed prematurely ({0} "
+                                   "bytes left to read).".format(
+                                       count - available))
+            available += received
+        return bytes(data)
+
+    def read_some(self, limit, timeout=Undefined):
+        """Returns at most 'limit' bytes, reading from the connection only if
+        nothing is buffered. Returns an empty string at end of stream."""
+        if self.__start == self.__end and not self.__fill(timeout):
+            return b""
+        count = min(limit, self.__end - self.__start)
+        data = bytes(self.__buffer[self.__start:self.__start + count])
+        self.__start += count
+        return data
+
+
+def parse_head(data):
+    """Splits a message head (without the final empty line) into its start
+    line and its headers."""
+    lines = data.split(CRLF)
+    headers = Headers()
+    for line in lines[1:]:
+        if line[:1] in (b" ", b"\t"):
+            raise HTTPError(400, "Obsolete header line folding")
+        name, separator, value = line.partition(b":")
+        if not separator or not name or name != name.strip():
+            raise HTTPError(400, "Invalid header line")
+        headers.add(name.decode("latin-1"), value.strip().decode("latin-1"))
+    return lines[0].decode("latin-1"), headers
+
+
+def format_head(start_line, headers):
+    """Serializes a message head, including the final empty line."""
+    lines = [start_line]
+    for name, value in headers:
+        lines.append("{0}: {1}".format(name, value))
+    lines.append("")
+    lines.append("")
+    return "\r\n".join(lines).encode("latin-1")
+
+
+def content_length(headers):
+    """Returns the body length given by the Content-Length header, or None if
+    there is none. Raises an HTTPError (400) if it is not a number, or if the
+    message has several Content-Length values which disagree."""
+    if "Content-Length" not in headers:
+        return None
+    values = set(headers.tokens("Content-Length"))
+    if len(values) > 1:
+        raise HTTPError(400, "Conflicting Content-Length")
+    value = values.pop() if values else ""
+    # str.isdigit() also accepts non-ASCII digits, which int() may reject
+    if not value or value.strip("0123456789"):
+        raise HTTPError(400, "Invalid Content-Length")
+    return int(value)
+
+
+def is_chunked(headers):
+    """Returns whether a message body uses the chunked transfer coding, which
+    only delimits the body when it is the last coding applied."""
+    codings = headers.tokens("Transfer-Encoding")
+    return bool(codings) and codings[-1] == "chunked"
+
+
+def read_chunked(reader, limit, timeout=Undefined):
+    """Yields the chunks of a chunked body, then consumes the trailers.
+    'timeout' applies to each read; it may also be a callable returning the
+    timeout of the next read (e.g. the time left before a deadline)."""
+    remaining = timeout if callable(timeout) else lambda: timeout
+    total = 0
+    while True:
+        line = reader.read_until(CRLF, 1024, remaining())
+        if line is None:
+            raise socket.error(errno.ECONNRESET, "Connection closed "
+                               "prematurely (incomplete chunked body).")
+        try:
+            size = int(line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise HTTPError(400, "Invalid chunk size")
+        if size == 0:
+            # skip the trailers, up to the final empty line
+            while reader.read_until(CRLF, 8192, remaining()):
+                pass
+            return
+        total += size
+        if total > limit:
+            raise HTTPError(413)
+        yield reader.read(size, remaining())
+        if reader.read(2, remaining()) != CRLF:
+            raise HTTPError(400, "Invalid chunk terminator")
+
+
+def chunk_buffers(chunk):
+    """Returns the buffers that encode a single chunk of a chunked body."""
+    return [("%x\r\n" % len(chunk)).encode("ascii"), chunk, CRLF]
+
+
+LAST_CHUNK = b"0\r\n\r\n"
+
+
+def write_body(connection, body, chunked, timeout=Undefined):
+    """Writes a message body: either a string, or an iterable of strings. An
+    iterable body is sent with the chunked transfer coding if 'chunked' is
+    True, or as is otherwise (its length must then have been announced)."""
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        if chunked:
+            buffers = chunk_buffers(body) if len(body) else []
+            buffers.append(LAST_CHUNK)
+            connection.writev(buffers, timeout)
+        elif len(body):
+            connection.writeall(body, timeout)
+        return
+
+    for chunk in body:
+        if not len(chunk):
+            continue
+        if chunked:
+            connection.writev(chunk_buffers(chunk), timeout)
+        else:
+            connection.writeall(chunk, timeout)
+    if chunked:
+        connection.writeall(LAST_CHUNK, timeout)
@@ -0,0 +1,287 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.http.protocol import HTTPError, Headers, Reader, parse_head, \
+    format_head, content_length, is_chunked, read_chunked, write_body, \
+    responses, CRLF
+from straight.networking.server import Server
+from straight.threading import Thread
+
+import logging
+
+log = logging.getLogger("straight.http")
+
+
+class Request(object):
+    """A request received by an HTTPServer. The body is read completely
+    before the request is handled."""
+    __slots__ = ("method", "target", "version", "headers", "body")
+
+    def __init__(self, method, target, version, headers, body=b""):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def path(self):
+        return self.target.split("?", 1)[0]
+
+    @property
+    def query(self):
+        return self.target.partition("?")[2]
+
+    @property
+    def keep_alive(self):
+        """Whether the client wants the connection to persist after this
+        request."""
+        tokens = self.headers.tokens("Connection")
+        if self.version == "HTTP/1.0":
+            return "keep-alive" in tokens
+        return "close" not in tokens
+
+    def __repr__(self):
+        return "<straight.http.Request({0} {1}) object at {2}>".format(
+            self.method, self.target, hex(id(self)))
+
+
+class Response(object):
+    """A response to be sent by an HTTPServer. The body is either a string,
+    or an iterable of strings which is sent with the chunked transfer coding
+    (unless a Content-Length header is given), so that large or generated
+    bodies never need to be held in memory."""
+    __slots__ = ("status", "reason", "headers", "body")
+
+    def __init__(self, status=200, headers=None, body=b"", reason=None):
+        self.status = status
+        self.reason = reason or responses.get(status, "Unknown")
+        self.headers = headers if isinstance(headers, Headers) \
+            else Headers(headers)
+        self.body = body
+
+    def write(self, connection, request, keep_alive, timeout):
+        """Sends the response. The head and (string) body are sent with a
+        single vectored send."""
+        headers = Headers(self.headers)
+        body = self.body
+        chunked = False
+        # these responses never have a body, so they don't describe one
+        bodiless = self.status < 200 or self.status in (204, 304)
+        has_body = request.method != "HEAD" and not bodiless
+
+        if bodiless:
+            headers.remove("Content-Length")
+            headers.remove("Transfer-Encoding")
+        elif isinstance(body, (bytes, bytearray, memoryview)):
+            headers.set("Content-Length", str(len(body)))
+        elif "Content-Length" not in headers:
+            if request.version == "HTTP/1.0":
+                # no chunked coding; the end of the body is the end of the
+                # connection
+                keep_alive = False
+            else:
+                headers.set("Transfer-Encoding", "chunked")
+                chunked = True
+        if not keep_alive:
+            headers.set("Connection", "close")
+        elif request.version == "HTTP/1.0":
+            headers.set("Connection", "keep-alive")
+
+        head = format_head("HTTP/1.1 {0} {1}".format(self.status,
+                                                      self.reason), headers)
+        if not has_body:
+            connection.writeall(head, timeout)
+        elif isinstance(body, (bytes, bytearray, memoryview)):
+            connection.writev([head, body], timeout)
+        else:
+            connection.writeall(head, timeout)
+            write_body(connection, body, chunked, timeout)
+        return keep_alive
+
+    def __repr__(self):
+        return "<straight.http.Response({0}) object at {1}>".format(
+            self.status, hex(id(self)))
+
+
+class HTTPServer(Server):
+    """An HTTP/1.1 server. Requests are passed to 'handle_request', which
+    must return a Response; either override it, or pass a callable taking a
+    Request and returning a Response as 'handler'.
+
+    Connections are persistent unless the client asks otherwise. Requests
+    which are pipelined (sent by the client before receiving the previous
+    responses) are handled concurrently, up to 'max_pipeline' at a time, and
+    their responses are sent in order; a lone request is handled by the
+    connection's thread itself. Request bodies may use the chunked transfer
+    coding and are limited to 'max_body' bytes; heads are limited to
+    'max_head' bytes. Idle connections are closed after 'idle_timeout'
+    seconds, if given; 'max_idle' and 'max_lifetime' (see `Server`) are
+    cheaper when there are many connections. HTTPS is served if an
+    'ssl_context' is given (see `Server`). When the server is drained, idle
+    connections are closed and the responses being handled are sent with
+    "Connection: close"."""
+
+    def __init__(self, port, handler=None, timeout=None, interface="0.0.0.0",
+                 max_pipeline=16, max_head=65536, max_body=16 * 1024 * 1024,
+                 idle_timeout=None, ssl_context=None, listener=None,
+                 max_idle=None, max_lifetime=None):
+        Server.__init__(self, port, timeout, interface, ssl_context, listener,
+                        max_idle, max_lifetime)
+        self.handler = handler
+        self.max_pipeline = max_pipeline
+        self.max_head = max_head
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout
+
+    def handle_request(self, request):
+        """Returns the Response to 'request'. By default, calls the handler
+        given to the constructor."""
+        if self.handler is None:
+            raise HTTPError(404)
+        return self.handler(request)
+
+    def __call(self, request):
+        """Calls 'handle_request', turning errors into error responses."""
+        try:
+            return self.handle_request(request)
+        except HTTPError as e:
+            return self.__error(e)
+        except Exception:
+            log.exception("Unhandled exception while handling "
+                          "{0}".format(repr(request)))
+            return self.__error(HTTPError(500))
+
+    def __error(self, error):
+        body = "{0} {1}\n".format(error.status, error).encode("utf-8")
+        return Response(error.status, [("Content-Type", "text/plain")], body)
+
+    def __read_request(self, reader, connection, interim=True):
+        """Reads the next request, or returns None at the end of the stream.
+        Unless 'interim' is false, clients expecting a "100 Continue" get one
+        before the body is read."""
+        head = reader.read_until(CRLF + CRLF, self.max_head,
+                                 self.idle_timeout)
+        if head is None:
+            return None
+        while head.startswith(CRLF):
+            # tolerate empty lines between requests
+            head = head[2:]
+        start_line, headers = parse_head(head)
+        try:
+            method, target, version = start_line.split(" ")
+        except ValueError:
+            raise HTTPError(400, "Invalid request line")
+        if version not in ("HTTP/1.1", "HTTP/1.0"):
+            raise HTTPError(505)
+        request = Request(method, target, version, headers)
+
+        length = content_length(headers)
+        chunked = is_chunked(headers)
+        if not chunked and "Transfer-Encoding" in headers:
+            # the end of the body can't be found
+            raise HTTPError(400, "Unsupported transfer coding")
+        if not chunked and not length:
+            return request
+        if length is not None and length > self.max_body:
+            raise HTTPError(413)
+        if interim and "100-continue" in headers.tokens("Expect"):
+            connection.writeall(b"HTTP/1.1 100 Continue\r\n\r\n")
+        if chunked:
+            request.body = b"".join(read_chunked(reader, self.max_body))
+        else:
+            request.body = reader.read(length)
+        return request
+
+    def __buffered(self, reader):
+        """Returns whether the head and the body of the next request are both
+        buffered, so that it can be read without waiting for the client.
+        Malformed requests count as buffered: reading them fails right away.
+        """
+        head = reader.peek_until(CRLF + CRLF)
+        if head is None:
+            return False
+        stripped = head
+        while stripped.startswith(CRLF):
+            stripped = stripped[2:]
+        try:
+            headers = parse_head(stripped)[1]
+            length = content_length(headers)
+        except HTTPError:
+            return True
+        if is_chunked(headers):
+            # where the body ends isn't known until it is parsed
+            return False
+        return reader.buffered() >= len(head) + 4 + (length or 0)
+
+    def handle(self, connection):
+        reader = Reader(connection)
+        try:
+            while True:
+                if not reader.buffered():
+                    # waiting for the next request; closed right away if the
+                    # server is drained
+                    if not self.idle(connection):
+                        return
+                    try:
+                        request = self.__read_request(reader, connection)
+                    finally:
+                        self.idle(connection, False)
+                else:
+                    request = self.__read_request(reader, connection)
+                if request is None:
+                    return
+                keep_alive = request.keep_alive and not self.draining
+                if not keep_alive or not self.__buffered(reader):
+                    # no pipelining; handle the request in this thread
+                    response = self.__call(request)
+                    if not response.write(connection, request, keep_alive,
+                                          None):
+                        return
+                    continue
+
+                # the client pipelines requests: handle all the buffered ones
+                # concurrently, and respond in order. Only fully buffered
+                # requests are batched, and none gets a "100 Continue": it
+                # would be sent before the responses to the previous ones
+                batch = [request]
+                error = None
+                while batch[-1].keep_alive and \
+                        len(batch) < self.max_pipeline and \
+                        self.__buffered(reader):
+                    try:
+                        request = self.__read_request(reader, connection,
+                                                      False)
+                    except HTTPError as e:
+                        # respond to the valid requests first
+                        error = e
+                        break
+                    if request is None:
+                        break
+                    batch.append(request)
+                futures = [Thread.spawn(self.__call, r) for r in batch]
+                for request, future in zip(batch, futures):
+                    keep_alive = request.keep_alive and not self.draining
+                    if not future.result().write(connection, request,
+                                                 keep_alive, None):
+                        return
+                if error is not None:
+                    raise error
+        except HTTPError as e:
+            # malformed request; respond and give up on the connection
+            error = self.__error(e)
+            error.write(connection, Request("GET", "", "HTTP/1.1", Headers()),
+                        False, None)
@@ -14,8 +14,24 @@ You should have received a copy of the GNU Lesser General Public License along
 with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
+from straight.errors import ConnectionTimeout
+
+import collections
+import threading
+import traceback
+import greenlet
+import weakref
+import logging
+import socket
+import errno
+import json
+import time
+import sys
+import os
 import pyuv
 
+log = logging.getLogger("straight.ioloop")
+_clock = getattr(time, "perf_counter", time.time)
 
 default = pyuv.Loop.default_loop()
 
@@ -26,3 +42,399 @@ def start():
 
 def stop():
     default.stop()
+
+
+def now():
+    """Returns the time at which the current iteration of the loop started, in
+    seconds. The loop caches it, so reading it costs no system call, which
+    makes it fit for the I/O paths (e.g. metrics) where millisecond accuracy
+    is enough. It is a monotonic clock, not comparable with `time.time()`."""
+    return default.now() / 1000
+
+
+# greenlets to switch to (and the exception to raise in them, if any) on the
+# next pass of the loop; the check handle runs them after each poll, and the
+# idle handle keeps the poll from blocking while any are waiting
+_ready = collections.deque()
+_check = pyuv.Check(default)
+_idle = pyuv.Idle(default)
+
+
+def resume(glet, exception=None):
+    """Schedules the paused (or not yet started) greenlet 'glet' to be
+    switched to by the loop, raising 'exception' in it if given. The caller
+    keeps running; 'glet' runs once the loop gets its turn."""
+    _ready.append((glet, exception))
+    if not _idle.active:
+        _idle.start(_nothing)
+
+
+def pause(current):
+    """Parks the calling greenlet 'current' until `resume()` is called for it,
+    letting the loop run the other threads meanwhile."""
+    if current.parent is None:
+        raise RuntimeError("Only straight threads can wait; the loop would "
+                           "never get a chance to resume this one")
+    return current.parent.switch()
+
+
+def _nothing(handle):
+    pass
+
+
+def _run_ready(handle):
+    loop = greenlet.getcurrent()
+    # greenlets resumed while these run wait for the next pass
+    for _ in range(len(_ready)):
+        glet, exception = _ready.popleft()
+        if glet.dead or glet is loop:
+            continue
+        # whoever started it, a thread returns to the loop when it pauses or
+        # terminates
+        glet.parent = loop
+        try:
+            if exception is None:
+                glet.switch()
+            else:
+                glet.throw(exception)
+        except Exception:
+            log.exception("Unhandled exception in a resumed greenlet")
+    if not _ready:
+        _idle.stop()
+
+
+_check.ref = False
+_check.start(_run_ready)
+
+
+class _Poller(object):
+    """Parks threads until their file descriptor is ready. Each descriptor
+    has a single poll handle, watching for the requests of all the threads
+    waiting on it (e.g. several server workers waiting to accept)."""
+
+    def __init__(self, loop):
+        self.__loop = loop
+        self.__polls = {}  # fd -> pyuv.Poll
+        self.__waiters = {}  # fd -> {request -> {greenlet -> timer or None}}
+
+    def switch(self, request, fd, timeout=None):
+        """Parks the calling thread until 'fd' is ready for 'request' (one of
+        IOLoop.READ_REQUEST and IOLoop.WRITE_REQUEST). Raises a
+        ConnectionTimeout if it isn't within 'timeout' seconds."""
+        current = greenlet.getcurrent()
+        waiting = self.__waiters.setdefault(fd, {}).setdefault(request, {})
+        timer = None
+        if timeout is not None:
+            timer = pyuv.Timer(self.__loop)
+            timer.start(lambda timer: self.__expire(fd, request, current),
+                        timeout, 0)
+        waiting[current] = timer
+        self.__update(fd)
+        try:
+            return pause(current)
+        finally:
+            # still registered if resumed by something else (e.g. stopped)
+            if waiting.pop(current, None) is not None:
+                timer.close()
+            self.__update(fd)
+
+    def unregister(self, fd, all=True):
+        """Wakes the threads waiting on 'fd' with a socket.error, as it's
+        being closed (or, unless 'all' is set, shut down for writing, which
+        only wakes the writers)."""
+        requests = self.__waiters.get(fd, {})
+        for request in list(requests):
+            if all or request == IOLoop.WRITE_REQUEST:
+                self.__wake(requests.pop(request),
+                            socket.error(errno.EBADF, "Connection was "
+                                                      "closed"))
+        if all:
+            self.__waiters.pop(fd, None)
+            poll = self.__polls.pop(fd, None)
+            if poll is not None:
+                poll.close()
+        else:
+            self.__update(fd)
+
+    def __wake(self, waiting, exception=None):
+        for glet, timer in waiting.items():
+            if timer is not None:
+                timer.close()
+            resume(glet, exception)
+        waiting.clear()
+
+    def __expire(self, fd, request, glet):
+        waiting = self.__waiters.get(fd, {}).get(request, {})
+        if glet in waiting:
+            waiting.pop(glet).close()
+            resume(glet, ConnectionTimeout(errno.ETIMEDOUT,
+                                           "Operation timed out"))
+            self.__update(fd)
+
+    def __ready(self, poll, events, error):
+        fd = poll.fileno()
+        requests = self.__waiters.get(fd, {})
+        for request in list(requests):
+            # on error, whatever the thread tries next reports it
+            if error is not None or events & request:
+                self.__wake(requests[request])
+        self.__update(fd)
+
+    def __update(self, fd):
+        """Watches 'fd' for the requests that threads are waiting for."""
+        events = 0
+        for request, waiting in self.__waiters.get(fd, {}).items():
+            if waiting:
+                events |= request
+        poll = self.__polls.get(fd)
+        if events:
+            if poll is None:
+                poll = self.__polls[fd] = pyuv.Poll(self.__loop, fd)
+            poll.start(events, self.__ready)
+        elif poll is not None:
+            poll.stop()
+
+
+class IOLoop(object):
+    """Waits for file descriptors on behalf of straight threads. A thread
+    parks itself with `IOLoop.thread.switch(request, fd, timeout)` and is
+    resumed once 'fd' is ready; `IOLoop.unregister(fd)` must be called before
+    closing a descriptor that threads may be waiting on."""
+    READ_REQUEST = pyuv.UV_READABLE
+    WRITE_REQUEST = pyuv.UV_WRITABLE
+    thread = _Poller(default)
+
+    @staticmethod
+    def unregister(fd, all=True):
+        IOLoop.thread.unregister(fd, all)
+
+
+class LagMonitor(object):
+    """Measures how late the loop runs a periodic timer, which is how long
+    every straight thread waits for the loop to get back to it. A consistently
+    high lag means the loop is overloaded; spikes mean that some thread ran
+    for too long without yielding (e.g. made a blocking call).
+
+    If `threshold` is given (in seconds), a watchdog operating system thread
+    is started as well. Whenever the loop did not run the timer for more than
+    `threshold` seconds, the watchdog logs the stack of the code that is
+    currently blocking the loop, along with the name of the straight thread
+    running it.
+
+    The last `size` samples are kept; use `percentiles()` to read them."""
+
+    def __init__(self, interval=0.1, threshold=None, size=1024, loop=None):
+        self.interval = interval
+        self.threshold = threshold
+        self.__loop = loop or default
+        self.__samples = collections.deque(maxlen=size)
+        self.__timer = None
+        self.__expected = None
+        self.__tick = None
+        self.__loop_thread = None
+        self.__watchdog = None
+        self.__count = 0
+
+    def start(self):
+        """Starts monitoring. Must be called from the thread running the
+        loop."""
+        if self.__timer is not None:
+            return
+        self.__timer = pyuv.Timer(self.__loop)
+        # the monitor alone must not keep the loop running
+        self.__timer.ref = False
+        self.__expected = self.__tick = time.time() + self.interval
+        self.__timer.start(self.__measure, self.interval, self.interval)
+
+        if self.threshold is not None:
+            self.__loop_thread = threading.current_thread().ident
+            self.__watchdog = threading.Thread(target=self.__watch,
+                                               name="straight watchdog")
+            self.__watchdog.daemon = True
+            self.__watchdog.start()
+
+    def stop(self):
+        """Stops monitoring. The samples collected so far are kept."""
+        if self.__timer is None:
+            return
+        self.__timer.close()
+        self.__timer = None
+        self.__watchdog = None  # the watchdog thread exits on its next check
+
+    def __measure(self, timer):
+        now = time.time()
+        self.__samples.append(max(0.0, now - self.__expected))
+        self.__count += 1
+        self.__expected = now + self.interval
+        self.__tick = now
+
+    def __watch(self):
+        """Runs in the watchdog thread. Must never touch the loop."""
+        watchdog = self.__watchdog
+        reported = None
+        while self.__watchdog is watchdog:
+            time.sleep(self.threshold / 2)
+            tick = self.__tick
+            if time.time() - tick > self.threshold and tick != reported:
+                # report each stall once
+                reported = tick
+                self.__report(time.time() - tick)
+
+    def __report(self, stalled):
+        frame = sys._current_frames().get(self.__loop_thread)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+
+        # find the straight thread that owns the running greenlet
+        from straight.threading.thread import Thread
+        code = Thread._Thread__safe_run.__code__
+        name = "main thread"
+        while frame is not None:
+            if frame.f_code is code:
+                name = frame.f_locals["self"].name
+                break
+            frame = frame.f_back
+
+        log.warning("The loop has been blocked for {0:.3f} seconds by thread "
+                    "'{1}':\n{2}".format(stalled, name, stack))
+
+    def percentiles(self, percents=(50, 90, 99)):
+        """Returns a dictionary with the requested percentiles of the loop lag
+        (in seconds), computed over the samples kept, plus the maximum lag and
+        the total number of samples taken."""
+        samples = sorted(self.__samples)
+        result = {"count": self.__count,
+                  "max": samples[-1] if samples else 0.0}
+        for percent in percents:
+            if samples:
+                index = min(len(samples) - 1,
+                            int(len(samples) * percent / 100))
+                result["p{0}".format(percent)] = samples[index]
+            else:
+                result["p{0}".format(percent)] = 0.0
+        return result
+
+    def __repr__(self):
+        return "<straight.ioloop.LagMonitor object at {0}>".format(
+            hex(id(self)))
+
+
+def monitor_lag(interval=0.1, threshold=None, size=1024):
+    """Creates and starts a `LagMonitor` on the default loop."""
+    monitor = LagMonitor(interval, threshold, size)
+    monitor.start()
+    return monitor
+
+
+class Tracer(object):
+    """Records a timeline of the loop iterations and of the greenlet switches
+    in a fixed size ring buffer, which can be exported at any time in the
+    Chrome trace event format (load it in chrome://tracing or Perfetto).
+
+    Each loop iteration is recorded as the time spent polling followed by the
+    time spent running callbacks; each time a straight thread is resumed, a
+    slice named after the thread is recorded, with the reason it was waiting
+    for (e.g. "read", "write", "Event.wait") and whether it was resumed
+    normally or by an exception (e.g. a timer raising WaitTimeout). Only the
+    last `size` records are kept, so the tracer is cheap enough to be left
+    enabled."""
+
+    def __init__(self, size=65536, loop=None):
+        self.__loop = loop or default
+        self.__records = collections.deque(maxlen=size)
+        self.__prepare = None
+        self.__check = None
+        self.__polled = None  # start of the current poll phase
+        self.__callbacks = None  # start of the current callbacks phase
+        self.__slice = None  # (greenlet, start, args) of the running slice
+        # greenlet -> reason it was parked for; a greenlet may never be
+        # resumed (e.g. a thread parked forever), so don't keep it alive
+        self.__parked = weakref.WeakKeyDictionary()
+        self.__origin = _clock()
+
+    def start(self):
+        """Starts recording. Must be called from the thread running the
+        loop."""
+        from straight.threading import stats
+        if self.__prepare is not None:
+            return
+        self.__prepare = pyuv.Prepare(self.__loop)
+        self.__prepare.ref = False
+        self.__prepare.start(self.__before_poll)
+        self.__check = pyuv.Check(self.__loop)
+        self.__check.ref = False
+        self.__check.start(self.__after_poll)
+        stats.add_listener(self.__switch)
+
+    def stop(self):
+        """Stops recording. The records collected so far are kept."""
+        from straight.threading import stats
+        if self.__prepare is None:
+            return
+        stats.remove_listener(self.__switch)
+        self.__prepare.close()
+        self.__check.close()
+        self.__prepare = self.__check = None
+        self.__parked.clear()
+        self.__slice = None
+
+    def __before_poll(self, handle):
+        now = _clock()
+        if self.__callbacks is not None:
+            self.__records.append(("callbacks", self.__callbacks,
+                                   now - self.__callbacks, None))
+        self.__polled = now
+
+    def __after_poll(self, handle):
+        now = _clock()
+        if self.__polled is not None:
+            self.__records.append(("poll", self.__polled,
+                                   now - self.__polled, None))
+        self.__callbacks = now
+
+    def __switch(self, event, origin, target, now, kind, reason):
+        running = self.__slice
+        if running is not None and running[0] is origin:
+            glet, start, args = running
+            thread = getattr(glet, "thread", None)
+            self.__records.append((thread.name if thread else "main thread",
+                                   start, now - start, args))
+        if reason is not None:
+            self.__parked[origin] = reason
+
+        thread = getattr(target, "thread", None)
+        if thread is None:
+            # back to the loop; its time is accounted for by the iterations
+            self.__slice = None
+            return
+        args = {"waited for": self.__parked.pop(target, None),
+                "resumed by": "exception" if event == "throw" else "switch"}
+        self.__slice = (target, now, args)
+
+    def events(self):
+        """Returns the records as a list of Chrome trace events."""
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": 0,
+                   "args": {"name": "straight loop"}}]
+        for name, start, duration, args in list(self.__records):
+            event = {"name": name, "ph": "X", "pid": pid, "tid": 0,
+                     "ts": (start - self.__origin) * 1000000,
+                     "dur": duration * 1000000}
+            if args:
+                event["args"] = args
+            events.append(event)
+        return events
+
+    def dump(self, path=None):
+        """Returns the records as a Chrome trace JSON document, and writes it
+        to `path` if given."""
+        document = json.dumps({"traceEvents": self.events(),
+                               "displayTimeUnit": "ms"})
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(document)
+        return document
+
+    def __repr__(self):
+        return "<straight.ioloop.Tracer object at {0}>".format(hex(id(self)))
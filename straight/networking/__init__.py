@@ -13,11 +13,18 @@ PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
 You should have received a copy of the GNU Lesser General Public License along
 with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
-__all__ = ["Server", "Connection", "BufferedConnection", "ConnectionPool",
-           "KeepAlive"]
+__all__ = ["Server", "Connection", "KeepAlive", "pipe", "relay",
+           "DatagramEndpoint", "DatagramServer", "RPCClient", "RPCServer",
+           "RPCError", "Broadcaster", "Reaper"]
 
 from straight.networking.server import Server
 from straight.networking.client import Connection
 #from straight.networking.buffer import BufferedConnection
-from straight.networking.pool import ConnectionPool
+#from straight.networking.pool import ConnectionPool
 from straight.networking.keepalive import KeepAlive
+from straight.networking.pipe import pipe
+from straight.networking.relay import relay
+from straight.networking.datagram import DatagramEndpoint, DatagramServer
+from straight.networking.rpc import RPCClient, RPCServer, RPCError
+from straight.networking.broadcast import Broadcaster
+from straight.networking.reaper import Reaper
@@ -0,0 +1,194 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import Thread
+
+import collections
+import logging
+
+log = logging.getLogger("straight.network")
+
+# what to do with a subscriber whose backlog is full
+DROP = "drop"  # skip the messages that don't fit
+DISCONNECT = "disconnect"  # close its connection
+
+
+def _skip(views, count):
+    """Returns the buffers left to send once 'count' bytes were sent."""
+    index = 0
+    while count and count >= len(views[index]):
+        count -= len(views[index])
+        index += 1
+    views = list(views[index:])
+    if count:
+        views[0] = views[0][count:]
+    return views
+
+
+class _Subscriber(object):
+    __slots__ = ("connection", "queue", "backlog", "writer", "dropped")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.queue = collections.deque()  # (buffers, size)
+        self.backlog = 0  # bytes queued
+        self.writer = None  # thread sending the queue, while there is one
+        self.dropped = 0  # messages dropped
+
+
+class Broadcaster(object):
+    """Sends the same messages to many connections (e.g. the subscribers of a
+    pub/sub channel). Each message is encoded once, and all the subscribers
+    share its buffers: nothing is copied per subscriber.
+
+    Messages are written to each subscriber right away, as far as its socket
+    buffer allows, without waiting. Only subscribers which can't keep up get
+    a backlog, which is sent by a thread started for that subscriber until
+    the backlog is empty; no thread is ever started per message. A backlog
+    holds at most 'max_backlog' bytes: once full, messages are dropped for
+    that subscriber if 'policy' is DROP (a message is either sent whole or
+    not at all), or the subscriber is disconnected if it is DISCONNECT.
+
+    If a 'codec' is given (see `straight.networking.framing`), messages are
+    framed with it. 'timeout' applies to the writes of backlogs; a subscriber
+    whose connection fails or times out is unsubscribed and its connection
+    closed."""
+
+    def __init__(self, max_backlog=1024 * 1024, policy=DROP, codec=None,
+                 timeout=None):
+        if policy not in (DROP, DISCONNECT):
+            raise ValueError("Unknown slow subscriber policy: {0}".format(
+                policy))
+        self.max_backlog = max_backlog
+        self.policy = policy
+        self.codec = codec
+        self.timeout = timeout
+        self.__subscribers = collections.OrderedDict()
+        self.published = 0  # messages published
+        self.dropped = 0  # messages dropped, over all subscribers
+        self.disconnected = 0  # subscribers disconnected for being slow
+
+    def subscribe(self, connection):
+        """Starts sending the messages published from now on to
+        'connection'."""
+        if connection not in self.__subscribers:
+            self.__subscribers[connection] = _Subscriber(connection)
+
+    def unsubscribe(self, connection):
+        """Stops sending messages to 'connection'. Its backlog is discarded.
+        """
+        subscriber = self.__subscribers.pop(connection, None)
+        if subscriber is not None and subscriber.writer is not None:
+            subscriber.writer.stop()
+
+    def backlog(self, connection):
+        """Returns the number of bytes queued for a subscriber."""
+        return self.__subscribers[connection].backlog
+
+    def __len__(self):
+        return len(self.__subscribers)
+
+    def __contains__(self, connection):
+        return connection in self.__subscribers
+
+    def publish(self, message):
+        """Sends a message (a string, or a sequence of strings sent as if
+        concatenated) to all the subscribers. Never blocks the calling thread.
+        Returns the number of subscribers the message was sent or queued to.
+        """
+        if self.codec is not None:
+            buffers = self.codec.encode(message)
+        elif isinstance(message, (bytes, bytearray, memoryview)):
+            buffers = (message,)
+        else:
+            buffers = message
+        # bytearrays are copied once, so that all subscribers share immutable
+        # buffers
+        views = tuple(memoryview(bytes(b) if isinstance(b, bytearray) else b)
+                      for b in buffers if len(b))
+        size = sum(len(view) for view in views)
+        self.published += 1
+
+        delivered = 0
+        for subscriber in list(self.__subscribers.values()):
+            if subscriber.writer is None:
+                try:
+                    sent = subscriber.connection.writev_nowait(views)
+                except Exception as e:
+                    self.__remove(subscriber, e)
+                    continue
+                if sent == size or self.__enqueue(
+                        subscriber, _skip(views, sent), size - sent, sent):
+                    delivered += 1
+            elif self.__enqueue(subscriber, views, size, False):
+                delivered += 1
+        return delivered
+
+    def __enqueue(self, subscriber, views, size, started):
+        """Queues the rest of a message for a subscriber. A message which was
+        partially sent ('started') is always queued, to keep the stream
+        consistent. Returns False if the message was dropped."""
+        if not started and subscriber.backlog + size > self.max_backlog:
+            if self.policy == DISCONNECT:
+                self.disconnected += 1
+                self.__remove(subscriber, None)
+            else:
+                subscriber.dropped += 1
+                self.dropped += 1
+            return False
+        subscriber.queue.append((views, size))
+        subscriber.backlog += size
+        if subscriber.writer is None:
+            subscriber.writer = Thread(self.__flush, name="broadcast",
+                                       args=(subscriber,))
+            subscriber.writer.start()
+        return True
+
+    def __flush(self, subscriber):
+        """Sends the backlog of a subscriber, until it's empty."""
+        try:
+            while subscriber.queue:
+                buffers, size = [], 0
+                while subscriber.queue:
+                    views, count = subscriber.queue.popleft()
+                    buffers.extend(views)
+                    size += count
+                subscriber.connection.writev(buffers, self.timeout)
+                subscriber.backlog -= size
+        except Exception as e:
+            self.__remove(subscriber, e)
+        finally:
+            subscriber.writer = None
+
+    def __remove(self, subscriber, error):
+        if error is not None:
+            log.debug("Removing subscriber {0}: {1}".format(
+                subscriber.connection.address, error))
+        if self.__subscribers.pop(subscriber.connection, None) is None:
+            return
+        subscriber.queue.clear()
+        subscriber.backlog = 0
+        # the writer may be parked in a write; stop it before closing the
+        # connection under it (unless it is the one removing the subscriber)
+        writer = subscriber.writer
+        if writer is not None and writer is not Thread.current():
+            writer.stop()
+        if subscriber.connection.status != 2:
+            subscriber.connection.close()
+
+    def __repr__(self):
+        return "<straight.networking.Broadcaster({0}) object at {1}>".format(
+            len(self), hex(id(self)))
@@ -14,25 +14,52 @@ You should have received a copy of the GNU Lesser General Public License along
 with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
+from straight.networking.connection import BaseConnection, unix_address
 from straight.networking.keepalive import KeepAlive
+from straight.networking import dns
 
+import logging
+import socket
+import errno
+import os
 import pyuv
+log = logging.getLogger("straight.network")
 
 
-class Connection(object):
-    def __init__(self, hostname, port, timeout=None):
+class Connection(BaseConnection):
+    __slots__ = ()
+
+    def __init__(self, hostname, port=None, timeout=None, ssl_context=None,
+                 session=None):
         """Connects to 'hostname' on the 'port' port. If the connection is not
         established after timeout seconds, an socket.error is raised. If no
         timeout is given, the connection will never time out. Any read or write
-        calls will raise a WaitTimeout after 'timeout' seconds."""
-        # TODO: add support for ipv6 and async getaddrinfo
-        hosts = socket.getaddrinfo(
-            hostname, port, socket.AF_INET, socket.SOCK_STREAM
-        )
-        family, sock_type, proto, _, address = hosts[0]
+        calls will raise a WaitTimeout after 'timeout' seconds.
+
+        If 'port' is None, 'hostname' is the path of a unix domain socket
+        (see `Server`), e.g. `Connection("/run/service.sock")`; a path starting
+        with "@" names a socket in the Linux abstract namespace.
 
-        descriptor = self.__socket = socket.socket(family, sock_type, proto)
-        straight.networking.connection.BaseConnection.__init__(
+        If an 'ssl_context' (an ssl.SSLContext, see
+        `straight.networking.tls.client_context()`) is given, the connection
+        is encrypted with TLS once established, checking the certificate
+        against 'hostname'. A 'session' of an earlier connection to the same
+        server (see `straight.networking.tls.SessionCache`) is resumed if the
+        server still knows it."""
+        if port is None:
+            family, sock_type, proto = socket.AF_UNIX, socket.SOCK_STREAM, 0
+            address = unix_address(hostname)
+        else:
+            # TODO: add support for ipv6
+            # resolve the name without blocking the loop
+            addresses = dns.gethostbyname(
+                hostname, socket.AF_INET,
+                timeout.timeout if isinstance(timeout, KeepAlive) else timeout)
+            family, sock_type, proto = socket.AF_INET, socket.SOCK_STREAM, 0
+            address = (addresses[0], port)
+
+        descriptor = socket.socket(family, sock_type, proto)
+        BaseConnection.__init__(
             self, address, descriptor, timeout
         )
         try:
@@ -46,7 +73,12 @@ class Connection(object):
                 errno.EAGAIN
             ):
                 raise
-            self.write()
-        log.debug("Socket %d is connected to %s:%d" % (
-            descriptor.fileno(), hostname, port)
-        )
+            self._BaseConnection__wait_writable(self.timeout)
+            error = descriptor.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                raise socket.error(error, os.strerror(error))
+        log.debug("Socket {0} is connected to {1}".format(
+            descriptor.fileno(), address))
+        if ssl_context is not None:
+            self.start_tls(ssl_context, server_hostname=hostname,
+                           session=session)
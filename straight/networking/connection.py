@@ -15,9 +15,48 @@ with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
 from straight.networking.keepalive import KeepAlive
-
+from straight.networking.metrics import ConnectionMetrics
+from straight.networking import framing
+from straight.networking.tls import TLSState
+from straight.threading import stats
+from straight.errors import ConnectionInUse, ConnectionTimeout
+from straight.ioloop import IOLoop
+from straight import ioloop
+
+import logging
+import socket
+import array
+import errno
+import time
+import ssl
+import os
+import io
 import pyuv
 
+log = logging.getLogger("straight.network")
+
+
+# maximum number of buffers sent by a single vectored send (POSIX guarantees
+# at least 16; Linux, BSD and Mac OS X accept 1024)
+_IOV_MAX = 1024
+
+
+def unix_address(path):
+    """Returns the address of the unix domain socket at 'path'. A path starting
+    with "@" names a socket in the Linux abstract namespace, spelled with a
+    leading NUL character by the socket API."""
+    if path[:1] == "@":
+        return "\0" + path[1:]
+    return path
+
+
+def _deadline(timeout):
+    return None if timeout is None else time.time() + timeout
+
+
+def _remaining(deadline):
+    return None if deadline is None else max(0, deadline - time.time())
+
 
 class Undefined(object):
     """Used as a default value for uninstantiated values"""
@@ -27,19 +66,28 @@ class BaseConnection(object):
     """Maintains a connection to a remote end-point. Automatically closes the
     connection when its destructor is called."""
     __eagain = socket.error(errno.EAGAIN, "Handled internally")
+    # there may be hundreds of thousands of (mostly idle) connections, so
+    # instances don't carry a __dict__
+    __slots__ = ("__status", "__address", "__socket", "__buffer", "__frames",
+                 "__id", "__reading", "__writing", "__tls", "timeout",
+                 "metrics", "__weakref__")
 
-    def __init__(self, address, descriptor, timeout):
+    def __init__(self, address, descriptor, timeout, metrics=None):
         """Must never be called directly. Use the 'Client' or 'Server'
-        classes."""
+        classes. If given, 'metrics' is the ConnectionMetrics instance which
+        counts the I/O done on this connection."""
 
-        object.__setattr__(self, "status", 0)
-        object.__setattr__(self, "address", address)
+        self.__status = 0
+        self.__address = address
         self.__socket = descriptor
         self.__buffer = None
+        self.__frames = None  # created by the first call to `read_frame()`
+        self.__tls = None  # set by `start_tls()`
+        self.metrics = metrics if metrics is not None else ConnectionMetrics()
 
         descriptor.setblocking(False)
         # configure KeepAlive or timeout
-        if isinstance(timeout, straight.networking.keepalive.KeepAlive):
+        if isinstance(timeout, KeepAlive):
             descriptor.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
             try:
                 # Linux 2.4+
@@ -75,15 +123,23 @@ class BaseConnection(object):
         self.__id = descriptor.fileno()
         self.__reading = self.__writing = False
 
-    def __setattr__(self, key, value):
-        if key in ("address", "closed"):
-            raise AttributeError("The '%s' attribute is read only" % key)
-        object.__setattr__(self, key, value)
+    @property
+    def address(self):
+        """The address of the remote end-point (read only)."""
+        return self.__address
 
-    def __delattr__(self, key):
-        if key in ("address", "closed"):
-            raise AttributeError("The '%s' attribute is read only" % key)
-        object.__delattr__(self, key)
+    @property
+    def status(self):
+        """0 if the connection is open, 1 if it was half closed (no more data
+        can be written) and 2 if it was closed (read only)."""
+        return self.__status
+
+    @property
+    def tls(self):
+        """The SSLObject of the TLS layer, or None if TLS was not started (read
+        only). Gives access to the negotiated protocol and cipher, the peer
+        certificate and the session."""
+        return self.__tls.object if self.__tls is not None else None
 
     def __enter__(self):
         return self
@@ -96,6 +152,10 @@ class BaseConnection(object):
         if hasattr(self, "status") and self.status != 2:
             self.close()
 
+    def fileno(self):
+        """Returns the file descriptor of the underlying socket."""
+        return self.__id
+
     def shutdown(self):
         """Half closes the connection, notifying the other end that this
         endpoint has sent all the data it's ever going to. The socket may still
@@ -106,8 +166,10 @@ class BaseConnection(object):
                                                 "closed")
 
         IOLoop.unregister(self.__id, False)
+        if self.__tls is not None:
+            self.__tls_close_notify()
         self.__socket.shutdown(socket.SHUT_WR)
-        object.__setattr__(self, "status", 1)
+        self.__status = 1
 
     def close(self):
         """Closes the connection. Any active or future read / write calls will
@@ -116,9 +178,31 @@ class BaseConnection(object):
             raise socket.error(errno.ENOTCONN, "Connection is already closed")
 
         IOLoop.unregister(self.__id)
+        if self.__tls is not None and self.__status == 0:
+            self.__tls_close_notify()
         self.__socket.close()
         self.__socket = None
-        object.__setattr__(self, "status", 2)
+        self.__status = 2
+
+    def __wait_readable(self, timeout):
+        """Parks the calling thread until the socket is readable."""
+        if stats.enabled:
+            stats.waiting(stats.IO, "read")
+        blocked = ioloop.now()
+        try:
+            IOLoop.thread.switch(IOLoop.READ_REQUEST, self.__id, timeout)
+        finally:
+            self.metrics.record_read_wait(ioloop.now() - blocked)
+
+    def __wait_writable(self, timeout):
+        """Parks the calling thread until the socket is writable."""
+        if stats.enabled:
+            stats.waiting(stats.IO, "write")
+        blocked = ioloop.now()
+        try:
+            IOLoop.thread.switch(IOLoop.WRITE_REQUEST, self.__id, timeout)
+        finally:
+            self.metrics.record_write_wait(ioloop.now() - blocked)
 
     def __read(self, count, timeout):
         self.__reading = True
@@ -126,25 +210,166 @@ class BaseConnection(object):
             if self.__buffer is not None:
                 if self.__buffer.tell() < len(self.__buffer.getvalue()):
                     # there's still some data available in buffer
-                    return self.buffer.read(count)
+                    return self.__buffer.read(count)
                 else:
                     # buffer is depleted; dispose and read from network
                     self.__buffer = None
-            return self.__socket.recv(count)
+            if self.__tls is not None:
+                return self.__tls_read(count, timeout)
+            data = self.__socket.recv(count)
+            self.metrics.record_read(len(data))
+            return data
         except socket.error as e:
             if e.args[0] not in (errno.EINPROGRESS, errno.EWOULDBLOCK,
                                  errno.EAGAIN):
                 self.__status = 2
                 raise
-            IOLoop.thread.switch(IOLoop.READ_REQUEST, self.__id, timeout)
+            self.__wait_readable(timeout)
+            try:
+                data = self.__socket.recv(count)
+                self.metrics.record_read(len(data))
+                return data
+            except socket.error:
+                self.__status = 2
+                raise
+        finally:
+            self.__reading = False
+
+    def __readinto(self, view, timeout):
+        self.__reading = True
+        try:
+            if self.__buffer is not None:
+                data = self.__buffer.read(len(view))
+                if data:
+                    # there's still some data available in buffer
+                    view[:len(data)] = data
+                    return len(data)
+                # buffer is depleted; dispose and read from network
+                self.__buffer = None
+            if self.__tls is not None:
+                return self.__tls_read(len(view), timeout, view)
+            count = self.__socket.recv_into(view)
+            self.metrics.record_read(count)
+            return count
+        except socket.error as e:
+            if e.args[0] not in (errno.EINPROGRESS, errno.EWOULDBLOCK,
+                                 errno.EAGAIN):
+                self.__status = 2
+                raise
+            self.__wait_readable(timeout)
             try:
-                return self.__socket.recv(count)
+                count = self.__socket.recv_into(view)
+                self.metrics.record_read(count)
+                return count
             except socket.error:
                 self.__status = 2
                 raise
         finally:
             self.__reading = False
 
+    def start_tls(self, context, server_side=False, server_hostname=None,
+                  session=None, timeout=Undefined):
+        """Encrypts the connection with TLS, as configured by 'context' (an
+        ssl.SSLContext), and performs the handshake; once it returns, all the
+        reads and writes go through TLS transparently. Clients should give the
+        'server_hostname' to check the certificate against, and may give a
+        'session' negotiated by an earlier connection to the same server (see
+        `straight.networking.tls.SessionCache`) to resume it.
+
+        The handshake only parks the calling thread while waiting for the
+        other end. Errors and timeouts are handled as in 'readall'; a failed
+        handshake raises an ssl.SSLError."""
+        if self.__tls is not None:
+            raise ValueError("TLS is already started on this connection")
+        if self.__buffer is not None:
+            raise ValueError("TLS can not be started after buffered reads")
+        timeout = self.__can_read(timeout)
+        self.__tls = TLSState(context, server_side, server_hostname, session)
+        self.__reading = self.__writing = True
+        try:
+            self.__tls_call(self.__tls.object.do_handshake, _deadline(timeout))
+        finally:
+            self.__reading = self.__writing = False
+    startTLS = start_tls
+
+    def __tls_flush(self, deadline):
+        """Sends the encrypted data produced by the TLS layer."""
+        outgoing = self.__tls.outgoing
+        while outgoing.pending:
+            view = memoryview(outgoing.read())
+            while view:
+                try:
+                    count = self.__socket.send(view)
+                except socket.error as e:
+                    if e.args[0] not in (errno.EWOULDBLOCK, errno.EAGAIN):
+                        self.__status = 1
+                        raise
+                    self.__wait_writable(_remaining(deadline))
+                    continue
+                self.metrics.record_write(count)
+                view = view[count:]
+
+    def __tls_fill(self, deadline):
+        """Receives encrypted data for the TLS layer."""
+        while True:
+            try:
+                data = self.__socket.recv(65536)
+            except socket.error as e:
+                if e.args[0] not in (errno.EWOULDBLOCK, errno.EAGAIN):
+                    self.__status = 2
+                    raise
+                self.__wait_readable(_remaining(deadline))
+                continue
+            self.metrics.record_read(len(data))
+            if data:
+                self.__tls.incoming.write(data)
+            else:
+                self.__tls.incoming.write_eof()
+            return
+
+    def __tls_call(self, operation, deadline, *args):
+        """Calls an SSLObject method, feeding the TLS layer with data from the
+        socket until it has enough, then sends whatever it produced."""
+        while True:
+            try:
+                result = operation(*args)
+                break
+            except ssl.SSLWantReadError:
+                self.__tls_flush(deadline)
+                self.__tls_fill(deadline)
+        self.__tls_flush(deadline)
+        return result
+
+    def __tls_read(self, count, timeout, view=None):
+        args = (count,) if view is None else (count, view)
+        try:
+            return self.__tls_call(self.__tls.object.read, _deadline(timeout),
+                                   *args)
+        except (ssl.SSLZeroReturnError, ssl.SSLEOFError):
+            # closed by the other end, with or without a close_notify alert
+            return b"" if view is None else 0
+
+    def __tls_write(self, buffers, timeout):
+        """Encrypts all the buffers, then sends the result at once."""
+        write = self.__tls.object.write
+        total = 0
+        for buffer in buffers:
+            total += write(buffer)
+        self.__tls_flush(_deadline(timeout))
+        return total
+
+    def __tls_close_notify(self):
+        """Tells the other end that no more data will be sent, without
+        waiting: this is only a courtesy."""
+        try:
+            self.__tls.object.unwrap()
+        except ssl.SSLError:
+            """Waiting for the other end's alert; not needed."""
+        try:
+            self.__socket.send(self.__tls.outgoing.read())
+        except socket.error:
+            """Buffer full or connection broken."""
+
     def __can_read(self, timeout):
         if self.status == 2:
             raise socket.error(errno.ENOTCONN, "Connection is closed.")
@@ -173,26 +398,60 @@ class BaseConnection(object):
             return
         return self.__read(count, timeout)
 
+    def __writev(self, buffers, timeout):
+        """Sends as much as possible of a list of buffers in a single system
+        call. Returns the number of bytes sent."""
+        self.__writing = True
+        try:
+            if self.__tls is not None:
+                return self.__tls_write(buffers, timeout)
+            count = self.__socket.sendmsg(buffers)
+            self.metrics.record_write(count)
+            if count:
+                return count
+            raise self.__eagain
+        except socket.error as e:
+            if e.args[0] not in (errno.EINPROGRESS, errno.EWOULDBLOCK,
+                                 errno.EAGAIN):
+                self.__status = 1
+                raise
+            self.__wait_writable(timeout)
+            try:
+                count = self.__socket.sendmsg(buffers)
+                self.metrics.record_write(count)
+                if count == 0:
+                    raise socket.error(errno.ECONNRESET, "Connection closed")
+                return count
+            except socket.error:
+                self.__status = 1
+                raise
+        finally:
+            self.__writing = False
+
     def __write(self, data, timeout):
         self.__writing = True
         try:
+            if self.__tls is not None:
+                return self.__tls_write((data,), timeout)
             count = self.__socket.send(data)
+            self.metrics.record_write(count)
             if count:
                 return count
             raise self.__eagain
         except socket.error as e:
             if e.args[0] not in (errno.EINPROGRESS, errno.EWOULDBLOCK,
                                  errno.EAGAIN):
-                self.status = 1
+                self.__status = 1
                 raise
-            IOLoop.thread.switch(IOLoop.WRITE_REQUEST, self.__id, timeout)
+            self.__wait_writable(timeout)
             try:
                 count = self.__socket.send(data)
+                self.metrics.record_write(count)
                 if count == 0:
                     raise socket.error(errno.ECONNRESET, "Connection closed")
                 return count
             except socket.error:
-                self.status = 1
+                self.__status = 1
                 raise
         finally:
             self.__writing = False
@@ -256,8 +515,8 @@ class BaseConnection(object):
                     # closed before the entire message was read
                     raise socket.error(
                         errno.ECONNRESET,
-                        "Connection closed prematurely (" + count + " bytes "
-                        "left to read)."
+                        "Connection closed prematurely ({0} bytes left to "
+                        "read).".format(count)
                     )
                 break
 
@@ -324,14 +583,19 @@ class BaseConnection(object):
 
         if self.__buffer:
             #buffer exists; store current position and seek to the end of it
-            offset = self.__buffer.tell()
-            self.__buffer.seek(0, 2)
+            buffer = self.__buffer
+            offset = buffer.tell()
+            buffer.seek(0, 2)
         else:
-            self.__buffer = io.BytesIO()
+            buffer = io.BytesIO()
             offset = 0
+        # the reads below must come from the socket, not from the buffer
+        self.__buffer = None
 
         try:
-            while True:
+            # the pattern may have been received by an earlier call already
+            index = buffer.getvalue().find(pattern, offset)
+            while index < 0:
                 # read next packet into the buffer
                 t = timeout
                 if t is not None:
@@ -341,18 +605,250 @@ class BaseConnection(object):
                     raise socket.error(errno.ECONNRESET,
                                        "Connection closed prematurely ("
                                        "requested pattern not found).")
-                self.__buffer.write(buff)
+                buffer.write(buff)
+                index = buffer.getvalue().find(pattern, offset)
 
-                try:
-                    # the buffer has the requested pattern; seek to the first
-                    # unread position, read and return it
-                    index = self.__buffer.getvalue().index(pattern, offset)
-                    self.__buffer.seek(offset)
-                    return self.__buffer.read(index + len(pattern) - offset)
-                except ValueError:
-                    """Pattern not found. Try again on the next pass."""
+            # the buffer has the requested pattern; seek to the first unread
+            # position, read and return it
+            buffer.seek(offset)
+            return buffer.read(index + len(pattern) - offset)
         except ConnectionTimeout:
-            self.__buffer.seek(offset)
+            buffer.seek(offset)
             raise
+        finally:
+            # whatever was received past the pattern is left for the next read
+            if buffer.tell() < len(buffer.getvalue()):
+                self.__buffer = buffer
 
     read_until = readUntil = readuntil
+
+    def iter_chunks(self, size=65536, timeout=Undefined, buffer=None):
+        """Returns an iterator over the data received from the remote
+        end-point, in chunks of at most 'size' bytes, until the connection is
+        closed by the other end. Unlike 'readall', the stream is never
+        accumulated in memory, so arbitrarily large transfers can be processed
+        in constant memory. The timeout, if any, applies to each chunk (it is
+        an idle timeout, not a limit on the whole transfer).
+
+        If 'buffer' (a bytearray) is given, chunks are read directly into it
+        and yielded as memoryviews, which are only valid until the next chunk
+        is read; this avoids allocating a new string per chunk."""
+        timeout = self.__can_read(timeout)
+        if buffer is None:
+            while True:
+                chunk = self.__read(size, timeout)
+                if not chunk:
+                    return
+                yield chunk
+        else:
+            view = memoryview(buffer)[:size]
+            while True:
+                count = self.__readinto(view, timeout)
+                if not count:
+                    return
+                yield view[:count]
+    iterChunks = iter_chunks
+
+    def readinto(self, buffer, timeout=Undefined):
+        """Reads a chunk of data from the remote end-point directly into
+        'buffer' (a bytearray, memoryview or any other writable buffer),
+        without allocating a new string. Returns the number of bytes read,
+        which is 0 if the connection has been closed by the other end. Errors
+        and timeouts are handled as in 'read'."""
+        timeout = self.__can_read(timeout)
+        view = memoryview(buffer)
+        if not len(view):
+            return 0
+        return self.__readinto(view, timeout)
+    read_into = readInto = readinto
+
+    def read_buffered(self):
+        """Returns the data that was already received from the remote
+        end-point but not consumed yet (e.g. read past the pattern by
+        'readuntil'), possibly empty, and discards it: the following reads get
+        their data straight from the socket. This allows handing the socket
+        over to code that reads it directly, e.g. with splice(2)."""
+        if self.__buffer is None:
+            return b""
+        data = self.__buffer.read()
+        self.__buffer = None
+        return data
+    readBuffered = read_buffered
+
+    def wait_readable(self, timeout=Undefined):
+        """Parks the calling thread until data can be read from the socket,
+        without reading it, for code that reads the socket directly. Timeouts
+        are handled as in 'read', and the wait is counted in the metrics of
+        the connection."""
+        self.__wait_readable(self.__can_read(timeout))
+    waitReadable = wait_readable
+
+    def wait_writable(self, timeout=Undefined):
+        """Parks the calling thread until data can be written to the socket,
+        without writing any, for code that writes the socket directly.
+        Timeouts are handled as in 'write', and the wait is counted in the
+        metrics of the connection."""
+        self.__wait_writable(self.__can_write(timeout))
+    waitWritable = wait_writable
+
+    def writev(self, buffers, timeout=Undefined):
+        """Writes a sequence of buffers to the remote end-point as if they were
+        concatenated, until completely written, using vectored sends (a single
+        system call for many buffers) where the platform supports them. The
+        buffers are never copied. Errors and timeouts are handled as in
+        'writeall'. Returns the number of bytes written."""
+        timeout = self.__can_write(timeout)
+        views = [memoryview(b) for b in buffers if len(b)]
+        total = sum(len(view) for view in views)
+        if not hasattr(self.__socket, "sendmsg"):
+            # no vectored sends on this platform
+            if views:
+                self.writeall(b"".join(views), timeout)
+            return total
+
+        deadline = _deadline(timeout)
+        index = 0
+        while index < len(views):
+            sent = self.__writev(views[index:index + _IOV_MAX],
+                                 _remaining(deadline))
+            # skip the buffers that were completely sent and trim the first
+            # partially sent one
+            while sent and sent >= len(views[index]):
+                sent -= len(views[index])
+                index += 1
+            if sent:
+                views[index] = views[index][sent:]
+        return total
+    write_vectored = writeVectored = writev
+
+    def writev_nowait(self, buffers):
+        """Writes as much as possible of a sequence of buffers without
+        waiting: only what fits in the socket's send buffer is written, in a
+        single system call. Returns the number of bytes written, which may be
+        0. Over TLS, where encrypted data can't be left half sent, nothing is
+        ever written and 0 is returned. Errors are handled as in 'write'."""
+        self.__can_write(None)
+        if self.__tls is not None:
+            return 0
+        views = [b for b in buffers if len(b)][:_IOV_MAX]
+        if not views:
+            return 0
+        try:
+            if hasattr(self.__socket, "sendmsg"):
+                count = self.__socket.sendmsg(views)
+            else:
+                count = self.__socket.send(views[0])
+        except socket.error as e:
+            if e.args[0] in (errno.EWOULDBLOCK, errno.EAGAIN):
+                return 0
+            self.__status = 1
+            raise
+        self.metrics.record_write(count)
+        return count
+
+    def read_frame(self, codec, timeout=Undefined):
+        """Reads the next frame of a message oriented protocol, as delimited
+        by 'codec' (see `straight.networking.framing`). Frames are read into a
+        buffer that is reused by subsequent calls: the returned memoryview is
+        only valid until the next call, so copy it (e.g. with `bytes()`) if it
+        must be kept. Raises a socket.error if the connection is closed in the
+        middle of a frame; returns None if it is closed between frames.
+
+        Once frames are read from a connection, data received after the last
+        frame is kept in the frame buffer, so the connection should only be
+        read with this method from then on. Errors and timeouts are handled as
+        in 'readall'."""
+        timeout = self.__can_read(timeout)
+        if self.__frames is None or self.__frames.codec is not codec:
+            self.__frames = framing.FrameReader(codec)
+        return self.__frames.read(self.__readinto, _deadline(timeout))
+    readFrame = read_frame
+
+    def write_frames(self, frames, codec, timeout=Undefined):
+        """Writes many frames at once, each one delimited by 'codec' (see
+        `straight.networking.framing`), in as few system calls as possible and
+        without concatenating them. Errors and timeouts are handled as in
+        'writeall'. Returns the number of bytes written."""
+        buffers = []
+        for frame in frames:
+            buffers.extend(codec.encode(frame))
+        return self.writev(buffers, timeout)
+    writeFrames = write_frames
+
+    def write_frame(self, frame, codec, timeout=Undefined):
+        """Writes a single frame; see 'write_frames'."""
+        return self.writev(codec.encode(frame), timeout)
+    writeFrame = write_frame
+
+    def send_fds(self, data, fds, timeout=Undefined):
+        """Writes 'data' (which must not be empty) and passes the open file
+        descriptors 'fds' along with its first byte, over a unix domain socket
+        (SCM_RIGHTS). The receiving process gets duplicates of the
+        descriptors, which remain valid after they're closed on this side.
+        Errors and timeouts are handled as in 'writeall'. Returns the number
+        of bytes written."""
+        timeout = self.__can_write(timeout)
+        if not data:
+            raise ValueError("File descriptors must be sent with some data")
+        ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                      array.array("i", fds).tobytes())]
+        self.__writing = True
+        try:
+            while True:
+                try:
+                    count = self.__socket.sendmsg([data], ancillary)
+                    break
+                except socket.error as e:
+                    if e.args[0] not in (errno.EWOULDBLOCK, errno.EAGAIN):
+                        self.__status = 1
+                        raise
+                    self.__wait_writable(timeout)
+        finally:
+            self.__writing = False
+        self.metrics.record_write(count)
+        if count < len(data):
+            self.writeall(memoryview(data)[count:], timeout)
+        return len(data)
+    sendFds = send_fds
+
+    def recv_fds(self, count, max_fds, timeout=Undefined):
+        """Reads at most 'count' bytes, along with at most 'max_fds' file
+        descriptors passed by the other end with 'send_fds'. Returns the data
+        and the list of received descriptors, which the caller must close. The
+        data is empty if the connection has been closed by the other end.
+        Errors and timeouts are handled as in 'read'."""
+        timeout = self.__can_read(timeout)
+        if self.__buffer is not None:
+            raise socket.error(errno.EINVAL, "Can not receive file "
+                               "descriptors after buffered reads")
+        item_size = array.array("i").itemsize
+        flags = getattr(socket, "MSG_CMSG_CLOEXEC", 0)
+        self.__reading = True
+        try:
+            while True:
+                try:
+                    data, ancillary, message_flags, _ = self.__socket.recvmsg(
+                        count, socket.CMSG_SPACE(max_fds * item_size), flags)
+                    break
+                except socket.error as e:
+                    if e.args[0] not in (errno.EWOULDBLOCK, errno.EAGAIN):
+                        self.__status = 2
+                        raise
+                    self.__wait_readable(timeout)
+        finally:
+            self.__reading = False
+        self.metrics.record_read(len(data))
+
+        fds = array.array("i")
+        for level, kind, payload in ancillary:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                usable = len(payload) - len(payload) % item_size
+                fds.frombytes(payload[:usable])
+        fds = list(fds)
+        if message_flags & socket.MSG_CTRUNC:
+            for fd in fds:
+                os.close(fd)
+            raise socket.error(errno.EMSGSIZE, "More than {0} file "
+                               "descriptors were received".format(max_fds))
+        return data, fds
+    recvFds = recv_fds
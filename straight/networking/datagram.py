@@ -0,0 +1,287 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import Thread, stats
+from straight.errors import StraightError
+from straight.ioloop import IOLoop
+from straight import ioloop
+from .connection import Undefined
+from .metrics import ConnectionMetrics, ServerMetrics
+
+import logging
+import socket
+import errno
+import time
+
+log = logging.getLogger("straight.network")
+
+# largest payload of a UDP datagram
+MAX_DATAGRAM = 65535
+
+_AGAIN = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+
+def bind(port, interface="0.0.0.0", reuse_port=False):
+    """Creates a non blocking UDP socket bound to the given port (0 picks a
+    free one). With 'reuse_port', several sockets, typically one per worker
+    process, may be bound to the same port, and the kernel spreads the
+    incoming datagrams between them (Linux 3.9+, BSD)."""
+    family = socket.AF_INET6 if ":" in interface else socket.AF_INET
+    descriptor = socket.socket(family, socket.SOCK_DGRAM)
+    try:
+        descriptor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            if not hasattr(socket, "SO_REUSEPORT"):
+                raise StraightError("SO_REUSEPORT is not supported by the "
+                                    "operating system")
+            descriptor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        descriptor.bind((interface, port))
+    except Exception:
+        descriptor.close()
+        raise
+    return descriptor
+
+
+class DatagramEndpoint(object):
+    """A UDP socket on which datagrams are sent and received cooperatively:
+    only the calling thread waits for the socket to become ready. Unlike
+    connections, an endpoint may exchange datagrams with any number of remote
+    addresses, and every datagram is received or sent whole.
+
+    'descriptor' is an existing datagram socket (e.g. created by `bind()`);
+    if omitted, an unbound socket of the given 'family' is created, which is
+    enough to send datagrams and receive the replies. 'timeout' is the default
+    timeout of the receive and send calls, in seconds."""
+    __slots__ = ("__socket", "__id", "__views", "__buffers", "timeout",
+                 "metrics", "__weakref__")
+
+    def __init__(self, descriptor=None, timeout=None, family=socket.AF_INET,
+                 metrics=None):
+        if descriptor is None:
+            descriptor = socket.socket(family, socket.SOCK_DGRAM)
+        descriptor.setblocking(False)
+        self.__socket = descriptor
+        self.__id = descriptor.fileno()
+        # allocated by the first call to `recv_many()`
+        self.__buffers = self.__views = None
+        self.timeout = timeout
+        self.metrics = metrics if metrics is not None else ConnectionMetrics()
+
+    @property
+    def address(self):
+        """The local address the socket is bound to (read only)."""
+        return self.__socket.getsockname()
+
+    def fileno(self):
+        """Returns the file descriptor of the underlying socket."""
+        return self.__id
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, value, traceback):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "_DatagramEndpoint__socket", None) is not None:
+            self.close()
+
+    def close(self):
+        """Closes the socket. Any active or future call will fail with a
+        socket.error."""
+        if self.__socket is None:
+            raise socket.error(errno.EBADF, "Endpoint is already closed")
+        IOLoop.unregister(self.__id)
+        self.__socket.close()
+        self.__socket = None
+
+    def __check(self, timeout):
+        if self.__socket is None:
+            raise socket.error(errno.EBADF, "Endpoint is closed")
+        if timeout is Undefined:
+            return self.timeout
+        return timeout
+
+    def __wait(self, request, reason, timeout):
+        if stats.enabled:
+            stats.waiting(stats.IO, reason)
+        blocked = ioloop.now()
+        try:
+            IOLoop.thread.switch(request, self.__id, timeout)
+        finally:
+            if request == IOLoop.READ_REQUEST:
+                self.metrics.record_read_wait(ioloop.now() - blocked)
+            else:
+                self.metrics.record_write_wait(ioloop.now() - blocked)
+
+    def recvfrom_into(self, buffer, timeout=Undefined):
+        """Receives a single datagram into 'buffer' (any writable buffer),
+        waiting for one if needed. Returns the size of the datagram and the
+        address it was sent from. A datagram larger than the buffer is
+        truncated."""
+        timeout = self.__check(timeout)
+        while True:
+            try:
+                count, address = self.__socket.recvfrom_into(buffer)
+            except socket.error as e:
+                if e.args[0] not in _AGAIN:
+                    raise
+                self.__wait(IOLoop.READ_REQUEST, "recvfrom", timeout)
+                continue
+            self.metrics.record_read(count)
+            return count, address
+
+    def recvfrom(self, size=MAX_DATAGRAM, timeout=Undefined):
+        """Receives a single datagram of at most 'size' bytes, waiting for one
+        if needed. Returns the data and the address it was sent from."""
+        buffer = bytearray(size)
+        count, address = self.recvfrom_into(buffer, timeout)
+        return bytes(buffer[:count]), address
+
+    def recv_many(self, max_count=64, size=MAX_DATAGRAM, timeout=Undefined):
+        """Receives up to 'max_count' datagrams at once: waits for the first
+        one if none is pending, then takes all the ones already queued by the
+        kernel, without waiting again. This processes a burst of datagrams in
+        a single wakeup of the calling thread, instead of one switch through
+        the loop per datagram.
+
+        Datagrams are received into buffers allocated once per endpoint and
+        reused by later calls: returns a list of (memoryview, address) pairs,
+        and the memoryviews are only valid until the next call."""
+        timeout = self.__check(timeout)
+        if self.__buffers is None or len(self.__buffers) < max_count or \
+                len(self.__buffers[0]) < size:
+            self.__buffers = [bytearray(size) for _ in range(max_count)]
+            self.__views = [memoryview(b) for b in self.__buffers]
+
+        receive = self.__socket.recvfrom_into
+        record = self.metrics.record_read
+        datagrams = []
+        while len(datagrams) < max_count:
+            view = self.__views[len(datagrams)]
+            try:
+                count, address = receive(view, size)
+            except socket.error as e:
+                if e.args[0] not in _AGAIN:
+                    raise
+                if datagrams:
+                    break
+                self.__wait(IOLoop.READ_REQUEST, "recvfrom", timeout)
+                continue
+            record(count)
+            datagrams.append((view[:count], address))
+        return datagrams
+    recvMany = recv_many
+
+    def sendto(self, data, address, timeout=Undefined):
+        """Sends a datagram to 'address', waiting for buffer space in the
+        socket if needed. Returns the number of bytes sent."""
+        timeout = self.__check(timeout)
+        while True:
+            try:
+                count = self.__socket.sendto(data, address)
+            except socket.error as e:
+                if e.args[0] not in _AGAIN + (errno.ENOBUFS,):
+                    raise
+                self.__wait(IOLoop.WRITE_REQUEST, "sendto", timeout)
+                continue
+            self.metrics.record_write(count)
+            return count
+
+    def send_many(self, datagrams, timeout=Undefined):
+        """Sends a sequence of (data, address) pairs, back to back; the
+        calling thread only yields to the loop if the socket buffer fills up.
+        Returns the number of datagrams sent."""
+        count = 0
+        for data, address in datagrams:
+            self.sendto(data, address, timeout)
+            count += 1
+        return count
+    sendMany = send_many
+
+    def __repr__(self):
+        return "<straight.networking.DatagramEndpoint({0}) object at " \
+               "{1}>".format(self.__id, hex(id(self)))
+
+
+class DatagramServer(Thread):
+    def __init__(self, port, timeout=None, interface="0.0.0.0",
+                 reuse_port=False, batch=64, max_size=MAX_DATAGRAM):
+        """Creates a server receiving datagrams on the specified port.
+        Datagrams are received in batches of at most 'batch' (see
+        `DatagramEndpoint.recv_many()`) and passed to 'handle_many', which
+        calls 'handle' with each datagram and its sender's address by default.
+        Datagrams are handled by the server thread itself, in order: a
+        handler that needs to block for long should hand the work over to
+        another thread. Replies can be sent with `self.endpoint.sendto()`.
+
+        By default the socket is created right away and shared by all the
+        worker processes, which compete for the datagrams. With
+        'reuse_port', each worker process binds its own socket to the port
+        when the server starts running, and the kernel balances the datagrams
+        between them, so they never wake up for nothing."""
+        Thread.__init__(self)
+        self.__port = port
+        self.__interface = interface
+        self.__reuse_port = reuse_port
+        self.__batch = batch
+        self.__max_size = max_size
+        self.__timeout = timeout
+        self.__metrics = ServerMetrics()
+        self.endpoint = None
+        if not reuse_port:
+            self.endpoint = DatagramEndpoint(bind(port, interface), timeout,
+                                             metrics=self.__metrics)
+            log.debug("Datagram socket {0} is bound to {1}:{2}".format(
+                self.endpoint.fileno(), interface, port))
+
+    def handle(self, data, address):
+        raise StraightError("You must rewrite the 'handle' method to receive "
+                            "datagrams")
+
+    def handle_many(self, datagrams):
+        """Handles a batch of (data, address) pairs. The data are memoryviews
+        that are only valid until this method returns."""
+        for data, address in datagrams:
+            self.handle(data, address)
+
+    def metrics(self):
+        """Returns a snapshot of the I/O counters of the server, as a
+        dictionary. 'handle_time' is the time spent handling each batch."""
+        return self.__metrics.snapshot()
+
+    def run(self):
+        """Runs the server, receiving datagrams on its socket."""
+        if self.endpoint is None:
+            self.endpoint = DatagramEndpoint(
+                bind(self.__port, self.__interface, True), self.__timeout,
+                metrics=self.__metrics)
+        metrics = self.__metrics
+        with self.endpoint:
+            while True:
+                try:
+                    datagrams = self.endpoint.recv_many(
+                        self.__batch, self.__max_size, None)
+                    metrics.accepted += len(datagrams)
+                    start = time.time()
+                    try:
+                        self.handle_many(datagrams)
+                    finally:
+                        metrics.handle_time.record(time.time() - start)
+                except Exception:
+                    metrics.errors += 1
+                    log.exception("Exception occurred while handling "
+                                  "datagrams")
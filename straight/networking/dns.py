@@ -14,23 +14,19 @@ You should have received a copy of the GNU Lesser General Public License along
 with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
+from straight.threading import Event
 from straight import ioloop
 
 import pycares
 import pyuv
-
-
-_channel = pycares.Channel(sock_state_cb=_sock_state_cb)
-loop = ioloop.default
-_timer = pyuv.Timer(loop)
-_fd_map = {}
+import socket
 
 
 def _sock_state_cb(fd, readable, writable):
     if readable or writable:
         if fd not in _fd_map:
             # New socket
-            handle = pyuv.Poll(self.loop, fd)
+            handle = pyuv.Poll(loop, fd)
             handle.fd = fd
             _fd_map[fd] = handle
         else:
@@ -51,11 +47,11 @@ def _sock_state_cb(fd, readable, writable):
             _timer.stop()
 
 
-def _timer_cb(self, timer):
-        _channel.process_fd(pycares.ARES_SOCKET_BAD, pycares.ARES_SOCKET_BAD)
+def _timer_cb(timer):
+    _channel.process_fd(pycares.ARES_SOCKET_BAD, pycares.ARES_SOCKET_BAD)
 
 
-def _poll_cb(self, handle, events, error):
+def _poll_cb(handle, events, error):
     read_fd = handle.fd
     write_fd = handle.fd
     if error is not None:
@@ -69,8 +65,52 @@ def _poll_cb(self, handle, events, error):
     _channel.process_fd(read_fd, write_fd)
 
 
- def _query(self, query_type, name, cb):
-        _channel.query(query_type, name, cb)
-
-
-def gethostbyname
\ No newline at end of file
+_channel = pycares.Channel(sock_state_cb=_sock_state_cb)
+loop = ioloop.default
+_timer = pyuv.Timer(loop)
+_fd_map = {}
+_pending = set()  # tokens of the queries whose caller is still waiting
+
+
+def _is_address(hostname, family):
+    try:
+        socket.inet_pton(family, hostname)
+        return True
+    except (socket.error, ValueError):
+        return False
+
+
+def gethostbyname(hostname, family=socket.AF_INET, timeout=None):
+    """Resolves 'hostname' to the list of its addresses, blocking only the
+    calling thread while the query is in progress. Literal addresses are
+    returned as is, without a query. Raises a socket.gaierror if the name can
+    not be resolved, or a WaitTimeout if no answer is received in 'timeout'
+    seconds."""
+    if _is_address(hostname, family):
+        return [hostname]
+
+    done = Event()
+    outcome = []
+    token = object()
+    _pending.add(token)
+
+    def callback(result, error):
+        if token not in _pending:
+            # the caller timed out and is gone
+            return
+        _pending.discard(token)
+        outcome.append((result, error))
+        done.set()
+
+    _channel.gethostbyname(hostname, family, callback)
+    try:
+        done.wait(timeout)
+    except BaseException:
+        # the channel is shared, so the query is not cancelled (that would
+        # cancel the queries of the other threads too); its answer is ignored
+        _pending.discard(token)
+        raise
+    result, error = outcome[0]
+    if error is not None:
+        raise socket.gaierror(error, pycares.errno.strerror(error))
+    return result.addresses
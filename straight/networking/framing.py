@@ -0,0 +1,188 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import struct
+import socket
+import errno
+import time
+
+
+class Codec(object):
+    """Delimits the frames (messages) of a message oriented protocol. Codecs
+    are stateless and may be shared by any number of connections; see
+    `BaseConnection.read_frame` and `BaseConnection.write_frames`.
+
+    Frames larger than `max_size` bytes are rejected with a ValueError when
+    read, so that a broken or malicious peer can't make the reader allocate
+    unbounded amounts of memory."""
+
+    def __init__(self, max_size=16 * 1024 * 1024):
+        self.max_size = max_size
+
+    def encode(self, frame):
+        """Returns the list of buffers that make up the encoded frame. The
+        frame itself is never copied."""
+        raise NotImplementedError
+
+    def parse(self, buffer, start, end):
+        """Looks for a complete frame in `buffer[start:end]`. Returns None if
+        more data is needed, or a `(frame_start, frame_end, next_start)`
+        tuple otherwise."""
+        raise NotImplementedError
+
+    def _check(self, size):
+        if size > self.max_size:
+            raise ValueError("Frame of {0} bytes exceeds the maximum size of "
+                             "{1} bytes".format(size, self.max_size))
+
+
+class LengthPrefixed(Codec):
+    """Each frame is preceded by its length, as a `width` bytes (1, 2, 4 or
+    8) big-endian unsigned integer."""
+    __formats = {1: struct.Struct(">B"), 2: struct.Struct(">H"),
+                 4: struct.Struct(">I"), 8: struct.Struct(">Q")}
+
+    def __init__(self, width=4, max_size=16 * 1024 * 1024):
+        Codec.__init__(self, max_size)
+        if width not in self.__formats:
+            raise ValueError("Unsupported length prefix width: {0}".format(
+                width))
+        self.width = width
+        self.__format = self.__formats[width]
+
+    def encode(self, frame):
+        return [self.__format.pack(len(frame)), frame]
+
+    def parse(self, buffer, start, end):
+        if end - start < self.width:
+            return None
+        size, = self.__format.unpack_from(buffer, start)
+        self._check(size)
+        start += self.width
+        if end - start < size:
+            return None
+        return start, start + size, start + size
+
+
+class Varint(Codec):
+    """Each frame is preceded by its length, as an unsigned LEB128 varint (as
+    used by Protocol Buffers): 7 bits per byte, least significant group
+    first, the high bit set on all the bytes except the last one."""
+
+    def encode(self, frame):
+        size = len(frame)
+        header = bytearray()
+        while size > 0x7f:
+            header.append(0x80 | (size & 0x7f))
+            size >>= 7
+        header.append(size)
+        return [header, frame]
+
+    def parse(self, buffer, start, end):
+        size = shift = 0
+        position = start
+        while True:
+            if position == end:
+                return None
+            byte = buffer[position]
+            position += 1
+            size |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+            if shift > 63:
+                raise ValueError("Invalid varint frame length")
+        self._check(size)
+        if end - position < size:
+            return None
+        return position, position + size, position + size
+
+
+class Delimited(Codec):
+    """Each frame is followed by `delimiter` (e.g. a new line), which must
+    never occur in the frames themselves; this is not checked when encoding.
+    """
+
+    def __init__(self, delimiter=b"\n", max_size=16 * 1024 * 1024):
+        Codec.__init__(self, max_size)
+        if not delimiter:
+            raise ValueError("The delimiter can't be empty")
+        self.delimiter = delimiter
+
+    def encode(self, frame):
+        return [frame, self.delimiter]
+
+    def parse(self, buffer, start, end):
+        index = buffer.find(self.delimiter, start, end)
+        if index == -1:
+            self._check(end - start)
+            return None
+        return start, index, index + len(self.delimiter)
+
+
+class FrameReader(object):
+    """Reads frames delimited by a codec into a reusable buffer. Each
+    connection reading frames owns one reader (see
+    `BaseConnection.read_frame`)."""
+    __slots__ = ("codec", "__buffer", "__start", "__end")
+
+    def __init__(self, codec, size=4096):
+        self.codec = codec
+        self.__buffer = bytearray(size)
+        self.__start = self.__end = 0  # unparsed data in the buffer
+
+    def read(self, readinto, deadline):
+        """Returns a memoryview of the next frame, reading more data with
+        `readinto(view, timeout)` as needed, or None if the connection was
+        closed between two frames."""
+        while True:
+            frame = self.codec.parse(self.__buffer, self.__start, self.__end)
+            if frame is not None:
+                frame_start, frame_end, self.__start = frame
+                if self.__start == self.__end:
+                    # all data was parsed; the next read starts at the
+                    # beginning of the buffer
+                    self.__start = self.__end = 0
+                return memoryview(self.__buffer)[frame_start:frame_end]
+
+            if self.__end == len(self.__buffer):
+                self.__make_room()
+
+            timeout = deadline
+            if timeout is not None:
+                timeout = max(0, timeout - time.time())
+            count = readinto(memoryview(self.__buffer)[self.__end:], timeout)
+            if not count:
+                if self.__start == self.__end:
+                    return None
+                raise socket.error(errno.ECONNRESET,
+                                   "Connection closed prematurely (in the "
+                                   "middle of a frame).")
+            self.__end += count
+
+    def __make_room(self):
+        """Moves the unparsed data to the beginning of the buffer, or if it
+        already is there, replaces the buffer with one twice as large. A new
+        buffer is allocated instead of resizing the current one, since frames
+        previously returned may still reference it."""
+        pending = self.__end - self.__start
+        if self.__start:
+            self.__buffer[:pending] = self.__buffer[self.__start:self.__end]
+        else:
+            buffer = bytearray(2 * len(self.__buffer))
+            buffer[:pending] = self.__buffer[:pending]
+            self.__buffer = buffer
+        self.__start, self.__end = 0, pending
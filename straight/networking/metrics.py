@@ -0,0 +1,148 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight import ioloop
+
+
+class Histogram(object):
+    """A histogram of durations with logarithmic buckets: bucket `i` counts
+    the durations between 2^(i-1) and 2^i microseconds. Recording a value and
+    taking a snapshot are both constant time, regardless of the number of
+    recorded values."""
+    __slots__ = ("buckets", "count", "total", "max")
+
+    SIZE = 28  # the last bucket holds everything over ~67 seconds
+
+    def __init__(self):
+        self.buckets = [0] * self.SIZE
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration):
+        """Records a duration, in seconds."""
+        microseconds = int(duration * 1000000)
+        self.buckets[min(microseconds.bit_length(), self.SIZE - 1)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def percentile(self, percent):
+        """Returns an upper bound of the given percentile, in seconds (the
+        upper limit of the bucket holding it)."""
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min(self.max, (1 << index) / 1000000)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": list(self.buckets),
+        }
+
+
+class ConnectionMetrics(object):
+    """I/O counters of a single connection. If a `parent` is given (the
+    metrics of the server which accepted the connection), every update is
+    applied to it as well, so that server totals are always up to date and
+    never need to be computed from the individual connections."""
+    __slots__ = ("bytes_read", "bytes_written", "reads", "writes",
+                 "read_waits", "write_waits", "read_blocked", "write_blocked",
+                 "last_active", "parent")
+
+    def __init__(self, parent=None):
+        self.bytes_read = 0  # bytes received
+        self.bytes_written = 0  # bytes sent
+        self.reads = 0  # recv calls
+        self.writes = 0  # send calls
+        self.read_waits = 0  # times a read had to wait for data (EAGAIN)
+        self.write_waits = 0  # times a write had to wait for buffer space
+        self.read_blocked = 0.0  # seconds spent waiting for data
+        self.write_blocked = 0.0  # seconds spent waiting for buffer space
+        # loop time (see `ioloop.now()`) of the last read or write
+        self.last_active = ioloop.now()
+        self.parent = parent
+
+    def record_read(self, count):
+        self.reads += 1
+        self.bytes_read += count
+        self.last_active = ioloop.now()
+        if self.parent is not None:
+            self.parent.record_read(count)
+
+    def record_write(self, count):
+        self.writes += 1
+        self.bytes_written += count
+        self.last_active = ioloop.now()
+        if self.parent is not None:
+            self.parent.record_write(count)
+
+    def record_read_wait(self, duration):
+        self.read_waits += 1
+        self.read_blocked += duration
+        if self.parent is not None:
+            self.parent.record_read_wait(duration)
+
+    def record_write_wait(self, duration):
+        self.write_waits += 1
+        self.write_blocked += duration
+        if self.parent is not None:
+            self.parent.record_write_wait(duration)
+
+    def snapshot(self):
+        return {
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "reads": self.reads,
+            "writes": self.writes,
+            "read_waits": self.read_waits,
+            "write_waits": self.write_waits,
+            "read_blocked": self.read_blocked,
+            "write_blocked": self.write_blocked,
+        }
+
+
+class ServerMetrics(ConnectionMetrics):
+    """Aggregated I/O counters of all the connections accepted by a server,
+    plus connection counts and a histogram of `handle()` durations."""
+    __slots__ = ("accepted", "active", "errors", "handle_time")
+
+    def __init__(self):
+        ConnectionMetrics.__init__(self)
+        self.accepted = 0  # connections accepted
+        self.active = 0  # connections currently being handled
+        self.errors = 0  # calls to `handle()` that raised an exception
+        self.handle_time = Histogram()
+
+    def snapshot(self):
+        result = ConnectionMetrics.snapshot(self)
+        result["accepted"] = self.accepted
+        result["active"] = self.active
+        result["errors"] = self.errors
+        result["handle_time"] = self.handle_time.snapshot()
+        return result
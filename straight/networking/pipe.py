@@ -0,0 +1,101 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking.connection import Undefined
+from straight.threading import Thread, Event
+
+import collections
+import greenlet
+
+
+def pipe(source, transform, sink, chunk_size=65536, max_buffered=1048576,
+         timeout=Undefined, flush=None):
+    """Streams all the data received from the 'source' connection to the
+    'sink' connection, until 'source' is closed by the other end, passing
+    each chunk through 'transform' (a callable taking and returning a string,
+    possibly empty; None to forward the data unchanged). If given, 'flush' is
+    called once the source is exhausted and the string it returns (e.g. the
+    tail of a compressed stream) is written last.
+
+    Reading and writing are done concurrently by two threads (the calling one
+    writes), with at most 'max_buffered' bytes of transformed data waiting to
+    be written: if the sink is slower than the source, reading stops until it
+    catches up, so the flow control of the sink applies to the source as well
+    and memory use stays bounded regardless of the size of the transfer.
+    'timeout', if any, applies to each read and write.
+
+    The sink is not closed. Returns the number of bytes written to it. If
+    either side fails, the other one is stopped and the exception is raised.
+    """
+    queue = collections.deque()
+    state = {"buffered": 0, "done": False, "error": None}
+    readable = Event()  # data is queued, or the source is exhausted
+    writable = Event()  # less than 'max_buffered' bytes are queued
+    writable.set()
+
+    def enqueue(chunk):
+        writable.wait()
+        queue.append(chunk)
+        state["buffered"] += len(chunk)
+        if state["buffered"] >= max_buffered:
+            writable.clear()
+        readable.set()
+
+    def produce():
+        try:
+            for chunk in source.iter_chunks(chunk_size, timeout):
+                if transform is not None:
+                    chunk = transform(chunk)
+                if chunk:
+                    enqueue(chunk)
+            if flush is not None:
+                chunk = flush()
+                if chunk:
+                    enqueue(chunk)
+        except greenlet.GreenletExit:
+            """Stopped because writing failed."""
+        except Exception as e:
+            state["error"] = e
+        finally:
+            state["done"] = True
+            readable.set()
+
+    reader = Thread(produce, name="pipe reader")
+    reader.start()
+
+    written = 0
+    try:
+        while True:
+            readable.wait()
+            if queue:
+                # write everything that is queued at once
+                chunks = list(queue)
+                queue.clear()
+                state["buffered"] = 0
+                writable.set()
+                written += sink.writev(chunks, timeout)
+            elif state["done"]:
+                break
+            else:
+                readable.clear()
+    except BaseException:
+        if not state["done"]:
+            reader.stop()
+        raise
+
+    if state["error"] is not None:
+        raise state["error"]
+    return written
@@ -0,0 +1,143 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight import ioloop
+
+import logging
+import pyuv
+
+log = logging.getLogger("straight.network")
+
+
+class Reaper(object):
+    """Closes the connections which have been idle (no data read or written)
+    for more than 'max_idle' seconds, or open for more than 'max_lifetime'
+    seconds, stopping the threads handling them.
+
+    Rather than a timer per connection, a single periodic timer sweeps a
+    structure of buckets every 'resolution' seconds: each connection sits in
+    the bucket of the time it may expire at, as known when it was filed.
+    Activity is only recorded by the connection itself (the loop time of its
+    last read or write, see `ConnectionMetrics`), so I/O never touches the
+    buckets; when a bucket expires, the connections that have been active
+    since are filed again according to their new expiry time, and the others
+    are closed. Each connection is thus looked at about once per 'max_idle'
+    period, and the cost of the sweep doesn't depend on the number of
+    connections that are not due, so that hundreds of thousands of idle
+    connections are cheap. Connections are closed up to 'resolution' seconds
+    late."""
+
+    def __init__(self, max_idle=None, max_lifetime=None, resolution=1.0,
+                 loop=None):
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.resolution = resolution
+        self.__loop = loop or ioloop.default
+        self.__buckets = {}  # tick -> {connection: None}
+        self.__entries = {}  # connection -> [tick, thread, opened]
+        self.__timer = None  # created once the first connection is added
+        self.__swept = None  # last tick swept
+        self.reaped = 0  # connections closed
+
+    def __tick(self, moment):
+        return int(moment // self.resolution) + 1
+
+    def __expiry(self, connection, opened):
+        expiry = None
+        if self.max_idle is not None:
+            expiry = connection.metrics.last_active + self.max_idle
+        if self.max_lifetime is not None:
+            end = opened + self.max_lifetime
+            if expiry is None or end < expiry:
+                expiry = end
+        return expiry
+
+    def __file(self, connection, entry, expiry):
+        tick = max(self.__tick(expiry), self.__swept + 1)
+        entry[0] = tick
+        bucket = self.__buckets.get(tick)
+        if bucket is None:
+            bucket = self.__buckets[tick] = {}
+        bucket[connection] = None
+
+    def add(self, connection, thread=None):
+        """Starts watching a connection. 'thread' is the thread handling it,
+        which is stopped (rather than the connection closed) when it expires,
+        so that it can clean up."""
+        if self.max_idle is None and self.max_lifetime is None:
+            return
+        now = ioloop.now()
+        if self.__timer is None:
+            self.__timer = pyuv.Timer(self.__loop)
+            self.__timer.ref = False
+        if not self.__entries:
+            self.__swept = self.__tick(now) - 1
+            self.__timer.start(self.__sweep, self.resolution, self.resolution)
+        entry = self.__entries[connection] = [None, thread, now]
+        self.__file(connection, entry, self.__expiry(connection, now))
+
+    def remove(self, connection):
+        """Stops watching a connection, e.g. once it's closed."""
+        entry = self.__entries.pop(connection, None)
+        if entry is None:
+            return
+        bucket = self.__buckets.get(entry[0])
+        if bucket is not None:
+            bucket.pop(connection, None)
+            if not bucket:
+                del self.__buckets[entry[0]]
+        if not self.__entries:
+            self.__timer.stop()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __sweep(self, timer):
+        now = ioloop.now()
+        current = self.__tick(now) - 1
+        while self.__swept < current:
+            self.__swept += 1
+            bucket = self.__buckets.pop(self.__swept, None)
+            if not bucket:
+                continue
+            for connection in bucket:
+                entry = self.__entries[connection]
+                expiry = self.__expiry(connection, entry[2])
+                if expiry > now:
+                    # active since it was filed
+                    self.__file(connection, entry, expiry)
+                else:
+                    self.__expire(connection, entry)
+        if not self.__entries:
+            self.__timer.stop()
+
+    def __expire(self, connection, entry):
+        del self.__entries[connection]
+        self.reaped += 1
+        log.debug("Closing expired connection {0}".format(
+            connection.address))
+        thread = entry[1]
+        try:
+            if thread is not None:
+                thread.stop()
+            elif connection.status != 2:
+                connection.close()
+        except Exception:
+            log.exception("Unable to close expired connection")
+
+    def __repr__(self):
+        return "<straight.networking.Reaper({0}) object at {1}>".format(
+            len(self), hex(id(self)))
@@ -0,0 +1,118 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import TaskGroup
+
+import socket
+import errno
+import os
+
+_CHUNK = 65536  # default capacity of a Linux pipe
+
+
+def _copy(source, sink, timeout):
+    """Forwards data through a reusable buffer. Returns the byte count."""
+    buffer = bytearray(_CHUNK)
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        count = source.readinto(buffer, timeout)
+        if not count:
+            return total
+        sink.writeall(view[:count], timeout)
+        total += count
+
+
+def _splice(source, sink, timeout):
+    """Forwards data through a pipe with splice(2), so that it never leaves
+    the kernel. Returns the byte count."""
+    flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+    source_fd, sink_fd = source.fileno(), sink.fileno()
+    read_end, write_end = os.pipe()
+    total = 0
+    try:
+        while True:
+            # the pipe is always empty at this point, so EAGAIN means that
+            # the source has no data
+            try:
+                pending = os.splice(source_fd, write_end, _CHUNK, flags=flags)
+            except BlockingIOError:
+                source.wait_readable(timeout)
+                continue
+            if not pending:
+                return total
+            source.metrics.record_read(pending)
+
+            while pending:
+                try:
+                    count = os.splice(read_end, sink_fd, pending, flags=flags)
+                except BlockingIOError:
+                    sink.wait_writable(timeout)
+                    continue
+                sink.metrics.record_write(count)
+                pending -= count
+                total += count
+    finally:
+        os.close(read_end)
+        os.close(write_end)
+
+
+def _forward(source, sink, timeout):
+    """Forwards data from one connection to the other until the source is
+    closed by its end. Returns the byte count."""
+    # data that was already read from the source's socket, but not consumed
+    # (e.g. after a 'readuntil' call)
+    data = source.read_buffered()
+    if data:
+        sink.writeall(data, timeout)
+    total = len(data)
+    if hasattr(os, "splice") and source.tls is None and sink.tls is None:
+        total += _splice(source, sink, timeout)
+    else:
+        total += _copy(source, sink, timeout)
+    # let the other end know that no more data will come from this side
+    if sink.status == 0:
+        try:
+            sink.shutdown()
+        except socket.error as e:
+            if e.args[0] not in (errno.ENOTCONN, errno.ESHUTDOWN):
+                raise
+    return total
+
+
+def relay(first, second, timeout=None):
+    """Moves data between two connections, in both directions, until both
+    sides have closed their end (e.g. to implement a TCP proxy). When one side
+    half closes its end, the other connection is half closed as well, while
+    data keeps flowing in the other direction.
+
+    On Linux (Python 3.10+), data is moved with splice(2) through a pipe, so
+    it is never copied to user space; otherwise (or if either connection uses
+    TLS) it is read into a buffer that is reused for the whole transfer.
+    'timeout', if given, is an idle timeout applied to each read and write.
+
+    The connections are not closed. Returns the number of bytes moved from
+    'first' to 'second' and from 'second' to 'first', as a tuple. If either
+    direction fails, the other one is stopped and the exception is raised."""
+    group = TaskGroup(name="relay")
+    group.spawn(_forward, first, second, timeout)
+    group.spawn(_forward, second, first, timeout)
+    try:
+        forward, backward = group.gather()
+    except BaseException:
+        group.stop()
+        raise
+    return forward, backward
@@ -0,0 +1,271 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking.framing import LengthPrefixed
+from straight.networking.server import Server
+from straight.errors import StraightError
+from straight.threading import Thread, Event, Future, Semaphore
+
+import greenlet
+import itertools
+import logging
+import socket
+import struct
+import errno
+import time
+
+log = logging.getLogger("straight.network")
+
+# every message is a length prefixed frame holding the call id, a status and
+# the payload
+_HEAD = struct.Struct(">IIB")
+_ID = struct.Struct(">IB")
+_OK = 0
+_ERROR = 1
+
+
+class RPCError(Exception):
+    """Raised by `RPCClient.call()` when the server failed to handle the call.
+    The message is the one sent by the server."""
+
+
+class _Writer(object):
+    """Sends the messages queued by any number of threads, from a single
+    writer thread: messages queued while a write is in progress are sent
+    together by the next one, in a single vectored write. Calls 'failed' with
+    the exception if the connection breaks."""
+
+    def __init__(self, connection, failed, name):
+        self.__connection = connection
+        self.__failed = failed
+        self.__buffers = []
+        self.__busy = False
+        self.__stopped = False
+        self.__ready = Event()
+        self.__written = Event()
+        self.__thread = Thread(self.__run, name=name)
+        self.__thread.start()
+
+    def send(self, identifier, status, payload):
+        self.__buffers.append(_HEAD.pack(_ID.size + len(payload), identifier,
+                                         status))
+        self.__buffers.append(payload)
+        self.__ready.set()
+
+    def __run(self):
+        try:
+            while True:
+                self.__ready.wait()
+                self.__ready.clear()
+                buffers, self.__buffers = self.__buffers, []
+                self.__busy = True
+                self.__connection.writev(buffers)
+                self.__busy = False
+                self.__written.set()
+        except greenlet.GreenletExit:
+            """Stopped by `close()`."""
+        except Exception as e:
+            self.__failed(e)
+        finally:
+            self.__stopped = True
+            self.__written.set()
+
+    def drain(self):
+        """Waits until all the queued messages are sent."""
+        while (self.__buffers or self.__busy) and not self.__stopped:
+            self.__written.clear()
+            self.__written.wait()
+
+    def stop(self):
+        self.__thread.stop()
+
+
+class RPCClient(object):
+    """Issues concurrent calls over a single connection: any number of
+    threads may call at the same time, without waiting for each other's
+    responses. Each message carries a call id; a single reader thread
+    dispatches the responses, in whatever order the server sends them, to the
+    waiting callers, and a single writer thread sends the calls, batching
+    those issued while it was busy.
+
+    At most 'max_outstanding' calls may be in flight at once; further calls
+    wait for one to complete (flow control), within their timeout. Messages
+    are length prefixed frames (4 bytes, big-endian) holding a 4 bytes call
+    id, a status byte and the payload; see `RPCServer`.
+
+    If the connection breaks, all the pending calls fail with the same
+    socket.error, and so do further calls."""
+
+    def __init__(self, connection, max_outstanding=1024, timeout=None,
+                 max_size=16 * 1024 * 1024):
+        self.connection = connection
+        self.timeout = timeout
+        self.__codec = LengthPrefixed(4, max_size)
+        self.__ids = itertools.count(1)
+        self.__pending = {}  # call id -> Future
+        self.__available = Semaphore(max_outstanding)
+        self.__error = None
+        self.__writer = _Writer(connection, self.__fail, "rpc writer")
+        self.__reader = Thread(self.__read, name="rpc reader")
+        self.__reader.start()
+
+    def __read(self):
+        connection, codec = self.connection, self.__codec
+        try:
+            while True:
+                frame = connection.read_frame(codec, None)
+                if frame is None:
+                    raise socket.error(errno.ECONNRESET, "Connection closed "
+                                       "by the server")
+                identifier, status = _ID.unpack_from(frame)
+                future = self.__pending.pop(identifier, None)
+                if future is None:
+                    # the call timed out
+                    continue
+                payload = bytes(frame[_ID.size:])
+                if status == _OK:
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RPCError(payload.decode("utf-8")))
+        except greenlet.GreenletExit:
+            """Stopped by `close()`."""
+        except Exception as e:
+            self.__fail(e)
+
+    def __fail(self, error, closed=False):
+        if self.__error is not None:
+            return
+        self.__error = error
+        if not closed:
+            log.warning("RPC connection failed: {0}".format(error))
+        pending, self.__pending = self.__pending, {}
+        for future in pending.values():
+            future.set_exception(error)
+
+    def call(self, payload, timeout=None):
+        """Sends 'payload' (a string) and returns the payload of the response.
+        Raises an RPCError if the server failed to handle the call, and a
+        WaitTimeout if no response is received after 'timeout' seconds (or
+        the client's default timeout), including the time spent waiting for
+        an outstanding call to complete."""
+        if timeout is None:
+            timeout = self.timeout
+        deadline = None if timeout is None else time.time() + timeout
+        self.__available.acquire(timeout)
+        try:
+            if self.__error is not None:
+                raise self.__error
+            identifier = next(self.__ids) & 0xffffffff
+            future = self.__pending[identifier] = Future()
+            self.__writer.send(identifier, _OK, payload)
+            if deadline is not None:
+                timeout = max(0, deadline - time.time())
+            try:
+                return future.result(timeout)
+            finally:
+                self.__pending.pop(identifier, None)
+        finally:
+            self.__available.release()
+
+    @property
+    def outstanding(self):
+        """The number of calls waiting for their response."""
+        return len(self.__pending)
+
+    def close(self):
+        """Stops the reader and writer threads and closes the connection.
+        Pending calls fail."""
+        self.__reader.stop()
+        self.__writer.stop()
+        self.__fail(socket.error(errno.ECONNABORTED, "Client closed"), True)
+        if self.connection.status != 2:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "<straight.networking.RPCClient({0}) object at {1}>".format(
+            self.connection.address, hex(id(self)))
+
+
+class RPCServer(Server):
+    """Serves the calls of RPCClients. Each call is passed to 'handle_call'
+    in a thread of its own, so that slow calls don't hold up the others
+    sent over the same connection; responses are sent as the calls complete.
+    Override 'handle_call', or pass a callable taking the payload and
+    returning the response payload as 'handler'. An exception raised by the
+    handler is sent to the caller, which raises an RPCError. At most
+    'max_concurrent' calls of a connection are handled at once. Idle and
+    long-lived connections are closed according to 'max_idle' and
+    'max_lifetime' (see `Server`)."""
+
+    def __init__(self, port, handler=None, timeout=None, interface="0.0.0.0",
+                 max_concurrent=1024, max_size=16 * 1024 * 1024,
+                 ssl_context=None, listener=None, max_idle=None,
+                 max_lifetime=None):
+        Server.__init__(self, port, timeout, interface, ssl_context, listener,
+                        max_idle, max_lifetime)
+        self.handler = handler
+        self.max_concurrent = max_concurrent
+        self.__codec = LengthPrefixed(4, max_size)
+
+    def handle_call(self, payload):
+        """Returns the response to a call. By default, calls the handler
+        given to the constructor."""
+        if self.handler is None:
+            raise StraightError("You must rewrite the 'handle_call' method "
+                                "or give a handler to the constructor")
+        return self.handler(payload)
+
+    def handle(self, connection):
+        errors = []
+        writer = _Writer(connection, errors.append, "rpc writer")
+        available = Semaphore(self.max_concurrent)
+
+        def call(identifier, payload):
+            try:
+                try:
+                    result = (_OK, self.handle_call(payload))
+                except Exception as e:
+                    log.debug("RPC call failed", exc_info=True)
+                    result = (_ERROR, "{0}: {1}".format(
+                        type(e).__name__, e).encode("utf-8"))
+                writer.send(identifier, *result)
+            finally:
+                available.release()
+
+        try:
+            while not errors:
+                frame = connection.read_frame(self.__codec)
+                if frame is None:
+                    break
+                identifier, _ = _ID.unpack_from(frame)
+                available.acquire()
+                Thread(call, args=(identifier, bytes(frame[_ID.size:]))) \
+                    .start()
+            else:
+                raise errors[0]
+            # the client may have half closed its end and still wait for the
+            # responses to its last calls
+            for _ in range(self.max_concurrent):
+                available.acquire()
+            writer.drain()
+        finally:
+            writer.stop()
@@ -13,18 +13,28 @@ You should have received a copy of the GNU Lesser General Public License along
 with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import
 
-from straight.threading import Thread
+from straight.threading import Thread, Event, WaitTimeout, stats
 from straight.errors import StraightError
 from straight.ioloop import IOLoop
-from .connection import BaseConnection
+from .connection import BaseConnection, unix_address
+from .client import Connection
+from .metrics import ConnectionMetrics, ServerMetrics
+from .reaper import Reaper
 
 import multiprocessing
+import greenlet
 import logging
 import socket
+import errno
+import stat
+import time
+import os
 log = logging.getLogger("straight.network")
 
 class Server(Thread):
-    def __init__(self, port, timeout=None, interface="0.0.0.0"):
+    def __init__(self, port, timeout=None, interface="0.0.0.0",
+                 ssl_context=None, listener=None, max_idle=None,
+                 max_lifetime=None):
         """Creates a server listening for connections on the specified port.
         Whenever a connection is established, the 'handle' method will be
         called with a single argument, the client Socket of the newly created
@@ -37,24 +47,73 @@ class Server(Thread):
         the individual processes will receive connections in a round-robin
         fashion. If the server is registered after the run() method, it will be
         local to the current worker; all connections will be handled by this
-        instance."""
+        instance.
+
+        If 'port' is a string rather than a number, the server listens on a
+        unix domain socket at that path instead ('interface' is ignored), which
+        avoids the TCP stack for clients on the same host. A path starting
+        with "@" (or a NUL character) names a socket in the Linux abstract
+        namespace, which has no file and disappears with the server.
+
+        If an 'ssl_context' (an ssl.SSLContext, see
+        `straight.networking.tls.server_context()`) is given, connections are
+        encrypted with TLS: the handshake is done by the thread handling the
+        connection, before 'handle' is called.
+
+        If a 'listener' is given, either a listening socket or its file
+        descriptor (e.g. inherited from the parent process, or received with
+        `take_over()`), the server accepts connections from it instead of
+        binding a new socket; 'port' and 'interface' are then ignored. This
+        allows restarting a server without ever refusing connections.
+
+        Connections on which nothing is read or written for 'max_idle'
+        seconds, or which stay open for more than 'max_lifetime' seconds, are
+        closed and their threads stopped. Unlike 'timeout', this doesn't
+        involve a timer per connection (see `Reaper`), so it's the cheap way
+        to get rid of clients which connect and never send anything."""
         Thread.__init__(self)
         self.__timeout = timeout
+        self.__ssl_context = ssl_context
         self.__lock = multiprocessing.Lock()
+        self.__metrics = ServerMetrics()
+        self.__active = {}  # connection -> thread handling it
+        self.__idle = set()  # connections waiting for their next request
+        self.__drained = None  # Event set once draining completes
+        self.__paused = None  # Event set once accepting resumes
+        self.__reaper = Reaper(max_idle, max_lifetime)
+        self.draining = False
+
+        if listener is not None:
+            descriptor = _listening_socket(listener)
+            descriptor.setblocking(False)
+            self.__connection = BaseConnection(descriptor.getsockname(),
+                                               descriptor, None)
+            log.debug("Socket {0} is listening (taken over)".format(
+                descriptor.fileno()))
+            return
 
         # TODO: add support for ipv6 and async getaddrinfo
         # setup socket and options
-        address = (interface, port)
-        descriptor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        descriptor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if isinstance(port, int):
+            address = (interface, port)
+            descriptor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            descriptor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        else:
+            # a unix domain socket; a socket file left over by a previous run
+            # would make bind fail
+            address = unix_address(port)
+            descriptor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            if address[:1] != "\0" and os.path.exists(address) and \
+                    stat.S_ISSOCK(os.stat(address).st_mode):
+                os.unlink(address)
         descriptor.bind(address)
         descriptor.listen(socket.SOMAXCONN)
         descriptor.setblocking(False)
 
         # register the socket with the Straight IOLoop
         self.__connection = BaseConnection(address, descriptor, None)
-        log.debug("Socket " + descriptor.fileno() + " is listening on " +
-                  interface + ":" + port)
+        log.debug("Socket {0} is listening on {1}".format(
+            descriptor.fileno(), address))
 
     def handle(self, connection):
         raise StraightError("You must rewrite the 'handle' method to accept "
@@ -63,8 +122,138 @@ class Server(Thread):
     def __handle(self, connection):
         """Calls ``handle``, but cleans the client connection upon termination.
         """
-        with connection:
-            self.handle(connection)
+        metrics = self.__metrics
+        metrics.active += 1
+        self.__active[connection] = Thread.current()
+        self.__reaper.add(connection, self.__active[connection])
+        start = time.time()
+        try:
+            with connection:
+                if self.__ssl_context is not None:
+                    connection.start_tls(self.__ssl_context, server_side=True)
+                self.handle(connection)
+        except greenlet.GreenletExit:
+            """Idle connection closed by `drain()`, or expired."""
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.active -= 1
+            metrics.handle_time.record(time.time() - start)
+            del self.__active[connection]
+            self.__reaper.remove(connection)
+            self.__idle.discard(connection)
+            if not self.__active and self.__drained is not None:
+                self.__drained.set()
+
+    def idle(self, connection, idle=True):
+        """Called by 'handle' implementations serving persistent connections,
+        to mark 'connection' as idle (waiting for the next request) or busy
+        again. Idle connections are closed as soon as the server is drained,
+        while busy ones are given time to complete. Returns False if the
+        server is draining, in which case the caller should close the
+        connection (return from 'handle') rather than wait for another
+        request."""
+        if idle:
+            if self.draining:
+                return False
+            self.__idle.add(connection)
+        else:
+            self.__idle.discard(connection)
+        return True
+
+    def fileno(self):
+        """Returns the file descriptor of the listening socket, e.g. to pass
+        it to a new process (see `listener`)."""
+        return self.__connection.fileno()
+
+    def drain(self, timeout=None):
+        """Shuts the server down gracefully: stops accepting connections,
+        closes the idle ones (see 'idle') and waits until all the calls to
+        'handle' in progress complete, for at most 'timeout' seconds. Returns
+        True if they all completed, False otherwise (they are left running).
+        """
+        if not self.draining:
+            self.draining = True
+            self.stop()
+        for connection in list(self.__idle):
+            self.__active[connection].stop()
+        if not self.__active:
+            return True
+        if self.__drained is None:
+            self.__drained = Event()
+        try:
+            self.__drained.wait(timeout)
+        except WaitTimeout:
+            return False
+        return True
+
+    def handover(self, path, timeout=None):
+        """Hands the listening socket over to a new process, then drains this
+        server (see 'drain'), so that a new version of a service can be
+        deployed without refusing any connection. Waits for the new process
+        to call `take_over(path)`, sends it the socket's file descriptor over
+        a unix domain socket at 'path', and drains once the new process
+        confirms it owns the socket. This server stops accepting connections
+        before sending the socket, so pending and new connections are all
+        accepted by the new process; if the socket can't be handed over, it
+        accepts them again. Returns the result of 'drain'."""
+        address = unix_address(path)
+        descriptor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if address[:1] != "\0" and os.path.exists(address) and \
+                stat.S_ISSOCK(os.stat(address).st_mode):
+            os.unlink(address)
+        descriptor.bind(address)
+        descriptor.listen(1)
+        descriptor.setblocking(False)
+        try:
+            with BaseConnection(address, descriptor, None) as handover:
+                while True:
+                    handover.wait_readable(None)
+                    try:
+                        client, _ = descriptor.accept()
+                        break
+                    except socket.error as e:
+                        if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                            raise
+                with BaseConnection(address, client, None) as connection:
+                    self.__handover(connection)
+        finally:
+            if address[:1] != "\0":
+                os.unlink(address)
+        log.info("Listening socket handed over through {0}".format(path))
+        return self.drain(timeout)
+
+    def __handover(self, connection):
+        """Sends the listening socket over 'connection' and waits for the new
+        process to confirm it owns it. Connections are not accepted meanwhile:
+        one accepted now would be closed by drain() before its first request
+        arrives."""
+        paused = self.__paused = Event()
+        try:
+            fd = os.dup(self.fileno())
+            try:
+                connection.send_fds(b"L", [fd])
+            finally:
+                os.close(fd)
+            if connection.readall(1) != b"K":
+                raise socket.error(errno.ECONNABORTED, "The new process did "
+                                   "not take over the socket")
+        except BaseException:
+            # this process keeps the socket
+            self.__paused = None
+            paused.set()
+            raise
+
+    def metrics(self):
+        """Returns a snapshot of the I/O counters of all the connections
+        accepted by this server, along with the number of accepted and active
+        connections and a histogram of `handle` durations, as a dictionary.
+        Counters are kept up to date as the I/O happens, so taking a snapshot
+        is cheap regardless of the number of connections."""
+        result = self.__metrics.snapshot()
+        result["reaped"] = self.__reaper.reaped
+        return result
 
     def run(self):
         """Runs the server, listening for connections on its assigned socket.
@@ -72,18 +261,32 @@ class Server(Thread):
         with self.__connection:
             while True:
                 try:
+                    if self.__paused is not None:
+                        # the socket is being handed over
+                        self.__paused.wait()
                     # a new connection is available when the server socket is
                     # ready for reading
+                    if stats.enabled:
+                        stats.waiting(stats.IO, "accept")
                     IOLoop.thread.switch(IOLoop.READ_REQUEST,
                                          self.__connection._BaseConnection__id,
                                          self.__timeout)
+                    if self.__paused is not None:
+                        continue
 
                     if self.__lock.acquire(False):
                         # load balance: only this worker will accept this
                         # connection
                         client, address = self.__connection._BaseConnection__socket.accept()
-                        Thread(self.__handle, BaseConnection(address, client, self.__timeout))
+                        self.__metrics.accepted += 1
+                        connection = BaseConnection(
+                            address, client, self.__timeout,
+                            ConnectionMetrics(self.__metrics))
+                        Thread(self.__handle, args=(connection,)).start()
                         self.__lock.release()
+                except greenlet.GreenletExit:
+                    """Stopped by `stop()`, `drain()` or `handover()`."""
+                    return
                 except Exception:
                     # TODO: check what happens to the server socket when the
                     # network is shut down
@@ -95,3 +298,40 @@ class Server(Thread):
         connections (and the threads handling them) are not closed, but no
         further calls to 'handle' will be made."""
         Thread.stop(self)
+
+
+def _listening_socket(listener):
+    if not isinstance(listener, int):
+        return listener
+    try:
+        return socket.socket(fileno=listener)
+    except TypeError:
+        # python 2: the family must be given; the address the socket is bound
+        # to tells it, as it's decoded according to the actual family
+        probe = socket.fromfd(listener, socket.AF_INET, socket.SOCK_STREAM)
+        address = probe.getsockname()
+        probe.close()
+        if not isinstance(address, tuple):
+            family = socket.AF_UNIX
+        elif len(address) == 4:
+            family = socket.AF_INET6
+        else:
+            family = socket.AF_INET
+        descriptor = socket.fromfd(listener, family, socket.SOCK_STREAM)
+        os.close(listener)
+        return descriptor
+
+
+def take_over(path, timeout=None):
+    """Receives the listening socket of a server of another process, which is
+    handing it over with `Server.handover(path)`, and returns it, to be given
+    to a new Server as its 'listener'. Connections keep being queued on the
+    socket in the meantime, so none is refused."""
+    with Connection(path, timeout=timeout) as connection:
+        data, fds = connection.recv_fds(1, 1)
+        if data != b"L" or len(fds) != 1:
+            for fd in fds:
+                os.close(fd)
+            raise socket.error(errno.EPROTO, "No socket was handed over")
+        connection.writeall(b"K")
+    return _listening_socket(fds[0])
@@ -0,0 +1,108 @@
+# coding utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import collections
+import ssl
+
+__all__ = ["SessionCache", "server_context", "client_context"]
+
+
+class TLSState(object):
+    """The TLS layer of a connection: an SSLObject reading the encrypted data
+    received from the socket from 'incoming' and producing the encrypted data
+    to send in 'outgoing'. Moving data between the memory buffers and the
+    socket is left to the connection, so that only the calling thread waits
+    for the socket, never the loop."""
+    __slots__ = ("object", "incoming", "outgoing")
+
+    def __init__(self, context, server_side, server_hostname, session):
+        self.incoming = ssl.MemoryBIO()
+        self.outgoing = ssl.MemoryBIO()
+        self.object = context.wrap_bio(self.incoming, self.outgoing,
+                                       server_side, server_hostname,
+                                       session=session)
+
+
+class SessionCache(object):
+    """Keeps the last TLS session negotiated with each server, so that new
+    connections to the same server resume it instead of going through a full
+    handshake, which saves a round trip and the public key operations. At
+    most 'size' sessions are kept; the least recently used ones are dropped
+    first. Sessions are keyed by any hashable value, typically the (host,
+    port) pair, and must only be reused with the SSLContext that created
+    them."""
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.__sessions = collections.OrderedDict()
+
+    def get(self, key):
+        """Returns the session cached for 'key', or None."""
+        session = self.__sessions.pop(key, None)
+        if session is not None:
+            self.__sessions[key] = session
+        return session
+
+    def put(self, key, session):
+        """Caches a session (e.g. `connection.tls.session`) for 'key'. Sessions
+        that can't be resumed are ignored."""
+        if session is None or not session.has_ticket and not session.id:
+            return
+        self.__sessions.pop(key, None)
+        self.__sessions[key] = session
+        while len(self.__sessions) > self.size:
+            self.__sessions.popitem(last=False)
+
+    def discard(self, key):
+        """Forgets the session cached for 'key', e.g. after a failure."""
+        self.__sessions.pop(key, None)
+
+    def __len__(self):
+        return len(self.__sessions)
+
+    def __repr__(self):
+        return "<straight.networking.tls.SessionCache({0}) object at " \
+               "{1}>".format(len(self), hex(id(self)))
+
+
+def server_context(certfile, keyfile=None, password=None, tickets=2):
+    """Returns an SSLContext for servers, loading the certificate chain from
+    'certfile' and the private key from 'keyfile' (or 'certfile').
+
+    Session resumption is enabled both through OpenSSL's session cache and
+    through session tickets ('tickets' are sent to the client after each TLS
+    1.3 handshake). Tickets are encrypted with keys generated when the
+    context is created, so create it before the worker processes are started:
+    they then share the keys and any worker can resume a session negotiated by
+    another one."""
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(certfile, keyfile, password)
+    if hasattr(context, "num_tickets"):
+        # Python 3.8+
+        context.num_tickets = tickets
+    return context
+
+
+def client_context(cafile=None, verify=True):
+    """Returns an SSLContext for clients, verifying the server certificates
+    against the system's trusted authorities (or 'cafile'), unless 'verify'
+    is False."""
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH,
+                                         cafile=cafile)
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
@@ -0,0 +1,204 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import Semaphore, WaitTimeout
+from straight.networking.connection import BaseConnection
+from straight.networking import framing
+from straight.errors import ConnectionTimeout
+
+import multiprocessing
+import logging
+import pickle
+import socket
+import time
+
+log = logging.getLogger("straight.process")
+
+# calls and results are pickled into length prefixed frames
+_codec = framing.LengthPrefixed(max_size=2 ** 32 - 1)
+
+try:
+    # spawned workers start from a fresh interpreter, so they don't inherit
+    # the descriptors of the parent (the loop, listening sockets, the pipes
+    # of the other workers...), which would keep them open after the parent
+    # closes them
+    _context = multiprocessing.get_context("spawn")
+except AttributeError:
+    # python 2 only forks
+    _context = multiprocessing
+
+
+def _serve(descriptor):
+    """Main loop of the worker processes: receives pickled calls from the
+    socket, runs them and sends back pickled results, until the parent closes
+    its end."""
+    frames = framing.FrameReader(_codec)
+    while True:
+        frame = frames.read(lambda view, timeout: descriptor.recv_into(view),
+                            None)
+        if frame is None:
+            return
+
+        target, args, kwargs = pickle.loads(bytes(frame))
+        try:
+            result = (True, target(*args, **kwargs))
+        except Exception as e:
+            result = (False, e)
+        try:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            # the result (or the exception) can not be pickled
+            data = pickle.dumps((False, RuntimeError(
+                "Unable to send result of {0}: {1}".format(
+                    repr(target), repr(e)))), pickle.HIGHEST_PROTOCOL)
+        descriptor.sendall(b"".join(_codec.encode(data)))
+
+
+class _Worker(object):
+    """A worker process and the parent end of the socket connected to it.
+    The parent end is a straight connection, so that sending a call and
+    waiting for its result only blocks the calling straight thread."""
+    def __init__(self):
+        descriptor, child = socket.socketpair()
+        self.__process = _context.Process(target=_serve, args=(child,))
+        self.__process.daemon = True
+        self.__process.start()
+        child.close()
+
+        self.__connection = BaseConnection(None, descriptor, None)
+        self.tasks = 0
+        self.busy = False
+
+    def call(self, target, args, kwargs, timeout):
+        data = pickle.dumps((target, args, kwargs), pickle.HIGHEST_PROTOCOL)
+        deadline = None if timeout is None else time.time() + timeout
+        self.tasks += 1
+        self.busy = True
+        try:
+            self.__connection.write_frame(data, _codec, timeout)
+            if deadline is not None:
+                timeout = max(0, deadline - time.time())
+            frame = self.__connection.read_frame(_codec, timeout)
+        except ConnectionTimeout:
+            raise WaitTimeout()
+        if frame is None:
+            raise RuntimeError("Worker process {0} exited while running "
+                               "{1}".format(self.__process.pid, repr(target)))
+        success, value = pickle.loads(bytes(frame))
+        self.busy = False
+        if not success:
+            raise value
+        return value
+
+    @property
+    def alive(self):
+        return self.__process.is_alive()
+
+    def close(self):
+        """Asks the worker process to exit once idle, by closing the socket
+        (it exits when it reads the end of the stream)."""
+        self.__release()
+
+    def kill(self):
+        """Terminates the worker process immediately."""
+        self.__process.terminate()
+        self.__release()
+
+    def __release(self):
+        if self.__connection.status != 2:
+            self.__connection.close()
+
+
+class ProcessPool(object):
+    """Runs CPU bound calls in a pool of worker processes, to make use of more
+    than one core (a thread pool does not help because of the global
+    interpreter lock). Arguments and results are pickled and sent over
+    sockets, as length prefixed frames, with the non blocking I/O of straight
+    connections; while waiting, only the calling thread is blocked.
+
+    At most `size` calls run at the same time; further calls wait for a worker
+    to become available. If `max_tasks` is set, each worker process is
+    replaced after running that many calls, which bounds the damage of leaks
+    in the called code. Workers are started on demand."""
+
+    def __init__(self, size=None, max_tasks=None):
+        if size is None:
+            size = multiprocessing.cpu_count()
+        self.size = size
+        self.max_tasks = max_tasks
+        self.__available = Semaphore(size)
+        self.__idle = []
+
+    def run(self, target, *args, **kwargs):
+        """Calls `target(*args, **kwargs)` in a worker process and returns its
+        result, or raises the exception it raised. `target`, the arguments and
+        the result must be picklable.
+
+        An optional `timeout` keyword argument may be given, in seconds; if the
+        call does not complete in time, the worker process running it is killed
+        and a WaitTimeout is raised."""
+        timeout = kwargs.pop("timeout", None)
+        self.__available.acquire()
+        try:
+            worker = self.__idle.pop() if self.__idle else _Worker()
+            try:
+                result = worker.call(target, args, kwargs, timeout)
+            except WaitTimeout:
+                log.warning("Killing worker process stuck in "
+                            "{0}".format(repr(target)))
+                worker.kill()
+                raise
+            except BaseException:
+                # a worker that did not deliver its result (e.g. the calling
+                # thread was stopped) can not be reused
+                if worker.busy or not worker.alive:
+                    worker.kill()
+                else:
+                    self.__recycle(worker)
+                raise
+            self.__recycle(worker)
+            return result
+        finally:
+            self.__available.release()
+
+    def __recycle(self, worker):
+        if self.max_tasks and worker.tasks >= self.max_tasks:
+            worker.close()
+        else:
+            self.__idle.append(worker)
+
+    def close(self):
+        """Stops all the idle worker processes."""
+        idle, self.__idle = self.__idle, []
+        for worker in idle:
+            worker.close()
+
+    def __repr__(self):
+        return "<straight.ProcessPool({0}) object at {1}>".format(
+            self.size, hex(id(self)))
+
+
+default = None
+
+
+def run_in_process(target, *args, **kwargs):
+    """Calls `target(*args, **kwargs)` in a process of the default process
+    pool and blocks the calling straight thread until it returns. See
+    `ProcessPool.run()`."""
+    global default
+    if default is None:
+        default = ProcessPool()
+    return default.run(target, *args, **kwargs)
@@ -0,0 +1,127 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading.thread import Thread
+
+import collections
+import logging
+import signal
+import io
+
+log = logging.getLogger("straight.profiler")
+
+
+class Profiler(object):
+    """A sampling profiler that attributes each sample to the straight thread
+    that was running when it was taken, unlike cProfile which attributes all
+    the time to the loop and to greenlet switches.
+
+    Samples are taken every `interval` seconds of CPU time by a profiling
+    timer signal (so idle processes are not sampled), and aggregated by thread
+    name and stack. The result is available in the collapsed stack format
+    used by flame graph tools (e.g. flamegraph.pl or speedscope), one line per
+    distinct stack:
+
+        thread name;outermost function;...;innermost function count
+
+    Only one profiler may run at a time, from the main thread (which must be
+    the one running the loop). Profiling can be started and stopped at any
+    time, e.g. from a signal handler installed with `toggle_on_signal()`."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.__samples = collections.defaultdict(int)
+        self.__previous = None
+        self.running = False
+
+    def start(self):
+        """Starts taking samples. Samples taken by previous runs are kept."""
+        if self.running:
+            return
+        self.__previous = signal.signal(signal.SIGPROF, self.__sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+
+    def stop(self):
+        """Stops taking samples."""
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self.__previous or signal.SIG_DFL)
+        self.__previous = None
+        self.running = False
+
+    def clear(self):
+        """Discards all the samples taken so far."""
+        self.__samples.clear()
+
+    def __sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append("{0} ({1}:{2})".format(
+                code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+
+        thread = Thread.current()
+        stack.append(thread.name if thread is not None else "main thread")
+        stack.reverse()
+        self.__samples[";".join(stack)] += 1
+
+    def collapsed(self):
+        """Returns the samples taken so far, in the collapsed stack format."""
+        output = io.StringIO()
+        for stack, count in sorted(self.__samples.items()):
+            output.write("{0} {1}\n".format(stack, count))
+        return output.getvalue()
+
+    def dump(self, path):
+        """Writes the samples taken so far to a file, in the collapsed stack
+        format."""
+        with io.open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __repr__(self):
+        return "<straight.profiler.Profiler object at {0}>".format(
+            hex(id(self)))
+
+
+def toggle_on_signal(path, signum=signal.SIGUSR2, interval=0.005):
+    """Installs a handler for `signum` that starts a profiler the first time
+    the signal is received and stops it the next time, writing the samples to
+    `path`, and so on. This allows profiling a running process without
+    restarting it (e.g. `kill -USR2 <pid>`). Returns the profiler."""
+    profiler = Profiler(interval)
+
+    def toggle(signum, frame):
+        if profiler.running:
+            profiler.stop()
+            profiler.dump(path)
+            profiler.clear()
+            log.info("Profile written to {0}".format(path))
+        else:
+            profiler.start()
+            log.info("Profiling started")
+
+    signal.signal(signum, toggle)
+    return profiler
@@ -15,7 +15,8 @@ with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
 __all__ = ["WaitTimeout", "Thread", "Event", "Lock", "RLock", "Condition",
-           "Semaphore", "BoundedSemaphore"]
+           "Semaphore", "BoundedSemaphore", "wait_any", "wait_all",
+           "TaskGroup", "Future", "Executor", "run_in_executor"]
 
 
 class WaitTimeout(Exception):
@@ -24,8 +25,12 @@ class WaitTimeout(Exception):
 
 from straight.threading.thread import Thread
 from straight.threading.event import Event
+from straight.threading.future import Future
 from straight.threading.lock import Lock
 from straight.threading.rlock import RLock
 from straight.threading.condition import Condition
 from straight.threading.semaphore import Semaphore
 from straight.threading.bounded_semaphore import BoundedSemaphore
+from straight.threading.wait import wait_any, wait_all
+from straight.threading.task_group import TaskGroup
+from straight.threading.executor import Executor, run_in_executor
@@ -22,6 +22,8 @@ class BoundedSemaphore(Semaphore):
     its initial value. If it does, ValueError is raised. In most situations
     semaphores are used to guard resources with limited capacity. If the
     semaphore is released too many times it’s a sign of a bug."""
+    __slots__ = ("__max",)
+
     def __init__(self, value=1):
         Semaphore.__init__(self, value)
         self.__max = value
@@ -49,6 +49,7 @@ class Condition(object):
     desired state, while threads that modify the state call `notify()` or
     `notifyAll()` when they change the state in such a way that it could
     possibly be a desired state for one of the waiters."""
+    __slots__ = ("__lock", "__event", "__weakref__")
 
     def __init__(self, lock=None):
         """If the lock argument is given and not None, it must be a RLock
@@ -60,7 +61,7 @@ class Condition(object):
         self.__lock = lock
         self.__event = Event()
 
-    def acquire(self, timeout):
+    def acquire(self, timeout=None):
         """Blocks until the thread owning the underlying lock releases it, or
         'timeout' seconds have passed. If 'timeout' is None, it will
         potentially wait forever. If the lock is not acquired by the current
@@ -108,7 +109,7 @@ class Condition(object):
                       "underlying lock.".format(repr(self))
 
         try:
-            self.__event.wait()
+            self.__event.wait(timeout)
         finally:
             # reacquire the lock
             while count:
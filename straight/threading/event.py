@@ -14,7 +14,7 @@ You should have received a copy of the GNU Lesser General Public License along
 with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
-from straight.threading import WaitTimeout
+from straight.threading import WaitTimeout, stats
 from straight import ioloop
 
 import greenlet
@@ -28,11 +28,14 @@ class Event(object):
     An event object manages an internal flag that can be set to true with the
     `set()` method and reset to false with the `clear()` method. The `wait()`
     method blocks until the flag is true."""
+    __slots__ = ("__set", "__waiters", "__weakref__")
 
     def __init__(self):
         """The internal flag is initially false."""
         self.__set = False
-        self.__waiters = {}
+        # most events are never waited for, so the table of waiting threads
+        # is only created by the first call to `wait()`
+        self.__waiters = None
 
     def isSet(self):
         """Return true if and only if the internal flag is true."""
@@ -45,6 +48,8 @@ class Event(object):
         will not block at all."""
         # operation is atomic (no pauses)
         self.__set = True
+        if not self.__waiters:
+            return
         for thread in self.__waiters:
             timer = self.__waiters[thread]
             if timer:
@@ -67,6 +72,8 @@ class Event(object):
         `Condition` objects, but it may be used whenever the `Lock` overhead
         associated with a condition is not needed. If the event is already set
         when this method is called, it will do nothing."""
+        if not self.__waiters:
+            return
         try:
             thread, timer = self.__waiters.popitem()
             if timer:
@@ -101,11 +108,15 @@ class Event(object):
 
             timer = pyuv.Timer(ioloop.default)
             timer.thread = current
-            timer.start(wakeup, timeout)
+            timer.start(wakeup, timeout, 0)
         else:
             timer = None
 
+        if self.__waiters is None:
+            self.__waiters = {}
         self.__waiters[current] = timer
+        if stats.enabled:
+            stats.waiting(stats.SYNC, "Event.wait")
         ioloop.pause(current)
 
     def __repr__(self):
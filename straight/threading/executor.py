@@ -0,0 +1,147 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading.future import Future
+from straight import ioloop
+
+import collections
+import multiprocessing
+import threading
+import pyuv
+
+try:
+    import queue
+except ImportError:
+    # python 2
+    import Queue as queue
+
+
+class Executor(object):
+    """Runs blocking calls (C extensions, file I/O, legacy client libraries)
+    on a bounded pool of operating system threads, so that they do not stall
+    the loop and all the other straight threads along with it.
+
+    Calls are submitted from straight threads with `submit()`, which returns
+    a `Future`. The worker threads never touch the loop or the futures
+    directly: completed calls are queued and the loop is woken up through an
+    async handle, which completes the futures from the loop's own thread.
+
+    Worker threads are started on demand, up to `size` of them. They are
+    daemon threads, so they never prevent the process from exiting."""
+
+    def __init__(self, size=None):
+        if size is None:
+            size = min(32, multiprocessing.cpu_count() + 4)
+        if size < 1:
+            raise ValueError("The executor needs at least one thread")
+        self.size = size
+        self.__tasks = queue.Queue()
+        self.__completed = collections.deque()
+        self.__workers = []
+        self.__idle = 0
+        self.__lock = threading.Lock()
+        self.__async = None
+        self.__running = 0  # calls submitted and not completed yet
+
+    def submit(self, target, *args, **kwargs):
+        """Schedules `target(*args, **kwargs)` to run in a worker thread and
+        returns a `Future` holding its result. Must be called from the thread
+        running the loop."""
+        if self.__async is None:
+            self.__async = pyuv.Async(ioloop.default, self.__complete)
+            self.__async.ref = False
+
+        # the handle keeps the loop running while calls are in flight (their
+        # threads are waiting for them), but not once they have all completed
+        self.__running += 1
+        if self.__running == 1:
+            self.__async.ref = True
+        future = Future()
+        with self.__lock:
+            # only start a new worker if the idle ones are already claimed by
+            # the calls that are waiting in the queue
+            start = self.__idle <= self.__tasks.qsize() and \
+                len(self.__workers) < self.size
+        if start:
+            worker = threading.Thread(target=self.__work,
+                                      name="straight executor")
+            worker.daemon = True
+            self.__workers.append(worker)
+            worker.start()
+        self.__tasks.put((future, target, args, kwargs))
+        return future
+
+    def __work(self):
+        """Runs in the worker threads. Must never touch the loop, except for
+        the async handle, which is thread safe."""
+        while True:
+            with self.__lock:
+                self.__idle += 1
+            task = self.__tasks.get()
+            with self.__lock:
+                self.__idle -= 1
+            if task is None:
+                return
+
+            future, target, args, kwargs = task
+            try:
+                self.__completed.append((future, True,
+                                         target(*args, **kwargs)))
+            except BaseException as e:
+                self.__completed.append((future, False, e))
+            self.__async.send()
+
+    def __complete(self, handle):
+        """Runs on the loop's thread whenever a worker signals the async
+        handle. Since several signals may be coalesced into one callback, all
+        the completed calls are processed."""
+        while self.__completed:
+            future, success, value = self.__completed.popleft()
+            self.__running -= 1
+            if self.__running == 0:
+                self.__async.ref = False
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def shutdown(self):
+        """Stops the worker threads once they finish the calls that were
+        already submitted."""
+        workers, self.__workers = self.__workers, []
+        for _ in workers:
+            self.__tasks.put(None)
+
+    def __repr__(self):
+        return "<straight.threading.Executor({0}) object at {1}>".format(
+            self.size, hex(id(self)))
+
+
+default = Executor()
+
+
+def run_in_executor(target, *args, **kwargs):
+    """Calls `target(*args, **kwargs)` in an operating system thread of the
+    default executor and blocks the calling straight thread (and only it)
+    until the call returns. Returns the value returned by `target`, or raises
+    the exception it raised.
+
+    An optional `timeout` keyword argument may be given, in seconds; if the
+    call does not complete in time, a WaitTimeout is raised. Note that the
+    call itself can not be interrupted: it will keep running in its worker
+    thread, and its result will be discarded."""
+    timeout = kwargs.pop("timeout", None)
+    return default.submit(target, *args, **kwargs).result(timeout)
@@ -0,0 +1,128 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading.event import Event
+from straight.threading import WaitTimeout
+
+import logging
+
+
+class Future(object):
+    """Holds the result of an operation that may not have completed yet,
+    usually the return value of a thread started with `Thread.spawn()`.
+
+    Other threads may wait for the result with `result()` (which also raises
+    the exception the operation failed with, if any), or inspect the failure
+    with `exception()`. Callbacks registered with `add_done_callback()` are
+    called as soon as the operation completes."""
+    __slots__ = ("__done", "__result", "__exception", "__callbacks",
+                 "__weakref__")
+
+    def __init__(self):
+        # for performance reasons, the event is only created the first time a
+        # thread waits for this future to complete; until then, the flag is
+        # either False (pending) or True (completed)
+        self.__done = False
+        self.__result = None
+        self.__exception = None
+        self.__callbacks = None
+
+    def done(self):
+        """Return true if and only if the operation has completed, either
+        normally or by raising an exception."""
+        return self.__done is True
+
+    def set_result(self, result):
+        """Marks the operation as completed and stores its result. All threads
+        waiting for it are awakened and the callbacks are called."""
+        self.__result = result
+        self.__complete()
+
+    def set_exception(self, exception):
+        """Marks the operation as failed with `exception`. All threads waiting
+        for it are awakened and the callbacks are called."""
+        self.__exception = exception
+        self.__complete()
+
+    def __complete(self):
+        if self.__done is True:
+            raise RuntimeError("{0} has already completed".format(repr(self)))
+        if isinstance(self.__done, Event):
+            self.__done.set()
+        self.__done = True
+
+        callbacks, self.__callbacks = self.__callbacks, None
+        if callbacks:
+            for callback in callbacks:
+                self.__call(callback)
+
+    def __call(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            logging.exception("Unhandled exception in callback of "
+                              "{0}".format(repr(self)))
+
+    def __wait(self, timeout):
+        if self.__done is True:
+            return
+        if timeout is not None and timeout <= 0:
+            # `Event.wait()` would take 0 to mean no timeout at all
+            raise WaitTimeout
+        if self.__done is False:
+            self.__done = Event()
+        self.__done.wait(timeout)
+
+    def result(self, timeout=None):
+        """Wait until the operation completes and return its result. If the
+        operation raised an exception, the same exception is raised here. If
+        the operation does not complete in `timeout` seconds, a WaitTimeout is
+        raised instead. When the timeout argument is not present or None, the
+        call will block until the operation completes."""
+        self.__wait(timeout)
+        if self.__exception is not None:
+            raise self.__exception
+        return self.__result
+
+    def exception(self, timeout=None):
+        """Wait until the operation completes and return the exception it
+        raised, or None if it completed normally. If the operation does not
+        complete in `timeout` seconds, a WaitTimeout is raised."""
+        self.__wait(timeout)
+        return self.__exception
+
+    def add_done_callback(self, callback):
+        """Attaches a callable that will be called with this future as its
+        only argument once the operation completes. If the operation already
+        completed, the callable is called immediately. Callbacks are called in
+        the order in which they were added; exceptions raised by callbacks are
+        logged and ignored."""
+        if self.__done is True:
+            self.__call(callback)
+        elif self.__callbacks is None:
+            self.__callbacks = [callback]
+        else:
+            self.__callbacks.append(callback)
+
+    def __repr__(self):
+        if self.__done is not True:
+            state = "pending"
+        elif self.__exception is not None:
+            state = "failed"
+        else:
+            state = "finished"
+        return "<straight.threading.Future({0}) object at {1}>".format(
+            state, hex(id(self)))
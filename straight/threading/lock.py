@@ -15,6 +15,9 @@ with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
 from straight.threading.event import Event
+from straight.threading import WaitTimeout
+
+import time
 
 
 class Lock(object):
@@ -36,7 +39,10 @@ class Lock(object):
     defined, and may vary across implementations.
 
     All methods are executed atomically."""
+    __slots__ = ("__locked", "__unlocked", "__weakref__")
+
     def __init__(self):
+        self.__locked = False
         self.__unlocked = Event()
 
     def acquire(self, timeout=None):
@@ -44,7 +50,24 @@ class Lock(object):
         `timeout` seconds have passed. If `timeout` is None, it will
         potentially wait forever. If the lock is not acquired by the current
         thread at the end of the call, a `WaitTimeout` is raised."""
-        self.__unlocked.wait(timeout)
+        if timeout is not None:
+            deadline = time.time() + timeout
+        try:
+            # another thread may take the lock between the release that woke
+            # this one up and the time it runs
+            while self.__locked:
+                if timeout is not None:
+                    timeout = deadline - time.time()
+                    if timeout <= 0:
+                        raise WaitTimeout()
+                self.__unlocked.wait(timeout)
+        except BaseException:
+            # pass on the wake up this thread may have received, so that the
+            # other waiters don't keep waiting for a lock nobody holds
+            if not self.__locked:
+                self.__unlocked.set_once()
+            raise
+        self.__locked = True
 
     def release(self):
         """When the lock is locked, reset it to unlocked, and return. If any
@@ -52,6 +75,7 @@ class Lock(object):
         allow exactly one of them to proceed.
 
         There is no return value."""
+        self.__locked = False
         self.__unlocked.set_once()
 
     def __enter__(self):
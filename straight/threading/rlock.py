@@ -31,6 +31,8 @@ class RLock(Lock):
     `release()` method. acquire()/release() call pairs may be nested; only the
     final release() (the release() of the outermost pair) resets the lock to
     unlocked and allows another thread blocked in acquire() to proceed."""
+    __slots__ = ("__owner", "__level")
+
     def __init__(self):
         Lock.__init__(self)
         self.__owner = None
@@ -46,9 +48,8 @@ class RLock(Lock):
         number of calls to 'release' before the lock is actually released."""
         current = greenlet.getcurrent()
         if self.__owner is not current:
-            if self.__owner is not None:
-                # wait for the owner to yield this lock
-                Lock.acquire(self, timeout)
+            # wait for the owner (if any) to yield this lock
+            Lock.acquire(self, timeout)
             # lock is no longer owned; claim ownership
             self.__owner = current
         # lock is owned; increase recursion level
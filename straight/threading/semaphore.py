@@ -15,6 +15,9 @@ with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
 from straight.threading.event import Event
+from straight.threading import WaitTimeout
+
+import time
 
 
 class Semaphore(object):
@@ -26,6 +29,7 @@ class Semaphore(object):
     `acquire()` call and incremented by each `release()` call. The counter can
     never go below zero; when `acquire()` finds that it is zero, it blocks,
     waiting until some other thread calls `release()`."""
+    __slots__ = ("__counter", "__event", "__weakref__")
 
     def __init__(self, value=1):
         """The optional argument gives the initial value for the internal
@@ -52,18 +56,26 @@ class Semaphore(object):
         the calling thread is willing to wait for the semaphore to become
         available. If the timeout is reached, a WaitError is raised in the
         calling thread. The default is `None`, meaning no timeout."""
-        if self.__counter == 0:
+        if timeout is not None:
+            deadline = time.time() + timeout
+        # another thread may take the semaphore between the release that woke
+        # this one up and the time it runs
+        while self.__counter == 0:
+            if timeout is not None:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    raise WaitTimeout()
             self.__event.wait(timeout)
 
         self.__counter -= 1
 
     def release(self):
         """Release a semaphore, incrementing the internal counter by one. When
-        it was zero on entry and another thread is waiting for it to become
-        larger than zero again, wake up that thread."""
-        if self.__counter == 0:
-            self.__event.set_once()
+        another thread is waiting for it to become larger than zero, wake up
+        that thread."""
         self.__counter += 1
+        # wake one waiter per release, even if an earlier one hasn't run yet
+        self.__event.set_once()
 
     def __enter__(self):
         self.acquire()
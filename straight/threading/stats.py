@@ -0,0 +1,178 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import greenlet
+import time
+
+__all__ = ["enable", "disable", "snapshot", "add_listener",
+           "remove_listener"]
+
+# wait kinds, reported by the code that parks a thread through `waiting()`
+IO = "io"
+SYNC = "sync"
+
+enabled = False  # checked by the wait points before calling `waiting()`
+
+_clock = getattr(time, "perf_counter", time.time)
+_previous = None  # tracer that was installed before ours, if any
+_listeners = []  # called on every switch while tracing
+_kind = None  # kind and reason of the wait the current thread is entering
+_reason = None
+
+
+class ThreadStats(object):
+    """Scheduler statistics of a single thread. All times are in seconds."""
+    __slots__ = ("switches", "run_time", "io_wait", "sync_wait", "last_wait",
+                 "_resumed", "_parked", "_kind")
+
+    def __init__(self):
+        self.switches = 0  # number of times the thread was resumed
+        self.run_time = 0.0  # time spent running
+        self.io_wait = 0.0  # time spent waiting for sockets
+        self.sync_wait = 0.0  # time spent waiting for events, locks, etc.
+        self.last_wait = None  # reason of the last wait
+        self._resumed = None
+        self._parked = None
+        self._kind = None
+
+    def as_dict(self):
+        return {
+            "switches": self.switches,
+            "run_time": self.run_time,
+            "io_wait": self.io_wait,
+            "sync_wait": self.sync_wait,
+            "last_wait": self.last_wait,
+        }
+
+
+def waiting(kind, reason):
+    """Called right before the current thread is parked, to record why. Only
+    called when `enabled` is True."""
+    global _kind, _reason
+    _kind = kind
+    _reason = reason
+
+
+def _stats(glet):
+    thread = getattr(glet, "thread", None)
+    if thread is None:
+        return None
+    stats = thread._Thread__stats
+    if stats is None:
+        stats = thread._Thread__stats = ThreadStats()
+    return stats
+
+
+def _collect(event, origin, target, now, kind, reason):
+    """Switch listener that updates the statistics of the threads involved."""
+    stats = _stats(origin)
+    if stats is not None:
+        if stats._resumed is not None:
+            stats.run_time += now - stats._resumed
+            stats._resumed = None
+        stats._parked = now
+        stats._kind = kind
+        if reason is not None:
+            stats.last_wait = reason
+
+    stats = _stats(target)
+    if stats is not None:
+        stats.switches += 1
+        stats._resumed = now
+        if stats._parked is not None:
+            if stats._kind is IO:
+                stats.io_wait += now - stats._parked
+            elif stats._kind is SYNC:
+                stats.sync_wait += now - stats._parked
+            stats._parked = None
+
+
+def _trace(event, args):
+    global _kind, _reason
+    if event in ("switch", "throw"):
+        origin, target = args
+        now = _clock()
+        kind, reason = _kind, _reason
+        _kind = _reason = None
+        for listener in _listeners:
+            listener(event, origin, target, now, kind, reason)
+
+    if _previous is not None:
+        _previous(event, args)
+
+
+def add_listener(listener):
+    """Calls `listener(event, origin, target, now, kind, reason)` whenever a
+    greenlet switches from `origin` to `target`, either normally (`event` is
+    "switch") or by raising an exception in it ("throw"); `kind` and `reason`
+    describe why `origin` was parked, if known. Greenlet switches are only
+    traced while at least one listener is registered."""
+    global enabled, _previous
+    if listener in _listeners:
+        return
+    if not _listeners:
+        _previous = greenlet.settrace(_trace)
+        enabled = True
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    """Stops calling a listener registered with `add_listener()`."""
+    global enabled, _previous
+    if listener not in _listeners:
+        return
+    _listeners.remove(listener)
+    if not _listeners:
+        greenlet.settrace(_previous)
+        _previous = None
+        enabled = False
+
+
+def enable():
+    """Starts collecting scheduler statistics for all the threads, by tracing
+    greenlet switches. When disabled (the default), no tracing is done."""
+    add_listener(_collect)
+
+
+def disable():
+    """Stops collecting scheduler statistics. The statistics collected so far
+    are kept."""
+    remove_listener(_collect)
+
+
+def snapshot():
+    """Returns the statistics of all the threads currently alive, along with
+    their totals, as a dictionary."""
+    from straight.threading.thread import Thread
+
+    threads = []
+    totals = ThreadStats()
+    for thread in Thread.enumerate():
+        stats = thread.stats()
+        if stats is None:
+            continue
+        stats["name"] = thread.name
+        threads.append(stats)
+        totals.switches += stats["switches"]
+        totals.run_time += stats["run_time"]
+        totals.io_wait += stats["io_wait"]
+        totals.sync_wait += stats["sync_wait"]
+
+    result = totals.as_dict()
+    del result["last_wait"]
+    result["enabled"] = _collect in _listeners
+    result["threads"] = threads
+    return result
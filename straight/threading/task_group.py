@@ -0,0 +1,143 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading.thread import Thread
+from straight.threading.event import Event
+
+import collections
+import greenlet
+
+
+class TaskGroup(object):
+    """Runs a group of related tasks, each in its own thread, and collects
+    their results.
+
+    Tasks are added with `spawn()` and their results are collected, in the
+    order in which they were spawned, by `gather()`. If any of the tasks
+    raises an exception, all the other tasks of the group are stopped and the
+    exception is raised by `gather()` (instead of only being logged, as is the
+    case with plain threads).
+
+    If a `limit` is given, at most `limit` tasks run at the same time; the
+    others are queued and picked up by the threads of the group as soon as
+    the running tasks finish. This means that fanning out to a large number
+    of tasks never uses more than `limit` threads.
+
+    A task group may be used in a `with` block. When the block exits normally,
+    `gather()` is called; when it exits with an exception, the tasks are
+    stopped and the block only exits once they are all finished."""
+
+    def __init__(self, limit=None, name=None):
+        if limit is not None and limit < 1:
+            raise ValueError("The task limit must be a positive number")
+        self.name = name or "Task group"
+        self.__limit = limit
+        self.__pending = collections.deque()
+        self.__results = []
+        self.__workers = set()
+        self.__remaining = 0
+        self.__error = None
+        self.__finished = Event()
+        self.__finished.set()
+
+    def spawn(self, target, *args, **kwargs):
+        """Schedules `target(*args, **kwargs)` to run in a thread of this
+        group. Returns the index of the result in the list returned by
+        `gather()`."""
+        if self.__error is not None:
+            raise RuntimeError("{0} was stopped".format(repr(self)))
+
+        index = len(self.__results)
+        self.__results.append(None)
+        self.__pending.append((index, target, args, kwargs))
+        self.__remaining += 1
+        self.__finished.clear()
+
+        if self.__limit is None or len(self.__workers) < self.__limit:
+            worker = Thread(self.__work, name="{0} worker".format(self.name))
+            self.__workers.add(worker)
+            worker.start()
+        return index
+
+    def __work(self):
+        """Runs queued tasks until there are none left."""
+        current = None
+        try:
+            while self.__pending:
+                current = self.__pending.popleft()
+                index, target, args, kwargs = current
+                self.__results[index] = target(*args, **kwargs)
+                current = None
+                self.__task_done()
+        except greenlet.GreenletExit:
+            """Stopped by the group."""
+        except Exception as e:
+            if self.__error is None:
+                self.__error = e
+                self.stop()
+        finally:
+            self.__workers.discard(Thread.current())
+            if current is not None:
+                self.__task_done()
+
+    def __task_done(self):
+        self.__remaining -= 1
+        if self.__remaining == 0:
+            self.__finished.set()
+
+    def stop(self):
+        """Stops all the tasks of this group. Tasks that did not start yet are
+        discarded; running tasks receive a GreenletExit exception. Once
+        stopped, `gather()` raises a RuntimeError, unless a task failed
+        first, in which case it raises that task's exception."""
+        if self.__error is None:
+            self.__error = RuntimeError("{0} was stopped".format(repr(self)))
+        while self.__pending:
+            self.__pending.popleft()
+            self.__task_done()
+        current = Thread.current()
+        for worker in list(self.__workers):
+            if worker is not current:
+                worker.stop()
+
+    def gather(self, timeout=None):
+        """Waits for all the tasks to finish and returns the list of their
+        results, in the order in which they were spawned. If any task raised
+        an exception, the other tasks are stopped and the exception is raised
+        here. If the tasks do not finish in `timeout` seconds, a WaitTimeout is
+        raised (the tasks are not stopped)."""
+        self.__finished.wait(timeout)
+        if self.__error is not None:
+            raise self.__error
+        return list(self.__results)
+
+    def __len__(self):
+        return len(self.__results)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.gather()
+        else:
+            self.stop()
+            # running tasks may take a while to clean up
+            self.__finished.wait()
+
+    def __repr__(self):
+        return "<straight.threading.TaskGroup({0}) object at {1}>".format(
+            self.name, hex(id(self)))
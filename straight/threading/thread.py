@@ -15,10 +15,13 @@ with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
 from straight.threading.event import Event
+from straight.threading.future import Future
+from straight.threading import stats
 from straight import ioloop
 
 import greenlet
 import logging
+import pyuv
 
 
 class Thread(object):
@@ -51,6 +54,9 @@ class Thread(object):
     __threads = set()  # all active Thread instances; we need to keep explicit
                        # references to all running threads to prevent garbage
                        # collection and to allow for `Thread.enumerate()`
+    # subclasses that don't declare __slots__ still get a __dict__
+    __slots__ = ("name", "__target", "__args", "__kwargs", "__greenlet",
+                 "__finished", "__stats", "__weakref__")
 
     def __init__(self, target=None, name=None, args=(), kwargs={}):
         # compat with threading.Thread
@@ -65,6 +71,7 @@ class Thread(object):
 
         self.__greenlet = None
         self.__finished = False
+        self.__stats = None  # created by `straight.threading.stats` if enabled
 
     def start(self):
         if self.__greenlet:
@@ -72,6 +79,7 @@ class Thread(object):
                                "started".format(self.name))
 
         self.__greenlet = greenlet.greenlet(self.__safe_run)
+        self.__greenlet.thread = self
         ioloop.resume(self.__greenlet)
 
     def __safe_run(self):
@@ -99,7 +107,8 @@ class Thread(object):
     def stop(self):
         """"Stops the thread, if active. The thread's 'run' method will receive
         a GreenletExit exception."""
-        ioloop.resume(self.__greenlet, greenlet.GreenletExit)
+        if self.__greenlet is not None:
+            ioloop.resume(self.__greenlet, greenlet.GreenletExit)
 
     def join(self, timeout=None):
         """Wait until the thread terminates. This blocks the calling thread
@@ -132,7 +141,71 @@ class Thread(object):
 
         This method returns True just before the `run()` method starts until
         just after the `run()` method terminates."""
-        return self.__greenlet is not None
+        return self.__greenlet is not None and self.__finished is not True
+
+    def stats(self):
+        """Return the scheduler statistics of this thread as a dictionary:
+        the number of times it was resumed (`switches`), the time it spent
+        running (`run_time`), waiting for sockets (`io_wait`) or for
+        synchronization primitives (`sync_wait`), all in seconds, and the
+        reason of its last wait (`last_wait`). Statistics are only collected
+        while `straight.threading.stats.enable()` is in effect; returns None if
+        none were collected for this thread."""
+        if self.__stats is None:
+            return None
+        return self.__stats.as_dict()
+
+    @staticmethod
+    def sleep(seconds):
+        """Suspends the calling thread for `seconds` seconds (or fractions
+        thereof), while the other threads keep running. `sleep(0)` just lets
+        the threads that are ready run before the caller resumes."""
+        current = greenlet.getcurrent()
+        if seconds > 0:
+            timer = pyuv.Timer(ioloop.default)
+            timer.start(lambda timer: ioloop.resume(current), seconds, 0)
+        else:
+            timer = None
+            ioloop.resume(current)
+        if stats.enabled:
+            stats.waiting(stats.SYNC, "sleep")
+        try:
+            ioloop.pause(current)
+        finally:
+            if timer is not None:
+                timer.close()
+
+    @classmethod
+    def current(cls):
+        """Return the Thread object running the caller, or None if called
+        from the main thread or a non straight thread."""
+        return getattr(greenlet.getcurrent(), "thread", None)
+
+    @classmethod
+    def spawn(cls, target, *args, **kwargs):
+        """Starts a new thread that calls `target(*args, **kwargs)` and
+        returns a `Future` holding the value returned by `target`, or the
+        exception it raised. Unlike exceptions raised in the `run()` method of
+        a thread, these are not logged but passed on to whoever waits for the
+        result. If the thread is stopped before `target` returns, the future
+        holds a RuntimeError."""
+        future = Future()
+
+        def run():
+            try:
+                result = target(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                if not future.done():
+                    # stopped (GreenletExit) or interrupted
+                    future.set_exception(RuntimeError(
+                        "{0} was stopped".format(repr(cls.current()))))
+
+        cls(run).start()
+        return future
 
     @classmethod
     def enumerate(self):
@@ -0,0 +1,185 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import WaitTimeout, stats
+from straight import ioloop
+
+import functools
+import greenlet
+import pyuv
+
+
+class _Waiter(object):
+    """Registered in the waiters table of every event `wait_any` waits for,
+    instead of a timer. When one of the events wakes the thread up, it calls
+    `stop()` on its waiter (just as it would stop a timer), which deregisters
+    the thread from all the other events before it is resumed, so that no
+    other event can resume it a second time."""
+    def __init__(self, group, event):
+        self.group = group
+        self.event = event
+
+    def stop(self):
+        group = self.group
+        group.fired.append(self.event)
+        group.scheduled = True
+        group.unregister()
+        if group.timer:
+            group.timer.stop()
+
+
+class _WaitGroup(object):
+    """Shared state of a `wait_any` or `wait_all` call."""
+    def __init__(self, thread):
+        self.thread = thread
+        # the key under which the thread is registered with each event
+        self.keys = {}
+        self.fired = []
+        self.timer = None
+        self.expired = False
+        # whether the thread was already resumed during this iteration
+        self.scheduled = False
+
+    def register(self, events):
+        """Registers the waiting thread itself with the events, so that the
+        first of them to be triggered resumes it."""
+        for event in events:
+            self.add(event, self.thread, _Waiter(self, event))
+
+    def watch(self, events):
+        """Registers a greenlet of its own with each of the events instead of
+        the waiting thread, so that the thread can keep waiting for the others
+        once one was triggered. The event resumes the greenlet even if it is
+        cleared again right away, which records it and wakes the thread up
+        (unless it is already about to run)."""
+        for event in events:
+            fire = functools.partial(self.fire, event)
+            self.add(event, greenlet.greenlet(fire), None)
+
+    def add(self, event, key, waiter):
+        if event._Event__waiters is None:
+            event._Event__waiters = {}
+        event._Event__waiters[key] = waiter
+        self.keys[event] = key
+
+    def fire(self, event):
+        if self.keys.pop(event, None) is None:
+            # the thread is no longer waiting
+            return
+        self.fired.append(event)
+        if not self.scheduled:
+            self.scheduled = True
+            ioloop.resume(self.thread)
+
+    def unregister(self):
+        """Removes the waiting thread from the waiters table of every event it
+        is still registered with."""
+        for event, key in self.keys.items():
+            event._Event__waiters.pop(key, None)
+        self.keys = {}
+
+    def start_timer(self, timeout):
+        def wakeup(timer):
+            self.expired = True
+            if self.scheduled:
+                # an event already woke the thread up during this iteration;
+                # the timeout is reported once it resumes
+                return
+            self.scheduled = True
+            self.unregister()
+            ioloop.resume(self.thread, WaitTimeout)
+
+        self.timer = pyuv.Timer(ioloop.default)
+        self.timer.start(wakeup, timeout, 0)
+
+
+def wait_any(events, timeout=None):
+    """Block until any of the given events is triggered, or until the optional
+    timeout occurs, whichever happens first. If one of the events is already
+    set on entry, it is returned immediately. Otherwise, the calling thread is
+    registered with all the events at once, and deregistered from all of them
+    as soon as the first one wakes it up. Only one timer is used, regardless of
+    the number of events.
+
+    When the timeout argument is present and not None, it should be a floating
+    point number specifying a timeout for the operation in seconds (or
+    fractions thereof).
+
+    Returns the event that was triggered. If the operation times out, a
+    WaitTimeout will be raised instead."""
+    events = list(events)
+    for event in events:
+        if event.is_set():
+            return event
+
+    group = _WaitGroup(greenlet.getcurrent())
+    if timeout is not None:
+        group.start_timer(timeout)
+    group.register(events)
+    if stats.enabled:
+        stats.waiting(stats.SYNC, "wait_any")
+    try:
+        ioloop.pause(group.thread)
+    finally:
+        # make sure the thread is no longer referenced by any of the events if
+        # it was woken up by something else (e.g. `Thread.stop()`)
+        group.unregister()
+        if group.timer:
+            group.timer.stop()
+    return group.fired[0]
+
+
+def wait_all(events, timeout=None):
+    """Block until every one of the given events has been triggered at least
+    once, or until the optional timeout occurs. Events that are already set on
+    entry are considered to have been triggered. The calling thread stays
+    registered with every event until it is triggered, so an event that is set
+    and cleared again right away (as `Condition.notify_all()` does) counts as
+    well. A single timer is shared by all the waits, so 'timeout' applies to
+    the whole operation.
+
+    When the timeout argument is present and not None, it should be a floating
+    point number specifying a timeout for the operation in seconds (or
+    fractions thereof).
+
+    Returns the list of events, in the order in which they were triggered. If
+    the operation times out, a WaitTimeout will be raised instead."""
+    group = _WaitGroup(greenlet.getcurrent())
+    pending = []
+    for event in events:
+        if event.is_set():
+            group.fired.append(event)
+        else:
+            pending.append(event)
+    if not pending:
+        return group.fired
+
+    if timeout is not None:
+        group.start_timer(timeout)
+    group.watch(pending)
+    try:
+        while group.keys:
+            if stats.enabled:
+                stats.waiting(stats.SYNC, "wait_all")
+            ioloop.pause(group.thread)
+            group.scheduled = False
+            if group.keys and group.expired:
+                raise WaitTimeout
+    finally:
+        group.unregister()
+        if group.timer:
+            group.timer.stop()
+    return group.fired
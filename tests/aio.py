@@ -0,0 +1,66 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight
+
+import subprocess
+import pytest
+import sys
+import os
+
+package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_asyncio_bridge():
+    # the asyncio loop drives the straight loop, so the test can't run in a
+    # straight thread, where the straight loop is running already
+    code = """
+import straight.threading, straight, asyncio
+from straight import aio
+
+async def double(value):
+    await asyncio.sleep(0.01)
+    return value * 2
+
+def compute():
+    # a straight thread waiting for a coroutine
+    return straight.await_(double(21)) + 1
+
+async def main():
+    # a coroutine waiting for a straight thread
+    return await straight.as_future(straight.threading.Thread.spawn(compute))
+
+loop = asyncio.new_event_loop()
+aio.attach(loop)
+try:
+    assert loop.run_until_complete(main()) == 43
+finally:
+    aio.detach()
+    loop.close()
+"""
+    subprocess.check_call([sys.executable, "-c", code], cwd=package)
+
+
+def test_lazy_import():
+    # importing straight doesn't import asyncio; the bridge is imported when
+    # first used
+    code = ("import sys, straight; "
+            "assert 'straight.aio' not in sys.modules; "
+            "assert 'await_' in straight.__all__; "
+            "assert straight.await_ is sys.modules['straight.aio'].await_")
+    subprocess.check_call([sys.executable, "-c", code], cwd=package)
+    with pytest.raises(AttributeError):
+        straight.missing
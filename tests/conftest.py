@@ -15,6 +15,7 @@ with Straight. If not, see <http://www.gnu.org/licenses/>."""
 from __future__ import absolute_import, division, unicode_literals
 
 import logging
+import pytest
 import sys
 import os
 
@@ -22,36 +23,53 @@ current = os.path.dirname(__file__)
 package = os.path.abspath(os.path.join(current, os.pardir))
 sys.path.append(package)
 
+from straight import ioloop
 import straight.threading
-import straight
+import pyuv
 logging.basicConfig()
 
 
 def pytest_runtest_call(item):
     errors = []
+    finished = []
     runtest = item.runtest
 
     def run_test():
         try:
             runtest()
-        except:
-            errors.append(sys.exc_type)
-            errors.append(sys.exc_value)
-            errors.append(sys.exc_traceback)
+        except BaseException as e:
+            errors.append(e)
         finally:
-            straight.shutdown()
+            finished.append(True)
+            ioloop.stop()
 
     def run_straight():
-        straight.threading.Thread(run_test)
-        straight.run(1)
+        straight.threading.Thread(run_test).start()
+        ioloop.start()
+        stalled = not finished
+
+        # stop whatever the test left running (e.g. servers)
+        for thread in straight.threading.Thread.enumerate():
+            thread.stop()
+        for _ in range(100):
+            if not straight.threading.Thread.enumerate():
+                break
+            ioloop.default.run(pyuv.UV_RUN_NOWAIT)
+
+        if stalled:
+            raise RuntimeError("The test never finished: all its threads "
+                               "were waiting for something that could not "
+                               "happen anymore")
         if errors:
-            raise errors[0], errors[1], errors[2]
+            raise errors[0]
 
     item.runtest = run_straight
 
 
-def pytest_collect_file(path, parent):
-    if \
-            path.ext == ".py" and \
-            "networking" not in str(path):
-        return parent.Module(path, parent)
+def pytest_collect_file(file_path, parent):
+    # test modules are named after what they test, without a "test_" prefix;
+    # pytest collects the ones given on the command line by itself
+    if file_path.suffix == ".py" and \
+            file_path.name not in ("conftest.py", "__init__.py") and \
+            not parent.session.isinitpath(file_path):
+        return pytest.Module.from_parent(parent, path=file_path)
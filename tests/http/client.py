@@ -0,0 +1,122 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.http import Client, HTTPServer, Response
+from straight.errors import ConnectionTimeout
+from straight.threading import WaitTimeout
+import straight.networking
+import straight.threading
+
+import socket
+import struct
+import errno
+import time
+
+
+def test_client():
+    results = []
+
+    def handler(request):
+        if request.path == "/chunked":
+            return Response(200, body=iter([b"hello", b", ", b"world"]))
+        return Response(200, body=request.method.encode() + request.body)
+
+    server = HTTPServer(1236, handler)
+    server.start()
+
+    def run():
+        client = Client(max_per_host=2)
+        with client.get("http://localhost:1236/") as response:
+            results.append((response.status, response.read()))
+        results.append(client.post("http://localhost:1236/", b"!").read())
+        results.append(client.get("http://localhost:1236/chunked").read())
+        client.close()
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [(200, b"GET"), b"POST!", b"hello, world"]
+
+
+def test_bodiless_release():
+    server = HTTPServer(1254, lambda request: Response(200, body=b"hello"))
+    server.start()
+    results = []
+
+    def run():
+        client = Client(max_per_host=1)
+        # responses without a body don't hold the only connection, even if
+        # they are never closed
+        for _ in range(3):
+            response = client.request("HEAD", "http://localhost:1254/",
+                                      timeout=1.0)
+            results.append(response.status)
+        results.append(response.read())
+        client.close()
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [200, 200, 200, b""]
+
+
+def test_deadline():
+    def slowly():
+        for _ in range(4):
+            straight.threading.Thread.sleep(0.2)
+            yield b"slow"
+
+    server = HTTPServer(1249, lambda request: Response(200, body=slowly()))
+    server.start()
+    results = []
+
+    def run():
+        client = Client(timeout=0.5)
+        start = time.time()
+        response = client.get("http://localhost:1249/")
+        # each chunk comes in time, but the whole body does not
+        try:
+            response.read()
+        except (WaitTimeout, ConnectionTimeout):
+            results.append(time.time() - start)
+        client.close()
+
+    straight.threading.Thread.spawn(run).result()
+    assert len(results) == 1 and 0.45 < results[0] < 0.7
+
+
+def test_connection_reset():
+    class ResettingServer(straight.networking.Server):
+        def handle(self, connection):
+            connection.read(1024)
+            peer = socket.fromfd(connection.fileno(), socket.AF_INET,
+                                 socket.SOCK_STREAM)
+            peer.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                            struct.pack(b"ii", 1, 0))
+            peer.close()
+            connection.close()
+
+    server = ResettingServer(1250)
+    server.start()
+    results = []
+
+    def run():
+        client = Client()
+        try:
+            client.get("http://localhost:1250/")
+        except socket.error as e:
+            # the error is not hidden by closing the broken connection
+            results.append(e.args[0])
+        client.close()
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [errno.ECONNRESET]
@@ -0,0 +1,107 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.http import protocol
+
+import pytest
+
+
+class FakeConnection(object):
+    """Delivers predefined data in small pieces."""
+    def __init__(self, data, piece=7):
+        self.data = data
+        self.piece = piece
+
+    def readinto(self, view, timeout=None):
+        count = min(len(view), self.piece, len(self.data))
+        view[:count] = self.data[:count]
+        self.data = self.data[count:]
+        return count
+
+
+def test_read_head():
+    data = b"GET /a?b=c HTTP/1.1\r\nHost: example.com\r\n" \
+           b"Connection: keep-alive, Upgrade\r\n\r\nGET /next"
+    reader = protocol.Reader(FakeConnection(data), size=16)
+    head = reader.read_until(b"\r\n\r\n", 1024)
+    start_line, headers = protocol.parse_head(head)
+    assert start_line == "GET /a?b=c HTTP/1.1"
+    assert headers.get("host") == "example.com"
+    assert headers.tokens("Connection") == ["keep-alive", "upgrade"]
+    # the beginning of the next request stays buffered
+    assert reader.read(9) == b"GET /next"
+
+
+def test_pipelined_heads():
+    # small pieces make the buffer be compacted and grown while a head is
+    # being scanned
+    data = b"GET /first HTTP/1.1\r\nHost: example.com\r\n\r\n" \
+           b"GET /second HTTP/1.1\r\nHost: example.com\r\n\r\n" \
+           b"GET /third HTTP/1.1\r\n\r\n"
+    reader = protocol.Reader(FakeConnection(data, piece=5), size=16)
+    heads = []
+    while True:
+        head = reader.read_until(b"\r\n\r\n", 1024)
+        if head is None:
+            break
+        heads.append(protocol.parse_head(head)[0])
+    assert heads == ["GET /first HTTP/1.1", "GET /second HTTP/1.1",
+                     "GET /third HTTP/1.1"]
+
+
+def test_chunked_coding():
+    headers = protocol.Headers([("Transfer-Encoding", "gzip, chunked")])
+    assert protocol.is_chunked(headers)
+    headers = protocol.Headers([("Transfer-Encoding", "chunked, gzip")])
+    assert not protocol.is_chunked(headers)
+    assert not protocol.is_chunked(protocol.Headers())
+
+
+def test_head_limit():
+    reader = protocol.Reader(FakeConnection(b"x" * 100))
+    with pytest.raises(protocol.HTTPError) as error:
+        reader.read_until(b"\r\n\r\n", 50)
+    assert error.value.status == 431
+
+
+def test_chunked():
+    data = b"5\r\nhello\r\n7;ext=1\r\n, world\r\n0\r\nX-Trailer: 1\r\n\r\n"
+    reader = protocol.Reader(FakeConnection(data))
+    assert b"".join(protocol.read_chunked(reader, 1024)) == b"hello, world"
+    assert reader.buffered() == 0
+
+    chunks = protocol.chunk_buffers(b"hello")
+    assert b"".join(chunks) == b"5\r\nhello\r\n"
+
+
+def test_chunked_limit():
+    reader = protocol.Reader(FakeConnection(b"10\r\n" + b"x" * 16))
+    with pytest.raises(protocol.HTTPError):
+        b"".join(protocol.read_chunked(reader, 8))
+
+
+def test_content_length():
+    def length(*values):
+        return protocol.content_length(
+            protocol.Headers([("Content-Length", v) for v in values]))
+
+    assert length() is None
+    assert length("12") == 12
+    assert length("5", "5, 5") == 5
+    for values in [("",), ("-1",), ("1e3",), ("²",), ("5", "6"),
+                   ("5, 6",)]:
+        with pytest.raises(protocol.HTTPError):
+            length(*values)
@@ -0,0 +1,129 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.http import HTTPServer, Response
+import straight.networking
+import straight.threading
+
+
+def exchange(port, data):
+    """Sends raw requests and returns everything received until the server
+    closes the connection."""
+    connection = straight.networking.Connection("localhost", port)
+    connection.writeall(data)
+    connection.shutdown()
+    response = connection.readall()
+    connection.close()
+    return response
+
+
+def test_bodiless_responses():
+    def handler(request):
+        if request.path == "/empty":
+            return Response(204, body=b"")
+        if request.path == "/cached":
+            return Response(304, body=iter([]))
+        return Response(200, body=b"hello")
+
+    server = HTTPServer(1247, handler)
+    server.start()
+    results = []
+
+    def run():
+        results.append(exchange(1247, b"GET /empty HTTP/1.1\r\n\r\n"
+                                      b"GET /cached HTTP/1.1\r\n\r\n"
+                                      b"HEAD / HTTP/1.1\r\n\r\n"))
+
+    straight.threading.Thread.spawn(run).result()
+    responses = results[0].split(b"\r\n\r\n")
+    assert responses[0].startswith(b"HTTP/1.1 204 ")
+    assert b"Content-Length" not in responses[0]
+    assert responses[1].startswith(b"HTTP/1.1 304 ")
+    assert b"Content-Length" not in responses[1]
+    assert b"Transfer-Encoding" not in responses[1]
+    # HEAD responses describe the body they would have
+    assert responses[2].startswith(b"HTTP/1.1 200 ")
+    assert b"Content-Length: 5" in responses[2]
+    assert responses[3] == b""
+
+
+def test_transfer_codings():
+    server = HTTPServer(1248, lambda request: Response(200, body=request.body))
+    server.start()
+    results = []
+
+    def run():
+        results.append(exchange(1248, b"POST / HTTP/1.1\r\n"
+                                      b"Transfer-Encoding: gzip, chunked\r\n"
+                                      b"\r\n5\r\nhello\r\n0\r\n\r\n"))
+        results.append(exchange(1248, b"POST / HTTP/1.1\r\n"
+                                      b"Transfer-Encoding: chunked, gzip\r\n"
+                                      b"\r\n5\r\nhello\r\n0\r\n\r\n"))
+
+    straight.threading.Thread.spawn(run).result()
+    assert results[0].startswith(b"HTTP/1.1 200 ")
+    assert results[0].endswith(b"\r\n\r\nhello")
+    # chunked is not the last coding: the end of the body is unknown
+    assert results[1].startswith(b"HTTP/1.1 400 ")
+
+
+def test_pipelined_partial():
+    server = HTTPServer(1252, lambda request: Response(200, body=request.body))
+    server.start()
+    results = []
+
+    def run():
+        connection = straight.networking.Connection("localhost", 1252)
+        connection.writeall(b"POST / HTTP/1.1\r\nContent-Length: 5\r\n\r\n"
+                            b"hello"
+                            b"POST / HTTP/1.1\r\nContent-Length: 5\r\n"
+                            b"Expect: 100-continue\r\n\r\n")
+        # the first request is answered before the body of the second one is
+        # sent, then the second one is told to continue
+        received = b""
+        while not received.endswith(b" 100 Continue\r\n\r\n"):
+            received += connection.read(65536, 2.0)
+        results.append(received)
+        connection.writeall(b"world")
+        connection.shutdown()
+        results.append(connection.readall())
+        connection.close()
+
+    straight.threading.Thread.spawn(run).result()
+    assert results[0].startswith(b"HTTP/1.1 200 ")
+    assert results[0].endswith(b"\r\n\r\nhello"
+                               b"HTTP/1.1 100 Continue\r\n\r\n")
+    assert results[1].startswith(b"HTTP/1.1 200 ")
+    assert results[1].endswith(b"\r\n\r\nworld")
+
+
+def test_pipelined_continue():
+    server = HTTPServer(1253, lambda request: Response(200, body=request.body))
+    server.start()
+    results = []
+
+    def run():
+        results.append(exchange(1253, b"POST / HTTP/1.1\r\n"
+                                      b"Content-Length: 5\r\n\r\nhello"
+                                      b"POST / HTTP/1.1\r\n"
+                                      b"Content-Length: 5\r\n"
+                                      b"Expect: 100-continue\r\n\r\nworld"))
+
+    straight.threading.Thread.spawn(run).result()
+    # the body was sent along: no "100 Continue" between the responses
+    assert b" 100 " not in results[0]
+    assert results[0].count(b"HTTP/1.1 200 ") == 2
+    assert results[0].endswith(b"\r\n\r\nworld")
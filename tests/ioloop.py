@@ -0,0 +1,134 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.threading import stats
+from straight import ioloop
+import straight.threading
+
+import greenlet
+import logging
+import weakref
+import json
+import time
+import gc
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_lag_monitor():
+    def block():
+        time.sleep(0.3)
+
+    records = _Records()
+    ioloop.log.addHandler(records)
+    monitor = ioloop.monitor_lag(interval=0.01, threshold=0.1)
+    try:
+        straight.threading.Thread.sleep(0.05)
+        # block the loop from a named thread
+        straight.threading.Thread(block, "blocker").start()
+        straight.threading.Thread.sleep(0.05)
+    finally:
+        monitor.stop()
+        ioloop.log.removeHandler(records)
+
+    lag = monitor.percentiles()
+    assert lag["count"] >= 2
+    assert lag["max"] >= 0.2
+    assert lag["p50"] < 0.2
+    assert len(records.messages) == 1
+    assert "thread 'blocker'" in records.messages[0]
+    assert "in block\n" in records.messages[0]
+
+
+def test_lag_monitor_samples():
+    monitor = ioloop.LagMonitor(interval=0.01, size=3)
+    assert monitor.percentiles() == {"count": 0, "max": 0.0, "p50": 0.0,
+                                     "p90": 0.0, "p99": 0.0}
+    monitor.start()
+    straight.threading.Thread.sleep(0.1)
+    monitor.stop()
+    count = monitor.percentiles()["count"]
+    straight.threading.Thread.sleep(0.05)
+
+    # only the last samples are kept, and none is taken once stopped
+    assert count > 3
+    assert monitor.percentiles()["count"] == count
+    assert len(monitor._LagMonitor__samples) == 3
+
+
+def test_tracer():
+    tracer = ioloop.Tracer(size=8)
+    tracer.start()
+    straight.threading.Thread(lambda: None, "first").start()
+    straight.threading.Thread.sleep(0.01)
+    events = tracer.events()
+    names = [event["name"] for event in events]
+    assert "first" in names and "poll" in names and "callbacks" in names
+
+    # only the last records are kept once the ring wraps around
+    for _ in range(20):
+        straight.threading.Thread(lambda: None, "second").start()
+        straight.threading.Thread.sleep(0)
+    tracer.stop()
+    events = json.loads(tracer.dump())["traceEvents"]
+    assert len(events) == 9
+    assert events[0]["ph"] == "M"
+    assert "first" not in [event["name"] for event in events]
+    # slices are recorded as they end
+    ends = [event["ts"] + event["dur"] for event in events[1:]]
+    assert all(b - a > -0.001 for a, b in zip(ends, ends[1:]))
+
+
+def test_tracer_listeners():
+    previous = greenlet.gettrace()
+    first, second = ioloop.Tracer(), ioloop.Tracer()
+    first.start()
+    second.start()
+    first.stop()
+    # the remaining tracer still gets the switches
+    straight.threading.Thread(lambda: None, "traced").start()
+    straight.threading.Thread.sleep(0.01)
+    assert stats.enabled
+    second.stop()
+    assert not stats.enabled
+    assert greenlet.gettrace() is previous
+    assert "traced" in [event["name"] for event in second.events()]
+    assert "traced" not in [event["name"] for event in first.events()]
+
+
+def test_tracer_parked():
+    tracer = ioloop.Tracer()
+    tracer.start()
+
+    def park():
+        stats.waiting(stats.SYNC, "forever")
+        greenlet.getcurrent().parent.switch()
+
+    # a greenlet parked forever is not kept alive by the tracer
+    glet = greenlet.greenlet(park)
+    glet.switch()
+    reference = weakref.ref(glet)
+    del glet
+    gc.collect()
+    assert reference() is None
+    tracer.stop()
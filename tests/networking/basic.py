@@ -31,7 +31,7 @@ def test_networking():
             connection.writeall(buffer)
 
     class EchoClient(straight.threading.Thread):
-        def run():
+        def run(self):
             thread_id = next(counter)
             try:
                 data = ("Hello from thread %d" % thread_id).encode()
@@ -44,11 +44,12 @@ def test_networking():
                 traceback.print_exc()
                 errors.append(thread_id)
 
-    server = EchoServer(1234)  # keep a reference in scope
-    assert server
+    server = EchoServer(1234)
+    server.start()
     clients = []
     for _ in range(1):
         clients.append(EchoClient())
+        clients[-1].start()
 
     for client in clients:
         client.join()
@@ -0,0 +1,87 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking import broadcast
+import straight.threading
+
+
+class FakeConnection(object):
+    """Accepts at most 'capacity' bytes without waiting; the rest is written
+    after 'delay' seconds."""
+    def __init__(self, capacity, delay=0.01):
+        self.capacity = capacity
+        self.delay = delay
+        self.received = bytearray()
+        self.status = 0
+        self.address = None
+
+    def writev_nowait(self, buffers):
+        data = b"".join(bytes(b) for b in buffers)[:self.capacity]
+        self.capacity -= len(data)
+        self.received += data
+        return len(data)
+
+    def writev(self, buffers, timeout=None):
+        straight.threading.Thread.sleep(self.delay)
+        self.received += b"".join(bytes(b) for b in buffers)
+
+    def close(self):
+        self.status = 2
+
+
+def test_broadcast():
+    fast, slow = FakeConnection(1000), FakeConnection(5)
+    broadcaster = broadcast.Broadcaster(max_backlog=20)
+    broadcaster.subscribe(fast)
+    broadcaster.subscribe(slow)
+
+    def run():
+        assert broadcaster.publish(b"0123456789") == 2
+        # queued behind the partially sent first message
+        assert broadcaster.publish(b"abcdefghij") == 2
+        assert broadcaster.backlog(slow) == 15
+        # the backlog is full: dropped for the slow subscriber only
+        assert broadcaster.publish(b"ABCDEFGHIJ") == 1
+        straight.threading.Thread.sleep(0.1)
+
+    straight.threading.Thread.spawn(run).result()
+    assert bytes(fast.received) == b"0123456789abcdefghijABCDEFGHIJ"
+    assert bytes(slow.received) == b"0123456789abcdefghij"
+    assert broadcaster.dropped == 1
+    assert broadcaster.backlog(slow) == 0
+
+
+def test_disconnect_slow_subscriber():
+    # the write of the backlog doesn't complete during the test, even if the
+    # loop is late
+    slow = FakeConnection(0, delay=1.0)
+    broadcaster = broadcast.Broadcaster(max_backlog=5,
+                                        policy=broadcast.DISCONNECT)
+    broadcaster.subscribe(slow)
+
+    def run():
+        broadcaster.publish(b"first")
+        # let the backlog writer start sending
+        straight.threading.Thread.sleep(0.001)
+        broadcaster.publish(b"second")
+        straight.threading.Thread.sleep(0.05)
+
+    straight.threading.Thread.spawn(run).result()
+    assert slow not in broadcaster
+    assert slow.status == 2
+    # the thread sending the backlog was stopped before the connection was
+    # closed
+    assert bytes(slow.received) == b""
@@ -0,0 +1,46 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking import DatagramEndpoint, DatagramServer
+import straight.threading
+
+
+def test_datagrams():
+    received = []
+
+    class EchoServer(DatagramServer):
+        def handle_many(self, datagrams):
+            received.append(len(datagrams))
+            self.endpoint.send_many((bytes(data), address)
+                                    for data, address in datagrams)
+
+    server = EchoServer(1235, interface="127.0.0.1")
+    server.start()
+    replies = []
+
+    def run():
+        with DatagramEndpoint() as endpoint:
+            messages = [("message %d" % i).encode() for i in range(10)]
+            endpoint.send_many((m, ("127.0.0.1", 1235)) for m in messages)
+            while len(replies) < len(messages):
+                for data, address in endpoint.recv_many(timeout=5):
+                    replies.append(bytes(data))
+            assert sorted(replies) == sorted(messages)
+
+    straight.threading.Thread.spawn(run).result()
+    assert len(replies) == 10
+    # the burst is not received one datagram per wakeup
+    assert len(received) < 10
@@ -0,0 +1,111 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking import server as networking_server
+import straight.networking
+import straight.threading
+
+import socket
+import errno
+import os
+
+
+class EchoServer(straight.networking.Server):
+    def handle(self, connection):
+        while self.idle(connection):
+            data = connection.read(1024)
+            self.idle(connection, False)
+            if not data:
+                return
+            straight.threading.Thread.sleep(0.05)
+            connection.writeall(data)
+
+
+def test_drain(caplog):
+    server = EchoServer(1239)
+    server.start()
+    results = []
+
+    def run():
+        busy = straight.networking.Connection("localhost", 1239)
+        idle = straight.networking.Connection("localhost", 1239)
+        idle.writeall(b"idle")
+        assert idle.readall(4) == b"idle"
+        busy.writeall(b"busy")
+        straight.threading.Thread.sleep(0.01)
+        # the busy connection gets its response, the idle one is closed
+        results.append(server.drain(5))
+        results.append(busy.readall(4))
+        results.append(idle.read(4))
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [True, b"busy", b""]
+    # stopping the server is not an error
+    assert "Unhandled exception" not in caplog.text
+
+
+def test_handover():
+    path = "@straight-handover-{0}".format(os.getpid())
+    old = EchoServer(1240)
+    old.start()
+    results = []
+
+    def hand_over():
+        results.append(old.handover(path, 5))
+
+    def run():
+        straight.threading.Thread(hand_over).start()
+        straight.threading.Thread.sleep(0)  # let it start listening on path
+        listener = networking_server.take_over(path, 5)
+        new = EchoServer(None, listener=listener)
+        new.start()
+        with straight.networking.Connection("localhost", 1240) as c:
+            c.writeall(b"hello")
+            results.append(c.readall(5))
+
+    straight.threading.Thread.spawn(run).result()
+    assert results[-1] == b"hello"
+
+
+def test_handover_refused():
+    path = "@straight-handover-refused-{0}".format(os.getpid())
+    server = EchoServer(1256)
+    server.start()
+    results = []
+
+    def hand_over():
+        try:
+            server.handover(path, 5)
+        except socket.error as e:
+            results.append(e.args[0])
+
+    def run():
+        straight.threading.Thread(hand_over).start()
+        straight.threading.Thread.sleep(0)  # let it start listening on path
+        # receive the socket, but never confirm taking it over
+        with straight.networking.Connection(path, timeout=5) as c:
+            for fd in c.recv_fds(1, 1)[1]:
+                os.close(fd)
+        straight.threading.Thread.sleep(0.05)
+        # the server accepts connections again
+        with straight.networking.Connection("localhost", 1256) as c:
+            c.writeall(b"hello")
+            results.append(c.readall(5))
+
+    straight.threading.Thread.spawn(run).result()
+    # the connection is closed without an answer
+    assert results[0] in (errno.ECONNABORTED, errno.ECONNRESET)
+    assert results[1] == b"hello"
@@ -0,0 +1,71 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking import framing
+
+import pytest
+import time
+
+
+def _frames(codec, data):
+    """Parses all the complete frames in 'data'."""
+    buffer = bytearray(data)
+    start, frames = 0, []
+    while True:
+        frame = codec.parse(buffer, start, len(buffer))
+        if frame is None:
+            return frames, start
+        frames.append(bytes(buffer[frame[0]:frame[1]]))
+        start = frame[2]
+
+
+@pytest.mark.parametrize("codec", [
+    framing.LengthPrefixed(1),
+    framing.LengthPrefixed(4),
+    framing.Varint(),
+    framing.Delimited(b"\r\n"),
+])
+def test_round_trip(codec):
+    messages = [b"", b"hello", b"x" * 200, b"world"]
+    data = b"".join(bytes(b) for m in messages for b in codec.encode(m))
+    assert _frames(codec, data) == (messages, len(data))
+    # incomplete frames are left in the buffer
+    frames = _frames(codec, data[:-1])[0]
+    assert frames == messages[:-1]
+
+
+def test_varint():
+    header = framing.Varint().encode(b"x" * 300)[0]
+    assert bytes(header) == b"\xac\x02"
+
+
+def test_max_size():
+    codec = framing.LengthPrefixed(4, max_size=10)
+    with pytest.raises(ValueError):
+        codec.parse(bytearray(b"\x00\x00\x00\x0b"), 0, 4)
+
+
+def test_expired_deadline():
+    timeouts = []
+
+    def readinto(view, timeout):
+        timeouts.append(timeout)
+        return 0
+
+    # a deadline that already passed is never turned into a negative timeout
+    reader = framing.FrameReader(framing.Varint())
+    assert reader.read(readinto, time.time() - 1.0) is None
+    assert timeouts == [0]
@@ -0,0 +1,77 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking.metrics import Histogram
+import straight.networking
+import straight.threading
+
+
+class EchoServer(straight.networking.Server):
+    def handle(self, connection):
+        data = connection.read(1024)
+        if data == b"fail":
+            raise ValueError("failing as requested")
+        connection.writeall(data)
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.snapshot()["p50"] == 0.0
+    for duration in (0.000001, 0.0001, 0.0001, 0.01):
+        histogram.record(duration)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["max"] == 0.01
+    assert abs(snapshot["mean"] - 0.00255025) < 1e-9
+    # percentiles are the upper bounds of the buckets holding them
+    assert 0.0001 <= snapshot["p50"] < 0.0002
+    assert snapshot["p99"] == 0.01
+    assert sum(snapshot["buckets"]) == 4
+    assert snapshot["buckets"][1] == 1
+
+
+def test_metrics():
+    server = EchoServer(1242)
+    server.start()
+    results = []
+
+    def run():
+        connection = straight.networking.Connection("localhost", 1242)
+        # the server waits for the data
+        straight.threading.Thread.sleep(0.05)
+        connection.writeall(b"hello")
+        results.append(connection.readall(5))
+        results.append(connection.metrics.snapshot())
+
+        failing = straight.networking.Connection("localhost", 1242)
+        failing.writeall(b"fail")
+        results.append(failing.read(1024))
+
+    straight.threading.Thread.spawn(run).result()
+    client, metrics = results[1], server.metrics()
+    assert results[0] == b"hello"
+    assert results[2] == b""
+    assert client["bytes_written"] == 5 and client["bytes_read"] == 5
+    assert metrics["accepted"] == 2
+    assert metrics["active"] == 0
+    assert metrics["errors"] == 1
+    assert metrics["bytes_read"] == 9
+    assert metrics["bytes_written"] == 5
+    assert metrics["read_waits"] >= 1
+    assert metrics["read_blocked"] >= 0.04
+    assert metrics["handle_time"]["count"] == 2
+    assert metrics["handle_time"]["max"] >= 0.04
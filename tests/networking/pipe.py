@@ -0,0 +1,138 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight.networking
+import straight.threading
+
+import zlib
+
+
+class ChunkServer(straight.networking.Server):
+    """Sends the data it is told to, in small writes, then closes."""
+    def handle(self, connection):
+        for _ in range(10):
+            connection.writeall(b"0123456789" * 100)
+            straight.threading.Thread.sleep(0.001)
+
+
+class UpperServer(straight.networking.Server):
+    """Streams back the data it receives, upper cased, through a pipe."""
+    def __init__(self, port, results, max_buffered=1048576):
+        straight.networking.Server.__init__(self, port)
+        self.results = results
+        self.max_buffered = max_buffered
+
+    def handle(self, connection):
+        try:
+            self.results.append(straight.networking.pipe(
+                connection, lambda chunk: chunk.upper(), connection,
+                chunk_size=4096, max_buffered=self.max_buffered))
+        except Exception as e:
+            self.results.append(e)
+
+
+def test_iter_chunks():
+    server = ChunkServer(1243)
+    server.start()
+    results = []
+
+    def run():
+        with straight.networking.Connection("localhost", 1243) as connection:
+            chunks = list(connection.iter_chunks(256))
+        results.append(max(len(chunk) for chunk in chunks))
+        results.append(b"".join(chunks))
+
+        buffer = bytearray(512)
+        with straight.networking.Connection("localhost", 1243) as connection:
+            received = bytearray()
+            for view in connection.iter_chunks(256, buffer=buffer):
+                # chunks are views of the start of the buffer
+                assert isinstance(view, memoryview)
+                assert view.obj is buffer and len(view) <= 256
+                received += view
+        results.append(bytes(received))
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [256, b"0123456789" * 1000, b"0123456789" * 1000]
+
+
+def test_pipe():
+    results = []
+    server = UpperServer(1244, results)
+    server.start()
+    data = b"straight" * 100000
+
+    def run():
+        with straight.networking.Connection("localhost", 1244) as connection:
+            sender = straight.threading.Thread.spawn(
+                lambda: (connection.writeall(data), connection.shutdown()))
+            received = connection.readall()
+            sender.result()
+        results.append(received)
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [len(data), data.upper()]
+
+
+def test_pipe_flush():
+    compressor = zlib.compressobj()
+    results = []
+
+    class CompressServer(straight.networking.Server):
+        def handle(self, connection):
+            results.append(straight.networking.pipe(
+                connection, compressor.compress, connection,
+                flush=compressor.flush))
+
+    server = CompressServer(1245)
+    server.start()
+    data = b"straight" * 10000
+
+    def run():
+        with straight.networking.Connection("localhost", 1245) as connection:
+            connection.writeall(data)
+            connection.shutdown()
+            compressed = connection.readall()
+        results.append(zlib.decompress(compressed))
+        results.append(len(compressed))
+
+    straight.threading.Thread.spawn(run).result()
+    assert results[1] == data
+    assert results[0] == results[2] < len(data)
+
+
+def test_pipe_back_pressure():
+    results = []
+    server = UpperServer(1246, results, max_buffered=65536)
+    server.start()
+    data = b"x" * (64 * 1048576)
+
+    def run():
+        connection = straight.networking.Connection("localhost", 1246)
+        # nothing is read back: once the socket buffers and the pipe are
+        # full, the server stops reading and writing times out
+        try:
+            connection.writeall(data, timeout=0.5)
+        except IOError:
+            pass
+        results.append(connection.metrics.bytes_written)
+        connection.close()
+
+    straight.threading.Thread.spawn(run).result()
+    straight.threading.Thread.sleep(0.05)
+    assert results[0] < len(data) // 2
+    # the pipe fails once the client is gone
+    assert isinstance(results[1], Exception)
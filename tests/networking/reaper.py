@@ -0,0 +1,49 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight.networking
+import straight.threading
+
+
+def test_reaper():
+    class SilentServer(straight.networking.Server):
+        def handle(self, connection):
+            while connection.read(1024):
+                pass
+
+    server = SilentServer(1241, max_idle=0.2)
+    server.start()
+    results = []
+
+    def run():
+        idle = straight.networking.Connection("localhost", 1241)
+        active = straight.networking.Connection("localhost", 1241)
+        stop = straight.threading.Event()
+
+        def ping():
+            while not stop.is_set():
+                active.writeall(b"ping")
+                straight.threading.Thread.sleep(0.1)
+
+        straight.threading.Thread(ping).start()
+        # the idle connection is closed by the server, the active one isn't
+        results.append(idle.read(1, timeout=3))
+        stop.set()
+        results.append(active.status)
+        results.append(server.metrics()["reaped"])
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [b"", 0, 1]
@@ -0,0 +1,121 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking.connection import BaseConnection
+import straight.networking
+import straight.threading
+
+import select
+import socket
+import struct
+import errno
+
+
+def connected():
+    """Returns a connected pair of TCP sockets: the first one wrapped in a
+    straight connection, the second one left as is (blocking)."""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    peer = socket.create_connection(listener.getsockname())
+    accepted, _ = listener.accept()
+    listener.close()
+    return BaseConnection(None, accepted, None), peer
+
+
+def reset(peer):
+    """Closes a socket abruptly, so that the other end gets ECONNRESET."""
+    peer.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                    struct.pack(b"ii", 1, 0))
+    peer.close()
+
+
+def receive(peer, count):
+    """Receives 'count' bytes from a blocking socket, or less if the stream
+    ends first, letting the loop run while waiting for them."""
+    data = b""
+    for _ in range(500):
+        if select.select([peer], [], [], 0)[0]:
+            received = peer.recv(count - len(data))
+            if not received:
+                break
+            data += received
+            if len(data) == count:
+                break
+        else:
+            straight.threading.Thread.sleep(0.01)
+    return data
+
+
+def test_relay():
+    first, first_peer = connected()
+    second, second_peer = connected()
+    first_peer.sendall(b"header\r\nbody")
+    assert first.readuntil(b"\r\n") == b"header\r\n"
+    relaying = straight.threading.Thread.spawn(
+        straight.networking.relay, first, second)
+
+    # data read ahead by readuntil is forwarded first
+    first_peer.sendall(b" and more")
+    first_peer.shutdown(socket.SHUT_WR)
+    assert receive(second_peer, 13) == b"body and more"
+    # the half close is forwarded, and data keeps flowing back
+    assert receive(second_peer, 1) == b""
+    second_peer.sendall(b"response")
+    second_peer.close()
+    assert relaying.result(2) == (13, 8)
+    assert receive(first_peer, 8) == b"response"
+    assert receive(first_peer, 1) == b""
+    assert first.metrics.bytes_read == 21
+    assert second.metrics.bytes_written == 13
+
+
+def test_relay_forward_failure():
+    first, first_peer = connected()
+    second, second_peer = connected()
+    relaying = straight.threading.Thread.spawn(
+        straight.networking.relay, first, second)
+    straight.threading.Thread.sleep(0.01)
+
+    # the idle backward direction is stopped as well
+    reset(first_peer)
+    try:
+        relaying.result(2)
+    except socket.error as e:
+        assert e.args[0] == errno.ECONNRESET
+    else:
+        assert False, "relay() did not fail"
+    assert second.status == 0
+    second_peer.close()
+
+
+def test_relay_backward_failure():
+    first, first_peer = connected()
+    second, second_peer = connected()
+    relaying = straight.threading.Thread.spawn(
+        straight.networking.relay, first, second)
+    straight.threading.Thread.sleep(0.01)
+
+    # the idle forward direction is stopped as well
+    reset(second_peer)
+    try:
+        relaying.result(2)
+    except socket.error as e:
+        assert e.args[0] == errno.ECONNRESET
+    else:
+        assert False, "relay() did not fail"
+    assert first.status == 0
+    first_peer.close()
@@ -0,0 +1,98 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking import Connection, RPCClient, RPCServer, RPCError
+import straight.threading
+
+import pytest
+import socket
+import errno
+
+
+def test_rpc_multiplexing():
+    def handler(payload):
+        if payload == b"fail":
+            raise ValueError("failed")
+        # later calls complete first
+        straight.threading.Thread.sleep(0.01 * (10 - int(payload)))
+        return payload * 2
+
+    server = RPCServer(1238, handler)
+    server.start()
+    results = {}
+
+    def run():
+        with RPCClient(Connection("localhost", 1238), max_outstanding=4) \
+                as client:
+            def call(i):
+                results[i] = client.call(str(i).encode(), timeout=5)
+
+            threads = [straight.threading.Thread(call, args=(i,))
+                       for i in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            with pytest.raises(RPCError):
+                client.call(b"fail", timeout=5)
+            assert client.outstanding == 0
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == dict((i, str(i).encode() * 2) for i in range(10))
+
+
+def test_rpc_server_options():
+    server = RPCServer(1251, max_idle=0.2)
+    server.start()
+    results = []
+
+    def run():
+        connection = Connection("localhost", 1251)
+        with RPCClient(connection) as client:
+            # no handler: the call fails, but the connection is kept
+            with pytest.raises(RPCError) as error:
+                client.call(b"anything", timeout=5)
+            results.append(str(error.value))
+            # the idle connection is closed by the server
+            straight.threading.Thread.sleep(2.5)
+            with pytest.raises(socket.error) as error:
+                client.call(b"anything", timeout=5)
+            results.append(error.value.args[0])
+
+    straight.threading.Thread.spawn(run).result()
+    assert results[0].startswith("StraightError")
+    assert results[1] == errno.ECONNRESET
+    assert server.metrics()["reaped"] == 1
+
+
+def test_rpc_timeout(caplog):
+    def handler(payload):
+        straight.threading.Thread.sleep(0.2)
+        return payload
+
+    server = RPCServer(1255, handler)
+    server.start()
+
+    def run():
+        with RPCClient(Connection("localhost", 1255)) as client:
+            # no time left: the call fails instead of waiting for the result
+            with pytest.raises(straight.threading.WaitTimeout):
+                client.call(b"late", timeout=0)
+            assert client.call(b"on time", timeout=5) == b"on time"
+
+    straight.threading.Thread.spawn(run).result()
+    # closing the client is not a failure
+    assert "RPC connection failed" not in caplog.text
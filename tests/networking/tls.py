@@ -0,0 +1,48 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.networking import tls
+import straight.networking
+import straight.threading
+
+import os
+
+CERTIFICATE = os.path.join(os.path.dirname(__file__), "localhost.pem")
+
+
+def test_tls_resumption():
+    class UpperServer(straight.networking.Server):
+        def handle(self, connection):
+            connection.writeall(connection.readuntil(b"\n").upper())
+
+    server = UpperServer(1237, ssl_context=tls.server_context(CERTIFICATE))
+    server.start()
+    results = []
+
+    def run():
+        context = tls.client_context(CERTIFICATE)
+        sessions = tls.SessionCache()
+        for _ in range(2):
+            with straight.networking.Connection(
+                    "localhost", 1237, 5, context,
+                    sessions.get("localhost")) as connection:
+                connection.writeall(b"hello\n")
+                results.append((connection.readall(6),
+                                connection.tls.session_reused))
+                sessions.put("localhost", connection.tls.session)
+
+    straight.threading.Thread.spawn(run).result()
+    assert results == [(b"HELLO\n", False), (b"HELLO\n", True)]
@@ -0,0 +1,47 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight.networking
+import straight.threading
+
+import os
+
+
+def test_unix_socket_fds():
+    path = "@straight-test-{0}".format(os.getpid())
+    received = []
+
+    class Server(straight.networking.Server):
+        def handle(self, connection):
+            data, fds = connection.recv_fds(16, 1)
+            with os.fdopen(fds[0], "rb") as f:
+                received.append((data, f.read()))
+            connection.writeall(b"ok")
+
+    server = Server(path)
+    server.start()
+
+    def run():
+        read_end, write_end = os.pipe()
+        os.write(write_end, b"through the pipe")
+        os.close(write_end)
+        with straight.networking.Connection(path) as connection:
+            connection.send_fds(b"fd", [read_end])
+            os.close(read_end)
+            assert connection.readall(2) == b"ok"
+
+    straight.threading.Thread.spawn(run).result()
+    assert received == [(b"fd", b"through the pipe")]
@@ -0,0 +1,102 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.process import ProcessPool
+import straight.threading
+
+import socket
+import pytest
+import time
+import os
+
+
+def fail():
+    raise ValueError("failed")
+
+
+def descriptors():
+    """Returns what the open descriptors of the process refer to."""
+    result = []
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            result.append(os.readlink("/proc/self/fd/" + fd))
+        except OSError:
+            """The descriptor used to list the directory."""
+    return result
+
+
+def run_concurrently(pool, count, target, *args):
+    futures = [straight.threading.Thread.spawn(pool.run, target, *args)
+               for _ in range(count)]
+    return [future.result() for future in futures]
+
+
+def test_run():
+    pool = ProcessPool(2)
+    try:
+        assert pool.run(pow, 2, 10) == 1024
+        # large payloads span many reads and writes
+        assert pool.run(bytes, 1024 * 1024) == bytes(1024 * 1024)
+        with pytest.raises(ValueError):
+            pool.run(fail)
+    finally:
+        pool.close()
+
+
+def test_concurrent():
+    pool = ProcessPool(2)
+    try:
+        # start both workers
+        run_concurrently(pool, 2, pow, 2, 3)
+        start = time.time()
+        run_concurrently(pool, 2, time.sleep, 0.5)
+        # both calls ran at the same time, without blocking the loop
+        assert time.time() - start < 0.9
+    finally:
+        pool.close()
+
+
+def test_timeout():
+    pool = ProcessPool(1)
+    try:
+        with pytest.raises(straight.threading.WaitTimeout):
+            pool.run(time.sleep, 10, timeout=0.5)
+        # the stuck worker was replaced
+        assert pool.run(pow, 2, 3) == 8
+    finally:
+        pool.close()
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"),
+                    reason="needs /proc to list the open descriptors")
+def test_descriptors():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    sockets = [os.readlink("/proc/self/fd/{0}".format(listener.fileno()))]
+    pool = ProcessPool(2)
+    try:
+        results = run_concurrently(pool, 2, descriptors)
+        # neither the listening socket nor the parent end of the sockets of
+        # the workers is open in the workers
+        for worker in pool._ProcessPool__idle:
+            sockets.append(os.readlink("/proc/self/fd/{0}".format(
+                worker._Worker__connection.fileno())))
+        for result in results:
+            assert not set(sockets) & set(result)
+    finally:
+        pool.close()
+        listener.close()
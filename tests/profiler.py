@@ -0,0 +1,87 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+from straight.profiler import Profiler, toggle_on_signal
+import straight.threading
+
+import signal
+import time
+import os
+
+
+def spin(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+def alpha():
+    spin(0.2)
+
+
+def beta():
+    spin(0.2)
+
+
+def test_profiler():
+    with Profiler(interval=0.001) as profiler:
+        first = straight.threading.Thread(alpha, "first")
+        second = straight.threading.Thread(beta, "second")
+        first.start()
+        second.start()
+        first.join()
+        second.join()
+    assert not profiler.running
+
+    samples = {}
+    for line in profiler.collapsed().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        names = [frame.split(" ")[0] for frame in stack.split(";")]
+        if "spin" in names:
+            # the thread name, and the function which called spin()
+            key = names[0], names[names.index("spin") - 1]
+            samples[key] = samples.get(key, 0) + int(count)
+
+    # each function is attributed to the thread that ran it
+    assert samples.get(("first", "alpha"), 0) > 10
+    assert samples.get(("second", "beta"), 0) > 10
+    assert ("first", "beta") not in samples
+    assert ("second", "alpha") not in samples
+
+    profiler.clear()
+    spin(0.05)
+    assert profiler.collapsed() == ""
+
+
+def test_toggle_on_signal(tmp_path):
+    path = str(tmp_path / "profile.txt")
+    previous = signal.getsignal(signal.SIGUSR2)
+    profiler = toggle_on_signal(path, interval=0.001)
+    try:
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert profiler.running
+        straight.threading.Thread(alpha, "toggled").start()
+        straight.threading.Thread.sleep(0.25)
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert not profiler.running
+    finally:
+        profiler.stop()
+        signal.signal(signal.SIGUSR2, previous)
+
+    with open(path) as f:
+        profile = f.read()
+    assert "toggled;" in profile
+    assert profiler.collapsed() == ""
@@ -26,16 +26,16 @@ def test_notify_one():
 
     t1 = straight.threading.Thread(run)
     t2 = straight.threading.Thread(run)
+    t1.start()
+    t2.start()
 
     straight.threading.Thread.sleep(0.5)
     with c:
-        c.notify_all()
+        c.notify()
     straight.threading.Thread.sleep(0.5)
-    assert not (t1.is_alive() or t1.is_alive())
-    if t1.is_alive():
-        t1.stop()
-    if t2.is_alive():
-        t2.stop()
+    assert t1.alive != t2.alive
+    t1.stop()
+    t2.stop()
 
 
 def test_notify_all():
@@ -47,12 +47,14 @@ def test_notify_all():
 
     t1 = straight.threading.Thread(run)
     t2 = straight.threading.Thread(run)
+    t1.start()
+    t2.start()
 
     straight.threading.Thread.sleep(0.5)
     with c:
         c.notify_all()
     straight.threading.Thread.sleep(0.5)
-    assert not (t1.is_alive() or t2.is_alive())
+    assert not (t1.alive or t2.alive)
 
 
 def test_no_notify():
@@ -64,10 +66,12 @@ def test_no_notify():
 
     t1 = straight.threading.Thread(run)
     t2 = straight.threading.Thread(run)
+    t1.start()
+    t2.start()
 
     with c:
         c.notify()
     straight.threading.Thread.sleep(0.5)
-    assert t1.is_alive() and t2.is_alive()
+    assert t1.alive and t2.alive
     t1.stop()
     t2.stop()
@@ -0,0 +1,54 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight.threading
+
+import pytest
+import time
+
+
+def test_result():
+    assert straight.threading.run_in_executor(sum, [1, 2, 3]) == 6
+
+
+def test_exception():
+    with pytest.raises(ZeroDivisionError):
+        straight.threading.run_in_executor(lambda: 1 / 0)
+
+
+def test_does_not_block_loop():
+    ticks = []
+
+    def tick():
+        for _ in range(5):
+            ticks.append(time.time())
+            straight.threading.Thread.sleep(0.1)
+
+    t = straight.threading.Thread(tick)
+    t.start()
+    start = time.time()
+    straight.threading.run_in_executor(time.sleep, 1.0)
+    t.join()
+    # the other thread kept running while the executor call blocked
+    assert len(ticks) == 5
+    assert ticks[-1] - start < 1.0
+
+
+def test_timeout():
+    with pytest.raises(straight.threading.WaitTimeout):
+        straight.threading.run_in_executor(time.sleep, 1.0, timeout=0.1)
+    with pytest.raises(straight.threading.WaitTimeout):
+        straight.threading.run_in_executor(time.sleep, 1.0, timeout=0)
@@ -0,0 +1,72 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight.threading
+
+import pytest
+
+
+def test_result():
+    def run(a, b):
+        straight.threading.Thread.sleep(0.1)
+        return a + b
+
+    future = straight.threading.Thread.spawn(run, 1, b=2)
+    assert not future.done()
+    assert future.result() == 3
+    assert future.done()
+    assert future.exception() is None
+
+
+def test_exception():
+    def run():
+        raise ValueError("failed")
+
+    future = straight.threading.Thread.spawn(run)
+    with pytest.raises(ValueError):
+        future.result(1.0)
+    assert isinstance(future.exception(), ValueError)
+
+
+def test_timeout():
+    future = straight.threading.Thread.spawn(straight.threading.Thread.sleep,
+                                             1.0)
+    with pytest.raises(straight.threading.WaitTimeout):
+        future.result(0.1)
+    # a timeout of 0 polls instead of blocking
+    with pytest.raises(straight.threading.WaitTimeout):
+        future.result(0)
+    with pytest.raises(straight.threading.WaitTimeout):
+        future.exception(-1)
+
+
+def test_callbacks():
+    results = []
+    future = straight.threading.Future()
+    future.add_done_callback(lambda f: results.append(f.result()))
+    future.set_result(42)
+    future.add_done_callback(lambda f: results.append(f.result()))
+    assert results == [42, 42]
+
+
+def test_stopped():
+    def run():
+        straight.threading.Thread.current().stop()
+        straight.threading.Thread.sleep(1000)
+
+    future = straight.threading.Thread.spawn(run)
+    with pytest.raises(RuntimeError):
+        future.result(1.0)
@@ -30,17 +30,19 @@ def test_basic():
 
     def run2():
         straight.threading.Thread.sleep(0.5)
-        with pytest.raises(straight.errors.WaitTimeout):
+        with pytest.raises(straight.threading.WaitTimeout):
             lock.acquire(0)
             errors.append("Double lock")  # must never be executed
         straight.threading.Thread.sleep(1.0)
         try:
             lock.acquire(0)
-        except straight.WaitTimeout:
+        except straight.threading.WaitTimeout:
             errors.append("Not unlocked")
 
     t1 = straight.threading.Thread(run1)
     t2 = straight.threading.Thread(run2)
+    t1.start()
+    t2.start()
 
     t1.join()
     t2.join()
@@ -67,6 +69,7 @@ def test_stress():
                 owner = None
 
         threads.append(straight.threading.Thread(run))
+        threads[-1].start()
 
     for thread in threads:
         thread.join()
@@ -0,0 +1,102 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight.threading
+
+import random
+import pytest
+
+
+def test_gather():
+    def run(i):
+        straight.threading.Thread.sleep(random.random() / 10)
+        return i * 2
+
+    group = straight.threading.TaskGroup()
+    for i in range(100):
+        group.spawn(run, i)
+    assert group.gather() == [i * 2 for i in range(100)]
+
+
+def test_limit():
+    global running, peak
+    running = peak = 0
+
+    def run():
+        global running, peak
+        running += 1
+        peak = max(peak, running)
+        straight.threading.Thread.sleep(0.01)
+        running -= 1
+
+    with straight.threading.TaskGroup(limit=5) as group:
+        for _ in range(100):
+            group.spawn(run)
+    assert peak == 5
+    assert running == 0
+
+
+def test_error():
+    finalized = []
+
+    def fail():
+        straight.threading.Thread.sleep(0.1)
+        raise ValueError("task failed")
+
+    def run():
+        try:
+            straight.threading.Thread.sleep(1000)
+        finally:
+            finalized.append(True)
+
+    group = straight.threading.TaskGroup()
+    group.spawn(run)
+    group.spawn(fail)
+    with pytest.raises(ValueError):
+        group.gather(1.0)
+    assert finalized
+
+
+def test_stop():
+    group = straight.threading.TaskGroup()
+    group.spawn(straight.threading.Thread.sleep, 1000)
+
+    def stop():
+        straight.threading.Thread.sleep(0.1)
+        group.stop()
+
+    straight.threading.Thread(stop).start()
+    with pytest.raises(RuntimeError):
+        group.gather(1.0)
+
+
+def test_exit_with_error():
+    finalized = []
+
+    def run():
+        try:
+            straight.threading.Thread.sleep(1000)
+        finally:
+            # cleaning up takes a while
+            straight.threading.Thread.sleep(0.1)
+            finalized.append(True)
+
+    with pytest.raises(ValueError):
+        with straight.threading.TaskGroup() as group:
+            group.spawn(run)
+            straight.threading.Thread.sleep(0)
+            raise ValueError("failed")
+    assert finalized
@@ -24,7 +24,9 @@ def test_basic():
 
     def test():
         messages.append("hello world from thread")
-    straight.threading.Thread(test).join()
+    thread = straight.threading.Thread(test)
+    thread.start()
+    thread.join()
     assert len(messages) != 0
 
 
@@ -50,6 +52,8 @@ def test_scheduling():
 
     t1 = straight.threading.Thread(run1)
     t2 = run2()
+    t1.start()
+    t2.start()
 
     t1.join()
     t2.join()
@@ -68,7 +72,30 @@ def test_stop():
             finalized = True
 
     t = straight.threading.Thread(run)
+    t.start()
     straight.threading.Thread.sleep(1)
     t.stop()
     t.join()
     assert finalized
+
+
+def test_stats():
+    event = straight.threading.Event()
+
+    def run():
+        event.wait()
+
+    straight.threading.stats.enable()
+    try:
+        t = straight.threading.Thread(run)
+        t.start()
+        straight.threading.Thread.sleep(0.2)
+        event.set()
+        t.join()
+    finally:
+        straight.threading.stats.disable()
+
+    stats = t.stats()
+    assert stats["switches"] == 2
+    assert stats["last_wait"] == "Event.wait"
+    assert 0.1 < stats["sync_wait"] < 0.3
@@ -0,0 +1,91 @@
+# coding=utf-8
+"""This file is part of Straight.
+
+Straight is free software: you can redistribute it and/or modify it under the
+terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+Straight is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE. See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with Straight. If not, see <http://www.gnu.org/licenses/>."""
+from __future__ import absolute_import, division, unicode_literals
+
+import straight.threading
+
+import pytest
+
+
+def test_wait_any():
+    events = [straight.threading.Event() for _ in range(3)]
+
+    def run():
+        straight.threading.Thread.sleep(0.5)
+        events[1].set()
+
+    straight.threading.Thread(run).start()
+    assert straight.threading.wait_any(events) is events[1]
+    # the waiting thread must have been removed from the other events
+    for event in events:
+        assert not event._Event__waiters
+
+
+def test_wait_any_timeout():
+    events = [straight.threading.Event() for _ in range(3)]
+    with pytest.raises(straight.threading.WaitTimeout):
+        straight.threading.wait_any(events, 0.5)
+    for event in events:
+        assert not event._Event__waiters
+
+
+def test_wait_all():
+    events = [straight.threading.Event() for _ in range(3)]
+
+    def run():
+        for event in reversed(events):
+            straight.threading.Thread.sleep(0.1)
+            event.set()
+
+    straight.threading.Thread(run).start()
+    fired = straight.threading.wait_all(events, 1.0)
+    assert fired == list(reversed(events))
+
+
+def test_wait_all_same_iteration():
+    events = [straight.threading.Event() for _ in range(2)]
+
+    def run():
+        straight.threading.Thread.sleep(0.1)
+        # the second event is set before the waiting thread gets to run
+        events[1].set()
+        events[0].set()
+
+    straight.threading.Thread(run).start()
+    fired = straight.threading.wait_all(events, 1.0)
+    assert fired == [events[1], events[0]]
+
+
+def test_wait_all_timeout():
+    events = [straight.threading.Event() for _ in range(2)]
+    events[0].set()
+    with pytest.raises(straight.threading.WaitTimeout):
+        straight.threading.wait_all(events, 0.5)
+    assert not events[1]._Event__waiters
+
+
+def test_wait_all_pulse():
+    events = [straight.threading.Event() for _ in range(2)]
+
+    def run():
+        straight.threading.Thread.sleep(0.1)
+        events[0].set()
+        # set and cleared before the waiting thread gets to run
+        events[1].set()
+        events[1].clear()
+
+    straight.threading.Thread(run).start()
+    fired = straight.threading.wait_all(events, 0.5)
+    assert fired == events